@@ -0,0 +1,46 @@
+"""Per-call cost of formatting one datetime
+
+Times ``dtformat`` on ``datetime`` input, with and without ``output_tz``,
+formatting with a new ``DateTimeFormatter``, with a reused one and with one
+rebound to each datetime through ``DateTimeFormatter.rebind``.
+
+    PYTHONPATH=. python benchmarks/bench_format.py
+"""
+import datetime  # type: ignore
+import sys
+import timeit
+
+from datetime_formatter import DateTimeFormatter, dtformat
+
+DT = datetime.datetime(2021, 5, 27, 14, 30, 15)
+AWARE = DT.replace(tzinfo=datetime.timezone.utc)
+FORMATTER = DateTimeFormatter(DT)
+
+CASES = {
+    "dtformat": lambda: dtformat(DT, "DATETIME"),
+    "dtformat output_tz": lambda: dtformat(AWARE, "DATETIME", "UTC"),
+    # a time of day field, as date-only output is kept per date
+    "dtformat translation": lambda: dtformat(DT, "DATETIME-P1D"),
+    "new formatter": lambda: DateTimeFormatter(DT).format("%DATETIME%"),
+    "formatter.format": lambda: FORMATTER.format("%DATETIME%"),
+}
+if hasattr(DateTimeFormatter, "rebind"):
+    CASES["formatter.rebind"] = lambda: FORMATTER.rebind(DT).format(
+        "%DATETIME%"
+    )
+
+
+def per_call(func, number=20000):
+    func()
+    best = min(timeit.repeat(func, number=number, repeat=9))
+    return best / number * 1e6
+
+
+def main():
+    for name, func in CASES.items():
+        print(f"{name:22s} {per_call(func):6.2f}us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Import time of ``datetime_formatter``
+
+Runs ``python -X importtime -c "import datetime_formatter"`` a few times and
+reports the best cumulative import time of the package.  Exits non-zero if
+that exceeds ``MAX_IMPORT_MS``, or if importing the package pulls in any of
+the dependencies that should only be imported once used.
+
+    PYTHONPATH=. python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+
+MAX_IMPORT_MS = 50.0
+RUNS = 5
+# imported lazily, on the code paths that need them
+LAZY = ["attr", "holidays", "dateutil", "logging", "numpy"]
+
+
+def import_time():
+    """Cumulative microseconds per module imported by a fresh interpreter"""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import datetime_formatter",
+        ],
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE=""),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    import_time()  # write bytecode caches outside the timing
+    runs = [import_time() for _ in range(RUNS)]
+    best = min(times["datetime_formatter"] for times in runs) / 1000
+    eager = sorted({name.split(".")[0] for name in runs[0]} & set(LAZY))
+    print(f"import datetime_formatter {best:7.2f}ms (max {MAX_IMPORT_MS}ms)")
+    if eager:
+        print(f"imported eagerly: {', '.join(eager)}")
+    return 1 if eager or best > MAX_IMPORT_MS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
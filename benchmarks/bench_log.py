@@ -0,0 +1,74 @@
+"""Per-record cost of rendering ``asctime``
+
+Times ``formatTime`` of ``logging.Formatter``, of a formatter calling
+``dtformat`` for every record and of ``DateTimeLogFormatter``, over records
+a millisecond apart.  Exits non-zero if ``DateTimeLogFormatter`` is slower
+than calling ``dtformat``.
+
+    PYTHONPATH=. python benchmarks/bench_log.py
+"""
+import datetime  # type: ignore
+import logging
+import sys
+import timeit
+
+from datetime_formatter import DateTimeLogFormatter, dtformat
+
+DATEFMTS = ["DATETIME", "%DATETIME%.%ZZ%", "ISODATETIME"]
+OUTPUT_TZ = [None, "UTC"]
+
+
+def _record(created):
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "", (), None)
+    record.created = created
+    return record
+
+
+RECORDS = [_record(1622125815.0 + i / 1000) for i in range(20000)]
+
+
+class DtformatFormatter(logging.Formatter):
+    def __init__(self, datefmt, output_tz):
+        super().__init__(datefmt=datefmt)
+        self.output_tz = output_tz
+
+    def formatTime(self, record, datefmt=None):
+        if self.output_tz is None:
+            dt = datetime.datetime.fromtimestamp(record.created)
+        else:
+            dt = datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            )
+        return dtformat(dt, datefmt, self.output_tz)
+
+
+def per_record(formatter, number=3):
+    def run():
+        for record in RECORDS:
+            formatter.formatTime(record, formatter.datefmt)
+
+    run()
+    best = min(timeit.repeat(run, number=number))
+    return best / number / len(RECORDS) * 1e6
+
+
+def main():
+    failed = False
+    stdlib = per_record(logging.Formatter())
+    print(f"logging.Formatter default {stdlib:5.2f}us")
+    for datefmt in DATEFMTS:
+        for output_tz in OUTPUT_TZ:
+            naive = per_record(DtformatFormatter(datefmt, output_tz))
+            ours = per_record(
+                DateTimeLogFormatter(datefmt=datefmt, output_tz=output_tz)
+            )
+            failed |= ours > naive
+            print(
+                f"{datefmt:16s} {str(output_tz):4s} dtformat {naive:5.2f}us  "
+                f"DateTimeLogFormatter {ours:5.2f}us"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""Per-row cost of date-only templates over timestamps sharing few dates
+
+Times ``dtformat_many`` over a day of timestamps with a date-only template,
+with the per-date memo of the compiled template and without it, and exits
+non-zero if the memo is slower.
+
+    PYTHONPATH=. python benchmarks/bench_memo.py
+"""
+import datetime  # type: ignore
+import sys
+import timeit
+
+from datetime_formatter import dtformat_many
+from datetime_formatter.__template import _compile_template
+
+TEMPLATE = "%DATE%/%YMD-M1B%"
+START = datetime.datetime(2021, 5, 27)
+ROWS = [START + datetime.timedelta(seconds=7 * i) for i in range(20000)]
+
+
+def per_row(number=3):
+    dtformat_many(ROWS, TEMPLATE)
+    best = min(
+        timeit.repeat(lambda: dtformat_many(ROWS, TEMPLATE), number=number)
+    )
+    return best / number / len(ROWS) * 1e6
+
+
+def main():
+    compiled = _compile_template(TEMPLATE)
+    memo = compiled.memo
+    compiled.memo = None
+    before = per_row()
+    compiled.memo = memo
+    after = per_row()
+    print(f"{TEMPLATE}  no memo {before:5.2f}us/row  memo {after:5.2f}us/row")
+    return 1 if after > before else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
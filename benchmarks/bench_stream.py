@@ -0,0 +1,42 @@
+"""Per-row cost of formatting sorted timestamps
+
+Times ``dtformat`` per value, ``dtformat_many`` and a
+``DateTimeStreamFormatter`` over a few minutes of sorted timestamps, and
+exits non-zero if the stream formatter is slower than ``dtformat_many``.
+
+    PYTHONPATH=. python benchmarks/bench_stream.py
+"""
+import datetime  # type: ignore
+import sys
+import timeit
+
+from datetime_formatter import DateTimeStreamFormatter, dtformat, dtformat_many
+
+TEMPLATES = ["%DATETIME%", "%DATE% %HH%:%MIN%:%SS%.%ZZ%", "%YMD-M1B%"]
+START = datetime.datetime(2021, 5, 27, 14, 30)
+ROWS = [START + datetime.timedelta(milliseconds=13 * i) for i in range(20000)]
+
+
+def per_row(func, number=3):
+    func()
+    best = min(timeit.repeat(func, number=number))
+    return best / number / len(ROWS) * 1e6
+
+
+def main():
+    failed = False
+    for template in TEMPLATES:
+        single = per_row(lambda: [dtformat(v, template) for v in ROWS])
+        many = per_row(lambda: dtformat_many(ROWS, template))
+        stream = DateTimeStreamFormatter(template)
+        streamed = per_row(lambda: [stream(v) for v in ROWS])
+        failed |= streamed > many
+        print(
+            f"{template:28s} dtformat {single:5.2f}us  "
+            f"dtformat_many {many:5.2f}us  stream {streamed:5.2f}us"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
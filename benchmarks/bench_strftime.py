@@ -0,0 +1,60 @@
+"""Per-call cost of rendering each output format shortcut
+
+Times ``datetime.strftime`` against the renderer each shortcut is compiled
+to, and exits non-zero if any compiled renderer is not at least
+``MIN_SPEEDUP`` times faster than ``strftime``.
+
+    PYTHONPATH=. python benchmarks/bench_strftime.py
+"""
+import datetime  # type: ignore
+import math
+import sys
+import timeit
+
+from datetime_formatter.__formats import _SUPPORTED_DATETIME_OUTPUT_FORMATS
+from datetime_formatter.__strftime import _compile_strftime
+
+MIN_SPEEDUP = 3.0
+DT = datetime.datetime(2021, 5, 27, 14, 30, 15, 250)
+SHORTCUTS = [
+    "DATE",
+    "DATETIME",
+    "YMD",
+    "YYYYMMDD",
+    "HHMMSS",
+    "HHMMSSZZ",
+    "USDATE",
+    "MONTHABV",
+    "DAYNAME",
+    "WEEKNUM",
+]
+
+
+def per_call(funcs, number=20000, repeat=9):
+    """Best per-call time of each function, in microseconds; the functions
+    are timed in turn within each repeat, so they share any noise"""
+    best = [math.inf] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            elapsed = timeit.timeit(lambda: func(DT), number=number)
+            best[i] = min(best[i], elapsed)
+    return [b / number * 1e6 for b in best]
+
+
+def main():
+    failed = False
+    for name in SHORTCUTS:
+        stfmt = _SUPPORTED_DATETIME_OUTPUT_FORMATS[name]
+        before, after = per_call(
+            [lambda dt: dt.strftime(stfmt), _compile_strftime(stfmt)]
+        )
+        failed |= before / after < MIN_SPEEDUP
+        print(
+            f"{name:10s} strftime {before:5.2f}us  compiled {after:5.2f}us  "
+            f"x{before / after:4.1f}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
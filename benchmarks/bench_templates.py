@@ -0,0 +1,47 @@
+"""Cost of expanding many templates against one run date
+
+Times a ``dtformat`` call per template against one ``dtformat_templates``
+call for all of them, for a config-like mapping whose templates share a few
+business day translations, and exits non-zero if ``dtformat_templates`` is
+slower.
+
+    PYTHONPATH=. python benchmarks/bench_templates.py
+"""
+import sys
+import timeit
+
+import holidays
+
+from datetime_formatter import dtformat, dtformat_templates
+
+RUN_DATE = "2021-05-27 06:00:00"
+HOLIDAYS = holidays.US()
+TEMPLATES = {
+    f"key{i}": f"%YMD-M{i % 5}B%/data/part_%HH%_{i}.csv" for i in range(200)
+}
+
+
+def per_call(func, number=20):
+    func()
+    return min(timeit.repeat(func, number=number)) / number * 1e3
+
+
+def main():
+    before = per_call(
+        lambda: {
+            key: dtformat(RUN_DATE, fmtstr, holidays=HOLIDAYS)
+            for key, fmtstr in TEMPLATES.items()
+        }
+    )
+    after = per_call(
+        lambda: dtformat_templates(RUN_DATE, TEMPLATES, holidays=HOLIDAYS)
+    )
+    print(
+        f"{len(TEMPLATES)} templates  dtformat {before:6.2f}ms  "
+        f"dtformat_templates {after:6.2f}ms"
+    )
+    return 1 if after > before else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
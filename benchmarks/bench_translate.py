@@ -0,0 +1,46 @@
+"""Translation cost must not grow with the number of units translated
+
+Times small and large translations of every date unit, with and without
+holidays, and exits non-zero if a large translation costs more than
+``MAX_RATIO`` times the small one.  Fields include the time of day, so
+each call translates rather than reusing the output kept per date.
+
+    PYTHONPATH=. python benchmarks/bench_translate.py
+"""
+import datetime  # type: ignore
+import sys
+import timeit
+
+import holidays
+
+from datetime_formatter import DateTimeFormatter
+
+MAX_RATIO = 3.0
+SIZES = ["D", "W", "m", "Y", "B", "F", "P", "K"]
+
+
+def per_call(dtf, template, number=2000):
+    dtf.format(template)  # build calendars/caches outside the timing
+    best = min(timeit.repeat(lambda: dtf.format(template), number=number))
+    return best / number * 1e6
+
+
+def main():
+    failed = False
+    start = datetime.datetime(2021, 5, 27)
+    for label, hols in [("none", None), ("US", holidays.US())]:
+        dtf = DateTimeFormatter(start, hols)
+        for size in SIZES:
+            small = per_call(dtf, f"%DATETIME-P2{size}%")
+            large = per_call(dtf, f"%DATETIME-P3650{size}%")
+            ratio = large / small
+            failed |= ratio > MAX_RATIO
+            print(
+                f"holidays={label:4s} P2{size} {small:7.2f}us  "
+                f"P3650{size} {large:7.2f}us  ratio {ratio:5.2f}"
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Per-call cost of resolving ``output_tz`` and converting to it
+
+Times resolving a timezone name and converting an aware datetime to it
+without any caching (``dateutil.tz.gettz.nocache``, which reads the zone
+file every time), and with each tz backend's cached resolution, then the
+same for whole ``dtformat`` calls.  Exits non-zero if a cached conversion is
+slower than the uncached one.
+
+    PYTHONPATH=. python benchmarks/bench_tz.py
+"""
+import datetime  # type: ignore
+import sys
+import timeit
+
+import dateutil.tz  # type: ignore
+
+from datetime_formatter import (
+    DateTimeFormatTimeZoneError,
+    dtformat,
+    set_tz_backend,
+)
+from datetime_formatter.__tz import _resolve_tz
+
+DT = datetime.datetime(2021, 5, 27, 14, 30, tzinfo=datetime.timezone.utc)
+ZONES = ["America/New_York", "UTC", "+05:30"]
+
+
+def per_call(func, number=20000):
+    func()  # fill caches outside the timing
+    best = min(timeit.repeat(func, number=number))
+    return best / number * 1e6
+
+
+def main():
+    failed = False
+    for name in ZONES:
+        # gettz itself caches its instances, so would only time a dict hit
+        if dateutil.tz.gettz.nocache(name) is None:
+            before = None
+            print(f"{name:17s} uncached gettz     unsupported")
+        else:
+            before = per_call(
+                lambda: DT.astimezone(dateutil.tz.gettz.nocache(name)), 500
+            )
+            print(f"{name:17s} uncached gettz     convert {before:6.2f}us")
+        for backend in ["dateutil", "zoneinfo"]:
+            set_tz_backend(backend)
+            try:
+                _resolve_tz(name)
+            except DateTimeFormatTimeZoneError:
+                print(f"{name:17s} {backend:8s} unsupported")
+                continue
+            after = per_call(lambda: DT.astimezone(_resolve_tz(name)))
+            full = per_call(lambda: dtformat(DT, "DATETIME", name), 5000)
+            failed |= before is not None and after > before
+            print(
+                f"{name:17s} {backend:8s} cached  convert {after:6.2f}us  "
+                f"dtformat {full:6.2f}us"
+            )
+    set_tz_backend("dateutil")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,542 @@
+from array import array
+import bisect
+import datetime  # type: ignore
+import itertools
+import mmap
+import re
+import struct
+import sys
+
+from typing import Dict, FrozenSet, Tuple
+
+# strftime("%Y-%m-%d") output, which is how holidays are looked up
+_HOLIDAY_KEY_REGEX = re.compile(r"([0-9]+)-([0-9]{2})-([0-9]{2})")
+
+_MAX_ORDINAL = datetime.date.max.toordinal()
+
+# Monday to Sunday, "1" for business days
+_DEFAULT_WEEKMASK = "1111100"
+_ALL_DAYS = "1111111"
+
+
+def _holiday_key_ordinal(key):
+    """Ordinal of the day whose ``strftime("%Y-%m-%d")`` is ``key``, if any"""
+    m = _HOLIDAY_KEY_REGEX.fullmatch(key)
+    if m is None:
+        return None
+    try:
+        day = datetime.date(*(int(f) for f in m.groups()))
+    except ValueError:
+        return None
+    if day.strftime("%Y-%m-%d") != key:
+        return None
+    return day.toordinal()
+
+
+def _parse_weekmask(weekmask):
+    """``weekmask`` as a string of seven ``"1"``/``"0"``, Monday first"""
+    if not isinstance(weekmask, str):
+        weekmask = "".join("1" if day else "0" for day in weekmask)
+    if len(weekmask) != 7 or weekmask.strip("01") or "1" not in weekmask:
+        raise ValueError(
+            f"invalid weekmask {weekmask}, must be seven 1 (business day) or "
+            "0 characters from Monday to Sunday, with at least one 1"
+        )
+    return weekmask
+
+
+def _weekdays_through(ordinal, weekmask):
+    # number of weekmask days in [1, ordinal], ordinal 1 (0001-01-01) is a
+    # Monday
+    weeks, day = divmod(ordinal, 7)
+    return weeks * weekmask.count("1") + weekmask.count("1", 0, day)
+
+
+def _nth_weekday(n, weekmask):
+    weeks, day = divmod(n - 1, weekmask.count("1"))
+    return weeks * 7 + [i for i, d in enumerate(weekmask) if d == "1"][day] + 1
+
+
+def _weekday_offset(ordinal, num, weekmask):
+    """The ``num``-th ``weekmask`` day after (or, if negative, before)
+    ``ordinal``, in one step"""
+    if num > 0:
+        new = _nth_weekday(
+            _weekdays_through(ordinal, weekmask) + num, weekmask
+        )
+    else:
+        new = _nth_weekday(
+            _weekdays_through(ordinal - 1, weekmask) + num + 1, weekmask
+        )
+    if new < 1 or new > _MAX_ORDINAL:
+        raise ValueError(
+            f"cannot find valid date {num} days from "
+            f"{datetime.date.fromordinal(ordinal)}, ran out of calendar"
+        )
+    return new
+
+
+def _holiday_ordinal(holiday):
+    if isinstance(holiday, str):
+        return _holiday_key_ordinal(holiday)
+    if isinstance(holiday, datetime.date):
+        return holiday.toordinal()
+    return None
+
+
+# HolidayCalendar files: magic, first year, last year, number of ordinals,
+# followed by that many little-endian int32 ordinals
+_CALENDAR_MAGIC = b"DTFMTHOL"
+_CALENDAR_HEADER = struct.Struct("<8siii4x")
+
+
+class HolidayCalendar:
+    """Holidays materialized over a range of years as sorted day ordinals
+
+    Build one from any holidays source (dict, ``holidays.HolidayBase``,
+    iterable of dates, ...) with :meth:`from_holidays`, write it out with
+    :meth:`save` and memory-map it back with :meth:`load`, so e.g. worker
+    processes need not evaluate holiday rules on startup.  Can be passed as
+    ``holidays`` anywhere; years outside ``first_year`` to ``last_year``
+    have no holidays.
+    """
+
+    def __init__(self, ordinals, first_year: int, last_year: int):
+        self.first_year = first_year
+        self.last_year = last_year
+        # sorted date ordinals, an array or a memoryview of a mapped file
+        self._ordinals = ordinals
+        # calendars do not change, so are normalized once
+        self._normalized = _HolidayOrdinals(self)
+
+    @classmethod
+    def from_holidays(
+        cls, holidays, first_year: int, last_year: int
+    ) -> "HolidayCalendar":
+        normalized = _normalize_holidays(holidays)
+        ordinals = array("i", normalized.ordinals(first_year, last_year))
+        return cls(ordinals, first_year, last_year)
+
+    def save(self, path) -> None:
+        ordinals = array("i", self._ordinals)
+        if sys.byteorder != "little":  # pragma: no cover
+            ordinals.byteswap()
+        with open(path, "wb") as f:
+            f.write(
+                _CALENDAR_HEADER.pack(
+                    _CALENDAR_MAGIC,
+                    self.first_year,
+                    self.last_year,
+                    len(ordinals),
+                )
+            )
+            ordinals.tofile(f)
+
+    @classmethod
+    def load(cls, path) -> "HolidayCalendar":
+        """Memory-map a calendar written by :meth:`save`"""
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _CALENDAR_HEADER.size
+        magic, first_year, last_year, count = (None, 0, 0, 0)
+        if len(mapped) >= header:
+            magic, first_year, last_year, count = _CALENDAR_HEADER.unpack_from(
+                mapped
+            )
+        if magic != _CALENDAR_MAGIC or len(mapped) != header + count * 4:
+            mapped.close()
+            raise ValueError(f"{path} is not a holiday calendar file")
+        view = memoryview(mapped)[header:].cast("i")
+        if sys.byteorder != "little":  # pragma: no cover
+            swapped = array("i", view)
+            swapped.byteswap()
+            return cls(swapped, first_year, last_year)
+        return cls(view, first_year, last_year)
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def __iter__(self):
+        return (datetime.date.fromordinal(o) for o in self._ordinals)
+
+    def __contains__(self, day):
+        ordinal = _holiday_ordinal(day)
+        if ordinal is None:
+            return False
+        i = bisect.bisect_left(self._ordinals, ordinal)
+        return i < len(self._ordinals) and self._ordinals[i] == ordinal
+
+    def _between(self, first, last):
+        """Ordinals of the holidays from ordinal ``first`` to ``last``"""
+        ordinals = self._ordinals
+        lo = bisect.bisect_left(ordinals, first)
+        return ordinals[lo : bisect.bisect_right(ordinals, last, lo)]
+
+
+class BusinessCalendar:
+    """Holidays plus the days of the week business is done on
+
+    ``weekmask`` has a ``"1"`` (business day) or ``"0"`` for each day from
+    Monday to Sunday, as for ``numpy.busday_offset``, e.g. ``"1111001"`` for
+    a Friday/Saturday weekend; a sequence of seven booleans works too.  Pass
+    a ``BusinessCalendar`` as ``holidays`` and the business translation
+    sizes (``B``, ``F``, ``P``, ``K``) skip the days outside its weekmask
+    as well as its holidays, while the other sizes only skip its holidays.
+    ``holidays`` takes anything ``dtformat`` does.
+    """
+
+    def __init__(self, holidays=None, weekmask: str = _DEFAULT_WEEKMASK):
+        self.holidays = holidays
+        self.weekmask = _parse_weekmask(weekmask)
+        self._normalized = _HolidayOrdinals(
+            () if holidays is None else holidays, self.weekmask
+        )
+
+    def is_business_day(self, day: datetime.date) -> bool:
+        calendar = self._normalized.calendar(False)
+        return calendar.valid(day.toordinal())
+
+
+class _HolidayOrdinals:
+    """Holidays normalized to the ordinals of their days, grouped by year
+
+    Accepts dicts (and other containers) keyed by ``"YYYY-MM-DD"`` strings,
+    ``holidays.HolidayBase``, :class:`HolidayCalendar` and iterables of dates
+    or such strings.  ``HolidayBase`` populates years on demand and
+    ``HolidayCalendar`` may be memory-mapped, so their years are read as
+    they are needed, everything else is read once up front.
+    """
+
+    def __init__(self, holidays, weekmask=_DEFAULT_WEEKMASK):
+        self.holidays = holidays
+        # the business days of the week, see BusinessCalendar
+        self.weekmask = weekmask
+        self._lazy = isinstance(holidays, HolidayCalendar) or hasattr(
+            holidays, "__keytransform__"
+        )
+        self._years = {}
+        self._calendars = {}
+        if not self._lazy:
+            years = {}
+            for holiday in holidays:
+                ordinal = _holiday_ordinal(holiday)
+                if ordinal is not None:
+                    yyyy = datetime.date.fromordinal(ordinal).year
+                    years.setdefault(yyyy, set()).add(ordinal)
+            for yyyy, ordinals in years.items():
+                self._years[yyyy] = frozenset(ordinals)
+
+    @property
+    def empty(self):
+        return not self._lazy and not self._years
+
+    def year(self, yyyy):
+        """Ordinals of the holidays in ``yyyy``"""
+        ordinals = self._years.get(yyyy, None)
+        if ordinals is None:
+            if not self._lazy:
+                return _NO_ORDINALS
+            if isinstance(self.holidays, HolidayCalendar):
+                ordinals = frozenset(
+                    self.holidays._between(
+                        datetime.date(yyyy, 1, 1).toordinal(),
+                        datetime.date(yyyy, 12, 31).toordinal(),
+                    )
+                )
+                self._years[yyyy] = ordinals
+            else:
+                self._read_holiday_base(yyyy)
+                ordinals = self._years[yyyy]
+        return ordinals
+
+    def _read_holiday_base(self, yyyy):
+        """Read ``yyyy`` and every other year ``HolidayBase`` has populated
+        so far, in one pass over its keys"""
+        # looking up any day of a year makes HolidayBase populate it
+        self.holidays.get(datetime.date(yyyy, 1, 1))
+        years = {
+            y: set()
+            for y in getattr(self.holidays, "years", ())
+            if y not in self._years
+        }
+        years.setdefault(yyyy, set())
+        for day in self.holidays:
+            ordinals = years.get(day.year, None)
+            if ordinals is not None:
+                ordinals.add(day.toordinal())
+        for y, ordinals in years.items():
+            self._years[y] = frozenset(ordinals)
+
+    def ordinals(self, first, last):
+        """Sorted ordinals of the holidays in years ``first`` to ``last``"""
+        if self._lazy:
+            years = range(first, last + 1)
+        else:
+            years = [yyyy for yyyy in self._years if first <= yyyy <= last]
+        return sorted(o for yyyy in years for o in self.year(yyyy))
+
+    def calendar(self, weekends):
+        """The (cached) :class:`_BusinessDayCalendar` skipping these
+        holidays, and days outside ``weekmask`` unless ``weekends`` is set"""
+        weekmask = _ALL_DAYS if weekends else self.weekmask
+        calendar = self._calendars.get(weekmask, None)
+        if calendar is None:
+            calendar = _BusinessDayCalendar(self, weekmask)
+            self._calendars[weekmask] = calendar
+        return calendar
+
+
+_NO_ORDINALS: FrozenSet[int] = frozenset()
+
+
+class _BusinessDayCalendar:
+    """The days a date translation may land on
+
+    Each year is precompiled into a bitmap of its valid days, from which
+    sorted lists of valid ordinals are taken a month at a time, and a
+    running count of valid days, so counts are a subtraction and offsets a
+    bisect.  Whole years are skipped with a bisect of running counts at the
+    start of each year.  ``holidays`` is a
+    :class:`_HolidayOrdinals`, ``weekmask`` has a ``"1"`` for each day of
+    the week (Monday first) that may be landed on.
+    """
+
+    def __init__(self, holidays, weekmask=_ALL_DAYS):
+        self.holidays = holidays
+        self.weekmask = weekmask
+        self._pattern = bytes(int(d) for d in weekmask)
+        self._years = {}
+        self._months = {}
+        self._counts = {}
+        # (first year, running counts at the start of each year from it),
+        # replaced as a whole, see _year_starts
+        self._starts = (datetime.MINYEAR, ())
+
+    def _year_bits(self, yyyy):
+        """One byte per day of ``yyyy``, set for valid days"""
+        bits = self._years.get(yyyy, None)
+        if bits is None:
+            if yyyy < datetime.MINYEAR or yyyy > datetime.MAXYEAR:
+                raise ValueError(
+                    "cannot find valid date, ran out of calendar at year "
+                    f"{yyyy}"
+                )
+            start = datetime.date(yyyy, 1, 1).toordinal()
+            size = datetime.date(yyyy, 12, 31).toordinal() - start + 1
+            # ordinal 1 (0001-01-01) is a Monday
+            shift = (start - 1) % 7
+            pattern = self._pattern[shift:] + self._pattern[:shift]
+            bits = bytearray(pattern * 53)[:size]
+            for o in self.holidays.year(yyyy):
+                bits[o - start] = 0
+            self._years[yyyy] = bits
+        return bits
+
+    def valid(self, ordinal):
+        yyyy = datetime.date.fromordinal(ordinal).year
+        first = datetime.date(yyyy, 1, 1).toordinal()
+        return bool(self._year_bits(yyyy)[ordinal - first])
+
+    def _days(self, month):
+        """Sorted ordinals of the valid days in ``month``, counted in months
+        since 0000-01"""
+        days = self._months.get(month, None)
+        if days is None:
+            yyyy, mm = divmod(month, 12)
+            bits = self._year_bits(yyyy)
+            first = datetime.date(yyyy, 1, 1).toordinal()
+            start = datetime.date(yyyy, mm + 1, 1).toordinal()
+            if mm == 11:
+                end = start + 31
+            else:
+                end = datetime.date(yyyy, mm + 2, 1).toordinal()
+            days = list(
+                itertools.compress(
+                    range(start, end), bits[start - first : end - first]
+                )
+            )
+            self._months[month] = days
+        return days
+
+    def _year_counts(self, yyyy):
+        """Number of valid days in ``yyyy`` before each of its days, then in
+        the whole year"""
+        counts = self._counts.get(yyyy, None)
+        if counts is None:
+            counts = array(
+                "i", itertools.accumulate(self._year_bits(yyyy), initial=0)
+            )
+            self._counts[yyyy] = counts
+        return counts
+
+    def _year_size(self, yyyy):
+        return self._year_counts(yyyy)[-1]
+
+    def _year_starts(self, first, last):
+        """``(year, starts)``, where ``starts[k]`` is the number of valid days
+        from the start of ``year`` to the start of ``year + k``, for at least
+        ``first`` to ``last`` (up to ``MAXYEAR + 1``, the end of the
+        calendar)"""
+        year, starts = self._starts
+        if starts and year <= first and last < year + len(starts):
+            return year, starts
+        # only grown where the two meet, rather than read holidays for
+        # every year in between
+        if starts and first <= year + len(starts) and year <= last + 1:
+            first = min(first, year)
+            last = max(last, year + len(starts) - 1)
+        starts = list(
+            itertools.accumulate(
+                map(self._year_size, range(first, last)), initial=0
+            )
+        )
+        self._starts = (first, starts)
+        return first, starts
+
+    def _skip_forward(self, yyyy, i):
+        """The year of the ``i``-th valid day from the start of ``yyyy``,
+        counting from 0, and the index of that day within its year"""
+        # years have at most 366 valid days, so the day is in yyyy + i // 366
+        # or later
+        last = min(yyyy + i // 366 + 1, datetime.MAXYEAR + 1)
+        while True:
+            year, starts = self._year_starts(yyyy, last)
+            base = starts[yyyy - year]
+            if starts[last - year] - base > i:
+                k = bisect.bisect_right(starts, base + i, yyyy - year) - 1
+                return year + k, i - (starts[k] - base)
+            if last > datetime.MAXYEAR:
+                self._year_bits(last)  # raises, out of calendar
+            last = min(2 * last - yyyy, datetime.MAXYEAR + 1)
+
+    def _skip_backward(self, yyyy, i):
+        """The year of the ``-i``-th valid day back from the end of
+        ``yyyy``, counting from 1, and its (negative) index within its
+        year"""
+        first = max(yyyy + i // 366, datetime.MINYEAR)
+        while True:
+            year, starts = self._year_starts(first, yyyy + 1)
+            end = starts[yyyy + 1 - year]
+            if end - starts[first - year] >= -i:
+                k = bisect.bisect_right(starts, end + i) - 1
+                return year + k, i + end - starts[k + 1]
+            if first == datetime.MINYEAR:
+                self._year_bits(first - 1)  # raises, out of calendar
+            first = max(2 * first - yyyy - 1, datetime.MINYEAR)
+
+    def count(self, start, end):
+        """Number of valid days from ordinal ``start`` up to, not including,
+        ``end``; if ``end`` is earlier, minus the number of valid days after
+        ``end`` up to and including ``start``, as ``numpy.busday_count``"""
+        if end < start:
+            return -self.count(end + 1, start + 1)
+        if end == start:
+            return 0
+        first = datetime.date.fromordinal(start).year
+        # end may be the day after date.max
+        last = datetime.date.fromordinal(end - 1).year
+        n = -self._year_counts(first)[
+            start - datetime.date(first, 1, 1).toordinal()
+        ]
+        if last > first:
+            year, starts = self._year_starts(first, last)
+            n += starts[last - year] - starts[first - year]
+        counts = self._year_counts(last)
+        return n + counts[end - datetime.date(last, 1, 1).toordinal()]
+
+    def between(self, start, end):
+        """Ordinals of the valid days from ``start`` up to, not including,
+        ``end``"""
+        out = []
+        while start < end:
+            yyyy = datetime.date.fromordinal(start).year
+            first = datetime.date(yyyy, 1, 1).toordinal()
+            stop = min(end, datetime.date(yyyy, 12, 31).toordinal() + 1)
+            bits = self._year_bits(yyyy)[start - first : stop - first]
+            out.extend(itertools.compress(range(start, stop), bits))
+            start = stop
+        return out
+
+    def offset(self, ordinal, num):
+        """The ``num``-th valid day after (or, if negative, before)
+        ``ordinal``"""
+        if self.holidays.empty:
+            return _weekday_offset(ordinal, num, self.weekmask)
+        yyyy = datetime.date.fromordinal(ordinal).year
+        day = ordinal - datetime.date(yyyy, 1, 1).toordinal()
+        counts = self._year_counts(yyyy)
+        # the index of the day among the valid days of its year, whole years
+        # are skipped by their (cached) numbers of valid days
+        if num > 0:
+            i = counts[day + 1] + num - 1
+            if i >= counts[-1]:
+                yyyy, i = self._skip_forward(yyyy, i)
+                counts = self._year_counts(yyyy)
+        else:
+            i = counts[day] + num
+            if i < 0:
+                yyyy, i = self._skip_backward(yyyy - 1, i)
+                counts = self._year_counts(yyyy)
+                i += counts[-1]
+        first = datetime.date(yyyy, 1, 1).toordinal()
+        return first + bisect.bisect_right(counts, i) - 1
+
+    def roll(self, ordinal, direction):
+        """``ordinal`` if valid, else the next valid day in ``direction``"""
+        return self.offset(ordinal - direction, direction)
+
+    def roll_within_month(self, ordinal, direction):
+        """Like :meth:`roll`, but stays within the month of ``ordinal``,
+        searching the other way if ``direction`` runs out of month"""
+        day = datetime.date.fromordinal(ordinal)
+        days = self._days(day.year * 12 + day.month - 1)
+        if direction > 0:
+            i = bisect.bisect_left(days, ordinal)
+            if i == len(days):
+                i -= 1
+        else:
+            i = bisect.bisect_right(days, ordinal) - 1
+            if i < 0 and days:
+                i = 0
+        if i < 0:
+            raise ValueError(
+                f"cannot find valid date in the month of {day} with holidays "
+                f"{self.holidays.holidays} and weekmask {self.weekmask}"
+            )
+        return days[i]
+
+
+_NO_HOLIDAYS = _HolidayOrdinals(())
+
+# id(holidays) -> (holidays, normalized) for frozensets, so that dtformat and
+# translations reuse the normalized form, and the business day tables built
+# on it, across calls; frozensets cannot be weakly referenced, so are kept
+# alive while cached
+_NORMALIZED: Dict[int, Tuple[frozenset, "_HolidayOrdinals"]] = {}
+_NORMALIZED_SIZE = 16
+
+
+def _normalize_holidays(holidays):
+    """``holidays`` as a :class:`_HolidayOrdinals`, which translations and
+    formatters keep so holidays are only normalized once
+
+    Only sources that cannot change are normalized once across calls:
+    ``BusinessCalendar`` and ``HolidayCalendar`` keep their normalized form
+    and frozensets are cached by identity.  Dicts, sets, ``HolidayBase``
+    and the like may be changed between calls, so are normalized afresh.
+    """
+    if isinstance(holidays, _HolidayOrdinals):
+        return holidays
+    if isinstance(holidays, (BusinessCalendar, HolidayCalendar)):
+        return holidays._normalized
+    if holidays is None:
+        return _NO_HOLIDAYS
+    if not isinstance(holidays, frozenset):
+        return _HolidayOrdinals(holidays)
+    entry = _NORMALIZED.get(id(holidays), None)
+    if entry is None or entry[0] is not holidays:
+        if len(_NORMALIZED) >= _NORMALIZED_SIZE:
+            _NORMALIZED.clear()
+        entry = (holidays, _HolidayOrdinals(holidays))
+        _NORMALIZED[id(holidays)] = entry
+    return entry[1]
@@ -1,8 +1,9 @@
 import datetime  # type: ignore
-from dateutil.relativedelta import relativedelta  # type: ignore
+import functools
 import math
 import re
 
+from .__calendar import _normalize_holidays
 from .__formats import (
     _DATE_DELTAS,
     _DATE_SWITCHOVER,
@@ -13,187 +14,412 @@ from .__formats import (
 )
 
 
+def _relativedelta(**kwargs):
+    # dateutil is slow to import, so is only imported once a translation
+    # needs it
+    from dateutil.relativedelta import relativedelta  # type: ignore
+
+    return relativedelta(**kwargs)
+
+
 def _date_to_datetime(date):
-    return datetime.datetime.combine(
-        date,
-        datetime.time(hour=0, minute=0, second=0, microsecond=0),
-        tzinfo=None,
-    )
+    return datetime.datetime(date.year, date.month, date.day)
 
 
 def _time_to_datetime(time):
-    return datetime.datetime.combine(
-        datetime.date.today(),
-        time,
-        tzinfo=None,
-    )
+    return datetime.datetime.combine(datetime.date.today(), time, None)
+
+
+# opt-in memoization of string/int parsing, see enable_parse_cache
+_PARSE_CACHE = None
+_DEFAULT_PARSE_CACHE_SIZE = 4096
+
+
+def enable_parse_cache(maxsize=_DEFAULT_PARSE_CACHE_SIZE):
+    """Memoize parsing of string and integer datetimes
+
+    Up to ``maxsize`` distinct inputs (``None`` for unbounded) are kept in a
+    LRU cache, including inputs that failed to parse, so repeated inputs skip
+    format inference entirely.  Re-enabling replaces (and empties) the cache.
+    ISO 8601 strings are cheap to parse and are never cached.
+    """
+    global _PARSE_CACHE
+    _PARSE_CACHE = functools.lru_cache(maxsize=maxsize)(_parse_uncached)
+
+
+def disable_parse_cache():
+    """Turn off (and empty) the cache set up by :func:`enable_parse_cache`"""
+    global _PARSE_CACHE
+    _PARSE_CACHE = None
+
+
+def parse_cache_info():
+    """``functools.lru_cache`` statistics of the parse cache, if enabled"""
+    if _PARSE_CACHE is None:
+        return None
+    return _PARSE_CACHE.cache_info()
+
+
+def _parse_uncached(parser, arg):
+    result = parser(arg)
+    if result is None:
+        return None, _parse_error(parser, arg)
+    return result, None
+
+
+def _parse(parser, arg):
+    if _PARSE_CACHE is None:
+        result = parser(arg)
+        if result is None:
+            raise ValueError(_parse_error(parser, arg))
+    else:
+        result, error = _PARSE_CACHE(parser, arg)
+        if error is not None:
+            raise ValueError(error)
+    # time-only inputs are kept as times, so cached results are always
+    # combined with the current date
+    if type(result) is datetime.time:
+        return _time_to_datetime(result)
+    return result
 
 
 def _int_to_datetime(i):
+    return _parse(_try_parse_int, i)
+
+
+def _string_to_datetime(s):
+    # ISO strings need no inference (nor caching), try them up front
+    if s[4:5] == "-":
+        try:
+            return datetime.datetime.fromisoformat(s)
+        except ValueError:
+            pass
+    return _parse(_try_parse_string, s)
+
+
+# The parsing core below never raises while trying out candidate
+# interpretations: every _try_* function returns None on failure, and only
+# records why in ``errors`` when handed a list.  _parse_error re-runs a
+# failed parse with such a list, so error messages are only ever built once,
+# at the boundary, after every interpretation has failed.
+_INT_REGEX = re.compile(r"\s*[+-]?\d+(?:_\d+)*\s*")
+_WHITESPACE_REGEX = re.compile(r"\s+")
+
+_EITHER_ERROR = (
+    "Error(s): could not convert to either {} or {}.\n"
+    "Conversion to {} resulted in following error:\n"
+    "\t{}\n"
+    "Conversion to {} resulted in following error:\n"
+    "\t{}"
+)
+
+_DAYS_IN_MONTH = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+
+def _fail(errors, msg, *args):
+    if errors is not None:
+        errors.append(msg.format(*args))
+    return None
+
+
+def _parse_error(parser, arg):
+    errors = []
+    parser(arg, errors)
+    return "\n".join(errors)
+
+
+def _raise_on_fail(parser, arg):
+    result = parser(arg)
+    if result is None:
+        raise ValueError(_parse_error(parser, arg))
+    return result
+
+
+def _str_to_int(s, errors=None):
+    # same grammar as int(s), without raising on bad input
+    if s.isascii() and s.isdigit():
+        return int(s)
+    if _INT_REGEX.fullmatch(s) is None:
+        return _fail(errors, "invalid literal for int() with base 10: {!r}", s)
+    return int(s)
+
+
+def _try_either(arg, first, second, names, errors=None):
+    if errors is None:
+        result = first(arg)
+        return second(arg) if result is None else result
+    first_errors, second_errors = [], []
+    result = first(arg, first_errors) or second(arg, second_errors)
+    if result is None:
+        errors.append(
+            _EITHER_ERROR.format(
+                names[0],
+                names[1],
+                names[0],
+                "\n".join(first_errors),
+                names[1],
+                "\n".join(second_errors),
+            )
+        )
+    return result
+
+
+def _try_int_datetime_date(i, errors=None):
+    date = _try_int_date(i, errors)
+    return None if date is None else _date_to_datetime(date)
+
+
+def _try_string_datetime_date(s, errors=None):
+    date = _try_string_date(s, errors)
+    return None if date is None else _date_to_datetime(date)
+
+
+def _try_parse_int(i, errors=None):
     # hack - check for 19 or 20 in first 2 digits
     str_i = str(i)
     if len(str_i) < 4:
-        raise ValueError(f"cannot convert {i} to time, too short")
+        return _fail(errors, "cannot convert {} to time, too short", i)
     if len(str_i) == 6 or len(str_i) == 8:
         if str_i[0:2] == "19" or str_i[0:2] == "20":
-            try:
-                return _date_to_datetime(_int_to_date(i))
-            except ValueError as ve_date:
-                try:
-                    return _time_to_datetime(_int_to_time(i))
-                except ValueError as ve_time:
-                    raise ValueError(
-                        "Error(s): could not convert to either date or time.\n"
-                        "Conversion to date resulted in following error:\n"
-                        f"\t{str(ve_date)}\n"
-                        "Conversion to time resulted in following error:\n"
-                        f"\t{str(ve_time)}"
-                    )
-    try:
-        return _time_to_datetime(_int_to_time(i))
-    except ValueError as ve_time:
-        try:
-            return _date_to_datetime(_int_to_date(i))
-        except ValueError as ve_date:
-            raise ValueError(
-                "Error(s): could not convert to either time or date.\n"
-                "Conversion to time resulted in following error:\n"
-                f"\t{str(ve_time)}\n"
-                "Conversion to date resulted in following error:\n"
-                f"\t{str(ve_date)}"
+            return _try_either(
+                i,
+                _try_int_datetime_date,
+                _try_int_time,
+                ("date", "time"),
+                errors,
             )
+    return _try_either(
+        i, _try_int_time, _try_int_datetime_date, ("time", "date"), errors
+    )
 
 
-def _string_to_datetime(s):
-    try:
-        return datetime.datetime.fromisoformat(s)
-    except ValueError:
-        pass
-    try:
-        return _int_to_datetime(int(s))
-    except ValueError:
-        pass
-
-    subs = re.sub(r"\s+", r" ", s)
-    dts = subs.split(" ")
-    if len(dts) > 2 or len(dts) <= 0:
-        raise ValueError(
-            "Invalid datetime string provided - date/time should be separated "
-            "by single space, e.g. 2005/02/03 08:01:03"
-        )
-    elif len(dts) == 2:
-        return datetime.datetime.combine(
-            _string_to_date(dts[0]), _string_to_time(dts[1])
-        )
+# the common layouts, matched in one go before falling back to inference;
+# anything these match is parsed exactly as the general path would
+_FAST_DATE = r"([0-9]+)([-/])([0-9]+)\2([0-9]+)"
+_FAST_TIME = r"([0-9]{1,2}):([0-9]{1,2})(?::([0-9]{1,2}))?(?:\.([0-9]{1,6}))?"
+_FAST_DATE_REGEX = re.compile(_FAST_DATE)
+_FAST_TIME_REGEX = re.compile(_FAST_TIME)
+_FAST_DATETIME_REGEX = re.compile(_FAST_DATE + r"\s+" + _FAST_TIME)
+
+# returned by the fast paths for inputs in a known layout that are invalid,
+# which the general path would reject too
+_INVALID = object()
+
+
+def _fast_date(first, sep, second, third):
+    if len(first) == 4:
+        yyyy, mm, dd = int(first), int(second), int(third)
+    elif len(third) == 4 or len(third) == 2:
+        yyyy, mm, dd = int(third), int(first), int(second)
+        if len(third) == 2:
+            yyyy += 2000 if yyyy <= _DATE_SWITCHOVER else 1900
+        if mm > 12:
+            mm, dd = dd, mm
     else:
-        if len(dts[0]) < 4:
-            raise ValueError(f"Invalid datetime provided {dts[0]}-- too short")
+        return None
+    if not _valid_calendar_date(yyyy, mm, dd):
+        return _INVALID
+    return datetime.date(yyyy, mm, dd)
 
-        if dts[0][0:2] == "19" or dts[0][0:2] == 20:
-            try:
-                return _date_to_datetime(_string_to_date(s))
-            except ValueError as ve_date:
-                try:
-                    return _time_to_datetime(_string_to_time(s))
-                except ValueError as ve_time:
-                    raise ValueError(
-                        "Error(s): could not convert to either date or time.\n"
-                        "Conversion to date resulted in following error:\n"
-                        f"\t{str(ve_date)}\n"
-                        "Conversion to time resulted in following error:\n"
-                        f"\t{str(ve_time)}"
-                    )
+
+def _fast_time(hh, mm, ss, us):
+    hh, mm = int(hh), int(mm)
+    ss = 0 if ss is None else int(ss)
+    us = 0 if us is None else int(us.ljust(6, "0"))
+    if not _valid_time(hh, mm, ss, us):
+        return _INVALID
+    return datetime.time(hh, mm, ss, us)
+
+
+def _try_fast_string(s):
+    digits = s.isdigit()
+    # a complete ISO 8601 date takes at least 7 digits (YYYYDDD)
+    if s[4:5] == "-" or (digits and len(s) >= 7):
         try:
-            return _time_to_datetime(_string_to_time(s))
-        except ValueError as ve_time:
+            return datetime.datetime.fromisoformat(s)
+        except ValueError:
+            pass
+    if ":" not in s:
+        if digits and s.isascii():
+            result = _try_parse_int(int(s))
+            if result is not None or s[0] == "0":
+                return result
+            # the general path only adds an attempt as an ISO date
             try:
-                return _date_to_datetime(_string_to_date(s))
-            except ValueError as ve_date:
-                raise ValueError(
-                    "Error(s): could not convert to either time or date.\n"
-                    "Conversion to time resulted in following error:\n"
-                    f"\t{str(ve_time)}\n"
-                    "Conversion to date resulted in following error:\n"
-                    f"\t{str(ve_date)}"
-                )
-
-
-def _try_yyyy_mm_dd(fields):
-    if len(fields[0]) != 4:
+                return _date_to_datetime(datetime.date.fromisoformat(s))
+            except ValueError:
+                return _INVALID
+        m = _FAST_DATE_REGEX.fullmatch(s)
+        if m is None:
+            return None
+        date = _fast_date(*m.groups())
+        if date is None or date is _INVALID:
+            return date
+        return _date_to_datetime(date)
+    if len(s) < 4:
         return None
-    yyyy = int(fields[0])
-    mm = int(fields[1])
-    dd = int(fields[2])
-    return datetime.date(year=yyyy, month=mm, day=dd)
+    m = _FAST_TIME_REGEX.fullmatch(s)
+    if m is not None:
+        return _fast_time(*m.groups())
+    m = _FAST_DATETIME_REGEX.fullmatch(s)
+    if m is None:
+        return None
+    date = _fast_date(*m.group(1, 2, 3, 4))
+    if date is None or date is _INVALID:
+        return date
+    time = _fast_time(*m.group(5, 6, 7, 8))
+    if time is _INVALID:
+        return time
+    return datetime.datetime.combine(date, time)
+
+
+def _try_parse_string(s, errors=None):
+    if errors is None:
+        result = _try_fast_string(s)
+        if result is _INVALID:
+            return None
+        if result is not None:
+            return result
+    # every ISO 8601 layout starts with a 4 digit year, skip the attempt
+    # (and its exception) for anything else
+    if s[0:4].isdigit():
+        try:
+            return datetime.datetime.fromisoformat(s)
+        except ValueError:
+            pass
+    i = _str_to_int(s)
+    if i is not None:
+        result = _try_parse_int(i)
+        if result is not None:
+            return result
 
+    subs = _WHITESPACE_REGEX.sub(" ", s)
+    dts = subs.split(" ")
+    if len(dts) > 2:
+        return _fail(
+            errors,
+            "Invalid datetime string provided - date/time should be "
+            "separated by single space, e.g. 2005/02/03 08:01:03",
+        )
+    elif len(dts) == 2:
+        date = _try_string_date(dts[0], errors)
+        if date is None:
+            return None
+        time = _try_string_time(dts[1], errors)
+        if time is None:
+            return None
+        return datetime.datetime.combine(date, time)
+    if len(dts[0]) < 4:
+        return _fail(
+            errors, "Invalid datetime provided {}-- too short", dts[0]
+        )
+    if dts[0][0:2] == "19" or dts[0][0:2] == "20":
+        return _try_either(
+            s,
+            _try_string_datetime_date,
+            _try_string_time,
+            ("date", "time"),
+            errors,
+        )
+    return _try_either(
+        s,
+        _try_string_time,
+        _try_string_datetime_date,
+        ("time", "date"),
+        errors,
+    )
 
-def _try_end_yyyy(fields):
-    if len(fields[2]) != 4:
-        return None
-    yyyy = int(fields[2])
-    mm = int(fields[0])
-    dd = int(fields[1])
-    if mm > 12:
-        # must be dd-mm, so swap mm and dd
-        return datetime.date(year=yyyy, month=dd, day=mm)
-    return datetime.date(year=yyyy, month=mm, day=dd)
 
+def _try_yyyy_mm_dd(fields, errors=None):
+    return _try_ymd(fields[0], fields[1], fields[2], errors)
 
-def _try_end_yy(fields):
-    if len(fields[2]) != 2:
+
+def _try_end_yyyy(fields, errors=None):
+    return _try_ymd(fields[2], fields[0], fields[1], errors, swap=True)
+
+
+def _try_end_yy(fields, errors=None):
+    yy = _str_to_int(fields[2], errors)
+    if yy is None:
         return None
-    yy = int(fields[2])
-    mm = int(fields[0])
-    dd = int(fields[1])
     yyyy = yy + 2000
     if yy > _DATE_SWITCHOVER:
         yyyy = yy + 1900
-    if mm > 12:
+    return _try_ymd(yyyy, fields[0], fields[1], errors, swap=True)
+
+
+def _try_ymd(yyyy, mm, dd, errors=None, swap=False):
+    if isinstance(yyyy, str):
+        yyyy = _str_to_int(yyyy, errors)
+        if yyyy is None:
+            return None
+    mm = _str_to_int(mm, errors)
+    if mm is None:
+        return None
+    dd = _str_to_int(dd, errors)
+    if dd is None:
+        return None
+    if swap and mm > 12:
         # must be dd-mm, so swap mm and dd
-        return datetime.date(year=yyyy, month=dd, day=mm)
+        mm, dd = dd, mm
+    if not _valid_calendar_date(yyyy, mm, dd, errors):
+        return None
     return datetime.date(year=yyyy, month=mm, day=dd)
 
 
-def _convert_non_isostring_date(s):
+def _convert_non_isostring_date(s, errors=None):
     for sc in _DATE_SPLIT_CHARS:
         fields = s.split(sc)
         if len(fields) == 3:
             break
         if len(fields) == 2 or len(fields) > 3:
-            raise ValueError(
-                "invalid date format used ({s}), must be one of:\n"
-                f"{', '.join(_SUPPORTED_DATE_FORMATS)}"
+            return _fail(
+                errors,
+                "invalid date format used ({}), must be one of:\n{}",
+                s,
+                ", ".join(_SUPPORTED_DATE_FORMATS),
             )
     if len(fields) != 3:
-        raise ValueError(
-            f"invalid date format used, could not find split char in ({s}), "
-            f"format must be one of:\n{', '.join(_SUPPORTED_DATE_FORMATS)}"
+        return _fail(
+            errors,
+            "invalid date format used, could not find split char in ({}), "
+            "format must be one of:\n{}",
+            s,
+            ", ".join(_SUPPORTED_DATE_FORMATS),
         )
-    date = _try_yyyy_mm_dd(fields)
-    if date is None:
-        date = _try_end_yyyy(fields)
-    if date is None:
-        date = _try_end_yy(fields)
-    return date
-
-
-def _string_to_time(s):
-    try:
-        return _int_to_time(int(s))
-    except Exception:
-        pass
+    if len(fields[0]) == 4:
+        return _try_yyyy_mm_dd(fields, errors)
+    if len(fields[2]) == 4:
+        return _try_end_yyyy(fields, errors)
+    if len(fields[2]) == 2:
+        return _try_end_yy(fields, errors)
+    return _fail(errors, "could not convert {} to date", s)
+
+
+def _try_string_time(s, errors=None):
+    i = _str_to_int(s)
+    if i is not None:
+        time = _try_int_time(i)
+        if time is not None:
+            return time
     times = s.split(".")
     if len(times) > 2:
-        raise ValueError(
-            f"Error: invalid microseconds provided (too many '.') in {s}"
+        return _fail(
+            errors,
+            "Error: invalid microseconds provided (too many '.') in {}",
+            s,
         )
     if len(times) > 1:
-        if len(str(times[1])) > 6:
-            raise ValueError(
-                f"Error: invalid microseconds {times[1]} "
-                "provided (too long)"
+        if len(times[1]) > 6:
+            return _fail(
+                errors,
+                "Error: invalid microseconds {} provided (too long)",
+                times[1],
             )
-        us = int(math.pow(10, (6 - len(times[1]))) * int(times[1]))
+        us = _str_to_int(times[1], errors)
+        if us is None:
+            return None
+        us = int(math.pow(10, (6 - len(times[1]))) * us)
     else:
         us = 0
 
@@ -203,39 +429,70 @@ def _string_to_time(s):
         if fields_len > 1:
             break
     if fields_len < 2 or fields_len >= 4:  # more than h,m,s
-        raise ValueError(
-            "invalid time format used ({s}), must be one of:\n"
-            f"{', '.join(_SUPPORTED_TIME_FORMATS)}"
+        return _fail(
+            errors,
+            "invalid time format used ({}), must be one of:\n{}",
+            s,
+            ", ".join(_SUPPORTED_TIME_FORMATS),
         )
-    hh = int(fields[0])
-    mm = int(fields[1])
+    hh = _str_to_int(fields[0], errors)
+    if hh is None:
+        return None
+    mm = _str_to_int(fields[1], errors)
+    if mm is None:
+        return None
+    ss = 0
     if fields_len > 2:
-        ss = int(fields[2])
-    else:
-        ss = 0
-    _check_time(hh, mm, ss, us)
+        ss = _str_to_int(fields[2], errors)
+        if ss is None:
+            return None
+    if not _valid_time(hh, mm, ss, us, errors):
+        return None
     return datetime.time(hh, mm, ss, us)
 
 
-def _check_time(hh, mm, ss, zz=0):
+def _string_to_time(s):
+    return _raise_on_fail(_try_string_time, s)
+
+
+def _valid_time(hh, mm, ss, zz=0, errors=None):
     if hh > 23 or hh < 0:
-        raise ValueError(f"invalid hour {hh} detected using HHMMSS format")
+        return _fail(
+            errors, "invalid hour {} detected using HHMMSS format", hh
+        )
     if mm > 59 or mm < 0:
-        raise ValueError(f"invalid minute {mm} detected using HHMMSS format")
+        return _fail(
+            errors, "invalid minute {} detected using HHMMSS format", mm
+        )
     if ss > 59 or ss < 0:
-        raise ValueError(f"invalid second {ss} detected HHMMSS format")
-
+        return _fail(errors, "invalid second {} detected HHMMSS format", ss)
     if zz > 999999 or zz < 0:
-        raise ValueError(
-            f"invalid microsecond {zz} detected using HHMMSS.ZZZZZZ format"
+        return _fail(
+            errors,
+            "invalid microsecond {} detected using HHMMSS.ZZZZZZ format",
+            zz,
         )
+    return True
 
 
-def _check_month(yyyy, mm):
+def _check_time(hh, mm, ss, zz=0):
+    errors = []
+    if not _valid_time(hh, mm, ss, zz, errors):
+        raise ValueError(errors[0])
+
+
+def _valid_month(yyyy, mm, errors=None):
     if yyyy > 3000 or yyyy < 1000:
-        raise ValueError(f"invalid year {yyyy} detected")
+        return _fail(errors, "invalid year {} detected", yyyy)
     if mm > 12 or mm < 1:
-        raise ValueError(f"invalid month {mm} detected")
+        return _fail(errors, "invalid month {} detected", mm)
+    return True
+
+
+def _check_month(yyyy, mm):
+    errors = []
+    if not _valid_month(yyyy, mm, errors):
+        raise ValueError(errors[0])
 
 
 def _is_leap(yyyy):
@@ -244,93 +501,126 @@ def _is_leap(yyyy):
     )
 
 
-def _check_date(yyyy, mm, dd):
-    _check_month(yyyy, mm)
+def _days_in_month(yyyy, mm):
+    if mm == 2 and _is_leap(yyyy):
+        return 29
+    return _DAYS_IN_MONTH[mm]
+
+
+def _valid_calendar_date(yyyy, mm, dd, errors=None):
+    # the checks datetime.date itself makes
+    if yyyy < datetime.MINYEAR or yyyy > datetime.MAXYEAR:
+        return _fail(errors, "year {} is out of range", yyyy)
+    if mm < 1 or mm > 12:
+        return _fail(errors, "month must be in 1..12")
+    if dd < 1 or dd > _days_in_month(yyyy, mm):
+        return _fail(errors, "day is out of range for month")
+    return True
+
+
+def _valid_date(yyyy, mm, dd, errors=None):
+    if not _valid_month(yyyy, mm, errors):
+        return None
     if dd < 1:
-        raise ValueError(f"invalid day {dd} detected < 1")
-
-    if mm == 2:
-        if _is_leap(yyyy):
-            if dd > 29:
-                raise ValueError(
-                    f"Invalid day {dd} detected, leap year {yyyy} but "
-                    f"in february {mm} and day > 29"
-                )
-        elif dd > 28:
-            raise ValueError(
-                f"Invalid day {dd} detected, non-leap year {yyyy} but "
-                f"in february {mm} and day > 28"
-            )
-    elif mm in [4, 6, 9, 11]:
-        if dd > 30:
-            raise ValueError(
-                f"Invalid day {dd} detected, in Apr, Jun, Sep, Nov {mm} "
-                f"but day > 30"
-            )
-    elif dd > 31:
-        raise ValueError(f"Invalid day {dd} detected, day > 31")
+        return _fail(errors, "invalid day {} detected < 1", dd)
+    if dd > _days_in_month(yyyy, mm):
+        return _fail(
+            errors,
+            "Invalid day {} detected, month {} of year {} has {} days",
+            dd,
+            mm,
+            yyyy,
+            _days_in_month(yyyy, mm),
+        )
+    return True
 
 
-def _string_to_date(s):
+def _check_date(yyyy, mm, dd):
+    errors = []
+    if not _valid_date(yyyy, mm, dd, errors):
+        raise ValueError(errors[0])
+
+
+def _try_string_date(s, errors=None):
     # no other 8 char meaning that can be converted as integer
     if len(s) <= 8:
+        i = _str_to_int(s)
+        if i is not None:
+            date = _try_int_date(i)
+            if date is not None:
+                return date
+    if s[0:4].isdigit():
         try:
-            return _int_to_date(int(s))
+            return datetime.date.fromisoformat(s)
         except ValueError:
             pass
-    try:
-        return datetime.date.fromisoformat(s)
-    except ValueError:
-        if any([sc in s for sc in _TIME_SPLIT_CHARS]):
-            # support date times, not just dates
-            pass
-        # this can be one of many types of date, but cannot be a datetime
-        # e.g. ISO (YYYY-MM-DD), non-ISO: (YYYY/MM/DD, MM/DD/YYYY)
-        # The above are the three formats we support
-        date = _convert_non_isostring_date(s)
-        if date is None:
-            raise ValueError(f"could not convert {s} to date")
-        return date
+    # this can be one of many types of date, but cannot be a datetime
+    # e.g. ISO (YYYY-MM-DD), non-ISO: (YYYY/MM/DD, MM/DD/YYYY)
+    # The above are the three formats we support
+    return _convert_non_isostring_date(s, errors)
 
 
-def _int_to_month(i):
+def _string_to_date(s):
+    return _raise_on_fail(_try_string_date, s)
+
+
+def _try_int_month(i, errors=None):
     _min_allowed = 100001
     if i < _min_allowed:
-        raise ValueError(
-            f"integer month {i} smaller than min allowed {_min_allowed})"
+        return _fail(
+            errors,
+            "integer month {} smaller than min allowed {})",
+            i,
+            _min_allowed,
         )
     yyyy = i // 100
     mm = i - yyyy * 100
-    _check_month(yyyy, mm)
+    if not _valid_month(yyyy, mm, errors):
+        return None
     return datetime.date(yyyy, mm, 1)
 
 
-def _int_to_date(i):
-    if len(str(i)) == 6 and i % 100 <= 12:
-        return _int_to_month(i)
+def _int_to_month(i):
+    return _raise_on_fail(_try_int_month, i)
+
+
+def _try_int_date(i, errors=None):
+    if 100000 <= i <= 999999 and i % 100 <= 12:
+        return _try_int_month(i, errors)
     _min_allowed = 10000000
     if i < _min_allowed:
-        raise ValueError(
-            f"integer date {i} smaller than min allowed ({_min_allowed})"
+        return _fail(
+            errors,
+            "integer date {} smaller than min allowed ({})",
+            i,
+            _min_allowed,
         )
     # convert YYYY to <YYYY>MMDD multiply by 1000,
     # then add biggest MMDD possible
     _max_allowed = datetime.MAXYEAR * 10000 + 1231
     if i > _max_allowed:
-        raise ValueError(
-            f"integer date {i} greater than max allowed (){_max_allowed})"
+        return _fail(
+            errors,
+            "integer date {} greater than max allowed ({})",
+            i,
+            _max_allowed,
         )
     yyyy = i // 10000
     mm = (i - yyyy * 10000) // 100
     dd = i - yyyy * 10000 - mm * 100
-    _check_date(yyyy, mm, dd)
+    if not _valid_date(yyyy, mm, dd, errors):
+        return None
     return datetime.date(year=yyyy, month=mm, day=dd)
 
 
-def _int_to_time(i):
+def _int_to_date(i):
+    return _raise_on_fail(_try_int_date, i)
+
+
+def _try_int_time(i, errors=None):
     _max_allowed = 235959
     if i < 0 or i > _max_allowed:
-        raise ValueError(f"integer time {i} violates min/max of 24H time")
+        return _fail(errors, "integer time {} violates min/max of 24H time", i)
     if i >= 10000:
         hh = i // 10000
         mm = (i - hh * 10000) // 100
@@ -343,79 +633,273 @@ def _int_to_time(i):
         hh = i
         mm = 0
         ss = 0
-    _check_time(hh, mm, ss)
+    if not _valid_time(hh, mm, ss, 0, errors):
+        return None
     return datetime.time(hh, mm, ss)
 
 
-def _inc_dt(dt, deltakw, dir, holidays, weekends):
-    new = dt
-    origdeltakw = deltakw
-    origdir = dir
-    iters = 0
-    should_iterate = True
-    while should_iterate:
-        if iters > 35:
-            raise ValueError(
-                "cannot find valid date for iteration with parameters: "
-                "(date, deltakw, direction, holidays, weekends?) == "
-                f"({dt}, {deltakw}, {dir}, {holidays}, {weekends})"
+def _int_to_time(i):
+    return _raise_on_fail(_try_int_time, i)
+
+
+# explicit input formats, see _parse_with_format.  Each style gets a
+# dedicated parser, so hinted inputs skip inference altogether
+def _date_parser(pattern, order, two_digit_year=False):
+    match = re.compile(pattern).fullmatch
+    y, m = order.index("y"), order.index("m")
+    d = order.index("d") if "d" in order else None
+
+    def parse(s):
+        found = match(s if isinstance(s, str) else str(s))
+        if found is None:
+            return None
+        fields = found.groups()
+        yyyy = int(fields[y])
+        if two_digit_year:
+            yyyy += 2000 if yyyy <= _DATE_SWITCHOVER else 1900
+        try:
+            return datetime.datetime(
+                yyyy, int(fields[m]), 1 if d is None else int(fields[d])
+            )
+        except ValueError:
+            return None
+
+    return parse
+
+
+def _time_parser(pattern):
+    match = re.compile(pattern).fullmatch
+
+    def parse(s):
+        m = match(s if isinstance(s, str) else str(s))
+        if m is None:
+            return None
+        hh, mm, ss, us = (m.groups() + (None, None))[:4]
+        time = _fast_time(hh, mm, ss, us)
+        return None if time is _INVALID else time
+
+    return parse
+
+
+def _int_parser(digits, fields):
+    # integers (or strings of exactly ``digits`` digits) made of two digit
+    # fields below a 4 digit year, e.g. YYYYMMDD: digits=8, fields="md"
+    low, high = 10 ** (digits - 1), 10**digits - 1
+
+    def parse(arg):
+        if isinstance(arg, str):
+            if len(arg) != digits or not (arg.isascii() and arg.isdigit()):
+                return None
+            arg = int(arg)
+        elif not low <= arg <= high:
+            return None
+        # same rules as _check_date/_check_month
+        if fields == "md":
+            arg, dd = divmod(arg, 100)
+            yyyy, mm = divmod(arg, 100)
+            if not _valid_date(yyyy, mm, dd):
+                return None
+            return datetime.datetime(yyyy, mm, dd)
+        yyyy, mm = divmod(arg, 100)
+        if not _valid_month(yyyy, mm):
+            return None
+        return datetime.datetime(yyyy, mm, 1)
+
+    return parse
+
+
+def _int_time_parser(arg):
+    # HHMMSS, where leading zeros may be dropped, e.g. 83015
+    if isinstance(arg, str):
+        if len(arg) > 6 or not (arg.isascii() and arg.isdigit()):
+            return None
+        arg = int(arg)
+    elif not 0 <= arg <= 235959:
+        return None
+    hh, rest = divmod(arg, 10000)
+    mm, ss = divmod(rest, 100)
+    if not _valid_time(hh, mm, ss):
+        return None
+    return datetime.time(hh, mm, ss)
+
+
+def _strptime_parser(pattern):
+    def parse(s):
+        return datetime.datetime.strptime(str(s), pattern)
+
+    return parse
+
+
+def _input_format_parsers():
+    d2, d4, d12 = "([0-9]{2})", "([0-9]{4})", "([0-9]{1,2})"
+    parsers = {}
+    for sc in _DATE_SPLIT_CHARS:
+        e = re.escape(sc)
+        for style, fields, order in [
+            ("YYYY{sc}MM{sc}DD", (d4, d12, d12), "ymd"),
+            ("MM{sc}DD{sc}YYYY", (d12, d12, d4), "mdy"),
+            ("DD{sc}MM{sc}YYYY", (d12, d12, d4), "dmy"),
+            ("MM{sc}DD{sc}YY", (d12, d12, d2), "mdy"),
+        ]:
+            parsers[style.format(sc=sc)] = _date_parser(
+                e.join(fields), order, two_digit_year=style.endswith("}YY")
             )
-        iters += 1
-        new = new + relativedelta(**{deltakw: dir})
-        # after first iteration, we revert to days
-        # e.g. jump a week, but then iterate by days to find a non-holiday
-        deltakw = "days"
-
-        # if we're iterating by months, then we need to make sure we iterate
-        # backwards to find a non-holiday/non-weekend
-        if origdeltakw == "months":
-            if (
-                abs(origdir * (new.month - dt.month) % 12) > 1
-                or new.month - dt.month == 0
-            ):
-                dir = dir * -1
-                continue
-        # if we're iterating by years we should end up in the same month
-        elif origdeltakw == "years" and new.month - dt.month != 0:
-            dir = dir * -1
-            continue
-        if new.strftime("%Y-%m-%d") in holidays:
-            continue
-        if not weekends and new.isoweekday() in [6, 7]:
-            continue
-        should_iterate = False
+    for sc in _TIME_SPLIT_CHARS:
+        e = re.escape(sc)
+        parsers[f"HH{sc}MM{sc}SS[.ZZZ]"] = _time_parser(
+            d12 + e + d2 + e + d2 + r"(?:\.([0-9]{1,6}))?"
+        )
+        parsers[f"HH{sc}MM"] = _time_parser(d12 + e + d2)
+    # integer styles, which also accept their digit strings
+    parsers["YYYYMMDD"] = _int_parser(8, "md")
+    parsers["YYYYMM"] = _int_parser(6, "m")
+    parsers["HHMMSS"] = _int_time_parser
+    return parsers
+
+
+_INPUT_FORMAT_PARSERS = _input_format_parsers()
+
+
+@functools.lru_cache(maxsize=None)
+def _input_format_parser(input_format):
+    parser = _INPUT_FORMAT_PARSERS.get(input_format, None)
+    if parser is not None:
+        return parser
+    if "%" in input_format:
+        return _strptime_parser(input_format)
+    raise ValueError(
+        f"unsupported input_format {input_format}, must be a strptime "
+        "pattern or one of:\n" + ", ".join(_INPUT_FORMAT_PARSERS)
+    )
+
+
+def _parse_with_format(arg, input_format):
+    """Parse a string or integer ``arg`` laid out as ``input_format``"""
+    result = _input_format_parser(input_format)(arg)
+    if result is None:
+        raise ValueError(
+            f"could not convert {arg} using input_format {input_format}"
+        )
+    if type(result) is datetime.time:
+        return _time_to_datetime(result)
+    return result
+
+
+def _plain_translate(dt, deltakw, num):
+    """``dt`` moved ``num`` ``deltakw`` one at a time, in one step
+
+    Stepping month by month clamps the day to the shortest month passed
+    through, stepping year by year turns Feb 29 into Feb 28 for good.
+    """
+    if deltakw == "days":
+        return dt + datetime.timedelta(days=num)
+    if deltakw == "weeks":
+        return dt + datetime.timedelta(weeks=num)
+    new = dt + _relativedelta(**{deltakw: num})
+    if deltakw == "years":
+        if dt.month == 2 and dt.day == 29:
+            new = new.replace(day=28)
+    elif dt.day > 28:
+        # 24 months always pass through a non-leap February
+        direction = 1 if num > 0 else -1
+        month = dt.year * 12 + dt.month - 1
+        shortest = dt.day
+        for i in range(1, min(abs(num), 24) + 1):
+            yyyy, mm = divmod(month + i * direction, 12)
+            days = _DAYS_IN_MONTH[mm + 1]
+            if mm == 1 and _is_leap(yyyy):
+                days += 1
+            shortest = min(shortest, days)
+        new = new.replace(day=shortest)
     return new
 
 
+def _inc_dt(dt, deltakw, num, calendar):
+    """Move ``dt`` by ``num`` ``deltakw`` onto a day ``calendar`` allows
+
+    days only count valid days, weeks roll forward (in the direction of
+    travel) onto a valid day and months/years stay in the month they land in.
+    Holidays/weekends are only taken into account for the final jump into
+    the destination week/month/year.
+    """
+    direction = 1 if num > 0 else -1
+    ordinal = dt.toordinal()
+    if deltakw == "days":
+        new = calendar.offset(ordinal, num)
+    else:
+        target = _plain_translate(dt, deltakw, num).toordinal()
+        if deltakw == "weeks":
+            new = calendar.roll(target, direction)
+        else:
+            new = calendar.roll_within_month(target, direction)
+    return dt + datetime.timedelta(days=new - ordinal)
+
+
 class _DateTime:
-    def __init__(self, arg=None):
-        self.dt = None
-        if arg is None:
-            self.dt = datetime.datetime.now()
+    """An input resolved to a ``datetime.datetime``, which is immutable"""
+
+    __slots__ = ("dt",)
+
+    dt: datetime.datetime
+
+    def __init__(self, arg=None, input_format=None):
+        # datetimes are by far the most common input, so are checked first
+        if type(arg) is datetime.datetime:
+            dt = arg
+        elif arg is None:
+            dt = datetime.datetime.now()
+        elif input_format is not None and isinstance(arg, (str, int)):
+            dt = _parse_with_format(arg, input_format)
         elif isinstance(arg, str):
-            self.dt = _string_to_datetime(arg)
+            dt = _string_to_datetime(arg)
         elif isinstance(arg, int):
-            self.dt = _int_to_datetime(arg)
+            dt = _int_to_datetime(arg)
         elif isinstance(arg, datetime.datetime):
-            self.dt = arg
+            dt = arg
         elif isinstance(arg, datetime.date):
-            self.dt = _date_to_datetime(arg)
+            dt = _date_to_datetime(arg)
         elif isinstance(arg, datetime.time):
-            self.dt = _time_to_datetime(arg)
+            dt = _time_to_datetime(arg)
+        elif isinstance(arg, _DateTime):
+            dt = arg.dt
         # aggressive, but useful especially for Pandas interop without
         # having to import Pandas
         elif callable(getattr(arg, "to_datetime", None)):
-            self.dt = arg.to_datetime()
+            dt = arg.to_datetime()
         else:
             raise ValueError(
                 f"invalid datetime {arg} provided, could not process"
             )
+        object.__setattr__(self, "dt", dt)
+
+    @classmethod
+    def _from_datetime(cls, dt):
+        """Wrap a ``datetime.datetime`` without any input dispatch"""
+        self = object.__new__(cls)
+        object.__setattr__(self, "dt", dt)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # immutable, so pickle and copy rebuild through _from_datetime
+        return type(self)._from_datetime, (self.dt,)
+
+    def __eq__(self, other):
+        if not isinstance(other, _DateTime):
+            return NotImplemented
+        return self.dt == other.dt
+
+    def __hash__(self):
+        return hash(self.dt)
 
     def translate(self, inc, num, holidays=None):
         if num == 0:
             return self.dt
-        if holidays is None:
-            holidays = {}
         weekends = True
         if inc == "business_days":
             inc = "days"
@@ -430,18 +914,33 @@ class _DateTime:
             inc = "years"
             weekends = False
         dt = self.dt
-        if inc in _DATE_DELTAS:
-            for i in range(0, abs(num) - 1):
-                # for large period jumps, we don't take holidays/weekends
-                # into account until the final jump into the destination
-                # month/year
-                if inc in ["weeks", "months", "years"]:
-                    dt = _inc_dt(dt, inc, math.copysign(1, num), {}, True)
-                else:
-                    dt = _inc_dt(
-                        dt, inc, math.copysign(1, num), holidays, weekends
-                    )
-            dt = _inc_dt(dt, inc, math.copysign(1, num), holidays, weekends)
-        else:
-            dt = dt + relativedelta(**{inc: num})
-        return dt
+        if inc not in _DATE_DELTAS:
+            return dt + _relativedelta(**{inc: num})
+        holidays = _normalize_holidays(holidays)
+        if holidays.empty and weekends:
+            return _plain_translate(dt, inc, num)
+        return _inc_dt(dt, inc, num, holidays.calendar(weekends))
+
+
+class _TranslationCache(_DateTime):
+    """A :class:`_DateTime` that computes each translation only once
+
+    Used while rendering many templates against one datetime, so fields
+    sharing a translation (and holidays) reuse its result.
+    """
+
+    __slots__ = ("_translated",)
+
+    @classmethod
+    def _from_datetime(cls, dt):
+        self = super()._from_datetime(dt)
+        object.__setattr__(self, "_translated", {})
+        return self
+
+    def translate(self, inc, num, holidays=None):
+        key = (inc, num, holidays)
+        translated = self._translated.get(key, None)
+        if translated is None:
+            translated = super().translate(inc, num, holidays)
+            self._translated[key] = translated
+        return translated
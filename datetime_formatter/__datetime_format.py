@@ -1,34 +1,74 @@
-import attr  # type: ignore
 import datetime  # type: ignore
-import dateutil.tz  # type: ignore
-from holidays.holiday_base import HolidayBase
-import re
-from string import Formatter
 
 from typing import (
+    TYPE_CHECKING,
+    Any,
     Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
     Optional,
     Protocol,
     Union,
 )
 
-from .__datetime import _DateTime
-
-from .__formats import (
-    _PARSE_DT_REGEX,
-    _PARSE_DT_SUB_REGEX,
-    _PARSE_DT_TRANSLATION,
-    _SUPPORTED_TRANSLATION_SIZES,
-    _SUPPORTED_TRANSLATION_DIRECTIONS,
-    _SUPPORTED_DATETIME_OUTPUT_FORMATS,
-    _dtformat,
-    _dttranslate,
+from .__calendar import (
+    _NO_HOLIDAYS,
+    BusinessCalendar,
+    HolidayCalendar,
+    _normalize_holidays,
 )
+from .__datetime import (
+    _DateTime,
+    _TranslationCache,
+    _parse_with_format,
+    disable_parse_cache,
+    enable_parse_cache,
+    parse_cache_info,
+)
+from .__exceptions import (
+    DateTimeFormatTimeZoneError,
+    DateTimeFormatTranslationError,
+    DateTimeFormatFieldError,
+)
+from .__strftime import _ANY, _DAY, _HOUR, _MINUTE, _SECOND
+from .__stream import DateTimeStreamParser
+from .__template import _compile_template, _parse_translation
+from .__tz import _resolve_tz, set_tz_backend
+from .__vectorized import (
+    _INT_ARRAY_FORMATS,
+    _as_datetime_array,
+    _busday_count_days,
+    _decode_int_array,
+    _import_numpy,
+    _render_datetime64,
+    _to_datetime64_us,
+    _translate_datetime64,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    # holidays is slow to import, and is only needed for annotations
+    from holidays.holiday_base import HolidayBase
 
 __all__ = [
     "dtfmt",
     "dtformat",
-    "DateTimeFormatter",
+    "dtformat_many",
+    "dtformat_templates",
+    "dtformat_array",
+    "dttranslate_array",
+    "dtparse_int_array",
+    "business_days_between",
+    "business_day_range",
+    "DateTimeStreamParser",
+    "DateTimeStreamFormatter",
+    "BusinessCalendar",
+    "HolidayCalendar",
+    "enable_parse_cache",
+    "disable_parse_cache",
+    "parse_cache_info",
+    "set_tz_backend",
     "DateTimeFormatTimeZoneError",
     "DateTimeFormatTranslationError",
     "DateTimeFormatFieldError",
@@ -40,126 +80,454 @@ class SupportsToDateTime(Protocol):
         ...  # pragma: no cover
 
 
+DateTimeInput = Union[
+    str,
+    int,
+    datetime.datetime,
+    datetime.date,
+    datetime.time,
+    SupportsToDateTime,
+]
+
+# dicts keyed by "YYYY-MM-DD" strings, holidays.HolidayBase, HolidayCalendar,
+# BusinessCalendar or iterables of dates or such strings
+HolidaysInput = Union[
+    Dict[str, str],
+    "HolidayBase",
+    HolidayCalendar,
+    BusinessCalendar,
+    Iterable[Union[str, datetime.date]],
+]
+
+
 def dtformat(
-    dt: Union[
-        str,
-        int,
-        datetime.datetime,
-        datetime.date,
-        datetime.time,
-        SupportsToDateTime,
-    ],
+    dt: DateTimeInput,
     fmtstr: str,
     output_tz: Optional[Union[str, datetime.tzinfo]] = None,
-    holidays: Optional[Union[Dict[str, str], HolidayBase]] = None,
+    holidays: Optional[HolidaysInput] = None,
+    input_format: Optional[str] = None,
 ) -> str:
     if fmtstr is None:
         return None
-    if not fmtstr.startswith("%") and not fmtstr.endswith("%"):
-        fmtstr = f"%{fmtstr}%"
-    # mypy complains about kw use in the below, which is weird, but best
-    # to skip
-    dtf = DateTimeFormatter(dt, holidays=holidays)  # type:ignore
-    if isinstance(output_tz, str):
-        orig_tz = output_tz
-        output_tz = dateutil.tz.gettz(output_tz)
-        if output_tz is None:
-            raise DateTimeFormatTimeZoneError(
-                f"invalid tz specification {orig_tz}, could not convert to "
-                "tzinfo"
-            )
+    wrapped = _DateTime(dt, input_format)
+    output_tz = _resolve_tz(output_tz)
     if output_tz is not None:
-        if dtf.dt.dt.tzinfo is None:
-            raise DateTimeFormatTimeZoneError(
-                f"tried to translate to an output timezone ({output_tz}), "
-                "but provided datetime is naive"
-            )
-        dtf.dt.dt = dtf.dt.dt.astimezone(output_tz)
-    return dtf.format(fmtstr)
+        wrapped = _DateTime._from_datetime(
+            _to_output_tz(wrapped.dt, output_tz)
+        )
+    compiled = _compile_template(_wrap_fmtstr(fmtstr))
+    return compiled.format(wrapped, _template_holidays(compiled, holidays))
 
 
 dtfmt = dtformat
 
 
-class DateTimeFormatTimeZoneError(Exception):
-    pass
+def dtformat_templates(
+    dt: DateTimeInput,
+    templates: Union[Mapping[Any, Optional[str]], Iterable[Optional[str]]],
+    output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+    holidays: Optional[HolidaysInput] = None,
+    input_format: Optional[str] = None,
+) -> Union[Dict[Any, Optional[str]], List[Optional[str]]]:
+    """Format one datetime with every template in ``templates``
 
+    Returns a dict with the same keys for a mapping of templates, and a list
+    otherwise, each value as :func:`dtformat` would format it.  ``dt`` is
+    converted, and ``output_tz`` and ``holidays`` resolved, only once, and
+    each distinct translation (``-M1B``, ...) is computed once for all the
+    templates.
+    """
+    wrapped = _DateTime(dt, input_format)
+    output_tz = _resolve_tz(output_tz)
+    if output_tz is not None:
+        wrapped = _DateTime._from_datetime(
+            _to_output_tz(wrapped.dt, output_tz)
+        )
+    return _format_templates(wrapped, templates, holidays)
 
-class DateTimeFormatTranslationError(Exception):
-    pass
 
+def _template_holidays(compiled, holidays):
+    """``holidays`` normalized for ``compiled``, which only reads them in
+    translations"""
+    if compiled.translates:
+        return _normalize_holidays(holidays)
+    return _NO_HOLIDAYS
 
-class DateTimeFormatFieldError(Exception):
-    pass
 
+def _format_templates(dt, templates, holidays, wrap=True):
+    # fields of every template share the translations of one datetime
+    dt = _TranslationCache._from_datetime(dt.dt)
+    # holidays are normalized once, by the first template translating
+    normalized = None
 
-@attr.s(auto_attribs=True)
-class DateTimeFormatter(Formatter):
-    dt: _DateTime = attr.ib(converter=_DateTime)
-    holidays: Optional[HolidayBase] = None
+    def render(fmtstr):
+        nonlocal normalized
+        if fmtstr is None:
+            return None
+        if wrap:
+            fmtstr = _wrap_fmtstr(fmtstr)
+        compiled = _compile_template(fmtstr)
+        if not compiled.translates:
+            return compiled.format(dt, _NO_HOLIDAYS)
+        if normalized is None:
+            normalized = _normalize_holidays(holidays)
+        return compiled.format(dt, normalized)
 
-    def __call__(self, *args, **kwargs):
-        return self.format(*args, **kwargs)
+    if isinstance(templates, Mapping):
+        return {key: render(fmtstr) for key, fmtstr in templates.items()}
+    return [render(fmtstr) for fmtstr in templates]
 
-    def format(self, s, *args, **kwargs):
-        # magic to make sure %%-wrapped are recognized
-        s = re.sub(_PARSE_DT_SUB_REGEX, r"{\1}", s)
 
-        parse_fields = self.parse(s)
-        for _, fld, _, _ in parse_fields:
-            if fld is None:
-                continue
-            if len(fld) == 0:
-                continue
-            matches = re.match(_PARSE_DT_REGEX, fld)
-            if matches is None:
-                continue
-            fmt = matches.group("format")
-            translation = matches.group("translation")
+def dtformat_many(
+    values: Iterable[DateTimeInput],
+    fmtstr: str,
+    output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+    holidays: Optional[HolidaysInput] = None,
+    input_format: Optional[str] = None,
+) -> List[Optional[str]]:
+    """Format every value in ``values`` with the same ``fmtstr``
 
-            use_dt = _translate_dt(self.dt, translation, self.holidays)
-            if use_dt is None:
-                raise DateTimeFormatTranslationError(
-                    f"error in datetime_format specification {fld}, "
-                    f"found but could not identify translation {translation}"
-                )
+    Equivalent to ``[dtformat(v, fmtstr, output_tz, holidays, input_format)
+    for v in values]``, but the template is compiled and ``output_tz``
+    resolved only once for the whole batch.  Without ``input_format``,
+    strings are parsed by a :class:`DateTimeStreamParser`, which infers their
+    layout once rather than for every value.  Array-likes (``numpy`` arrays,
+    pandas ``Series``/``DatetimeIndex``, ...) are handed to
+    :func:`dtformat_array`.
+    """
+    return _format_many(values, fmtstr, output_tz, holidays, input_format)
 
-            stfmt = _SUPPORTED_DATETIME_OUTPUT_FORMATS.get(fmt, None)
-            if stfmt is None:
-                raise DateTimeFormatFieldError(
-                    f"Found format specification {fmt} in date format {fld},  "
-                    f"but this is an unsupported specification."
-                )
-            if isinstance(stfmt, str):
-                kwargs.update({fld: use_dt.strftime(stfmt)})
-            else:
-                kwargs.update({fld: stfmt(use_dt)})
-        return super().format(s, *args, **kwargs)
 
+def _format_many(values, fmtstr, output_tz, holidays, input_format, wrap=True):
+    if hasattr(values, "__array__"):
+        return _format_array(
+            values, fmtstr, output_tz, holidays, input_format, wrap
+        ).tolist()
+    if fmtstr is None:
+        return [None for _ in values]
+    compiled = _compile_template(_wrap_fmtstr(fmtstr) if wrap else fmtstr)
+    output_tz = _resolve_tz(output_tz)
+    ordinals = _template_holidays(compiled, holidays)
+    parse = DateTimeStreamParser() if input_format is None else None
+    out = []
+    for value in values:
+        if parse is not None and isinstance(value, str):
+            dt = _DateTime(parse(value))
+        else:
+            dt = _DateTime(value, input_format)
+        if output_tz is not None:
+            dt = _DateTime._from_datetime(_to_output_tz(dt.dt, output_tz))
+        out.append(compiled.format(dt, ordinals))
+    return out
 
-def _get_dir(d):
-    return _SUPPORTED_TRANSLATION_DIRECTIONS[d]
 
+class DateTimeStreamFormatter:
+    """Format a stream of datetimes with one template
 
-def _get_size(s):
-    return _SUPPORTED_TRANSLATION_SIZES[s]
+    Keeps the fields rendered for the previous datetime, and only renders
+    again those that depend on a part of the datetime that changed since:
+    for mostly increasing timestamps, date fields are rendered once a day,
+    hour fields once an hour and so on, while fields like ``ZZ`` or
+    ``TZOFF`` are rendered for every value.  Results are always identical
+    to :func:`dtformat` with the same arguments.  Strings are parsed by a
+    :class:`DateTimeStreamParser` unless ``input_format`` is given.
+    """
 
+    def __init__(
+        self,
+        fmtstr: str,
+        output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+        holidays: Optional[HolidaysInput] = None,
+        input_format: Optional[str] = None,
+    ):
+        self.fmtstr = fmtstr
+        self.output_tz = _resolve_tz(output_tz)
+        self.input_format = input_format
+        self._compiled = _compile_template(_wrap_fmtstr(fmtstr))
+        self.holidays = _template_holidays(self._compiled, holidays)
+        self._parse = DateTimeStreamParser() if input_format is None else None
+        # for each level, the segments to render when that part changed
+        self._stale = [
+            [
+                (i, literal, field)
+                for i, (literal, field) in enumerate(self._compiled.segments)
+                if field is not None and field.level >= level
+            ]
+            for level in range(_ANY + 1)
+        ]
+        self._parts = [literal for literal, _ in self._compiled.segments]
+        self._last: Optional[datetime.datetime] = None
+        self._out: Optional[str] = None
 
-def _translate_dt(dt, translation, holidays):
-    if translation is None:
-        return dt.dt
-    trans_matches = re.match(_PARSE_DT_TRANSLATION, translation)
-    if trans_matches is None:
-        return None
-    dir_name = trans_matches.group("dir")
-    num = int(trans_matches.group("num"))
-    size_name = trans_matches.group("size")
-    try:
-        dir = _get_dir(dir_name)
-        size = _get_size(size_name)
-    except KeyError as ke:
-        raise DateTimeFormatTranslationError(
-            f"Error decoding translation: {translation}, error was:\n"
-            f"KeyError: {str(ke)}"
+    def __call__(self, value: DateTimeInput) -> str:
+        return self.format(value)
+
+    def format(self, value: DateTimeInput) -> str:
+        if type(value) is datetime.datetime:
+            d = value
+        elif self._parse is not None and isinstance(value, str):
+            d = self._parse(value)
+        else:
+            d = _DateTime(value, self.input_format).dt
+        if self.output_tz is not None:
+            d = _to_output_tz(d, self.output_tz)
+        if not self._compiled.simple:
+            return self._compiled.format(
+                _DateTime._from_datetime(d), self.holidays
+            )
+        last, self._last = self._last, d
+        if (
+            last is None
+            or d.day != last.day
+            or d.month != last.month
+            or d.year != last.year
+        ):
+            level = _DAY
+        elif d.hour != last.hour:
+            level = _HOUR
+        elif d.minute != last.minute:
+            level = _MINUTE
+        elif d.second != last.second:
+            level = _SECOND
+        else:
+            level = _ANY
+        stale = self._stale[level]
+        out = self._out
+        if stale or out is None:
+            dt: Optional[_DateTime] = None
+            parts = self._parts
+            for i, literal, field in stale:
+                if field.translation is None:
+                    parts[i] = literal + field.render(d)
+                    continue
+                if dt is None:
+                    dt = _DateTime._from_datetime(d)
+                parts[i] = literal + field(dt, self.holidays)
+            out = self._out = "".join(parts)
+        return out
+
+    def format_many(self, values: Iterable[DateTimeInput]) -> Iterator[str]:
+        """Lazily format every value in ``values``"""
+        for value in values:
+            yield self.format(value)
+
+
+def dtformat_array(
+    values: Any,
+    fmtstr: str,
+    output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+    holidays: Optional[HolidaysInput] = None,
+    input_format: Optional[str] = None,
+) -> Any:
+    """Format an array of datetimes, returning a ``numpy`` string array
+
+    ``numpy.datetime64`` arrays are rendered with integer arithmetic on the
+    whole array when every field of ``fmtstr`` is numeric (``YMD``, ``DATE``,
+    ``DATETIME``, ``HHMMSS``, ...).  Locale dependent fields (``USDATE``,
+    ``MONTHNAME``, ``LOCALE_DT``, ...) fall back to formatting element by
+    element, as does any other kind of array.  Translations, holidays and
+    business sizes included, are applied as by :func:`dttranslate_array`.
+    pandas ``Series`` and ``DatetimeIndex`` objects are recognised by duck
+    typing, so pandas is never imported; timezone aware ones are rendered in
+    ``output_tz`` (or their own timezone) with the zone's UTC offsets looked
+    up for the whole array in a table of its transitions.  ``input_format``
+    applies to string and integer elements, as for :func:`dtformat`.
+    Requires ``numpy``.
+    """
+    return _format_array(values, fmtstr, output_tz, holidays, input_format)
+
+
+def _format_array(
+    values, fmtstr, output_tz, holidays, input_format, wrap=True
+):
+    np = _import_numpy()
+    values, tz = _as_datetime_array(np, values)
+    shape = values.shape
+    values = values.reshape(-1)
+    if fmtstr is None:
+        return np.full(shape, None, dtype=object)
+    compiled = _compile_template(_wrap_fmtstr(fmtstr) if wrap else fmtstr)
+    ordinals = _template_holidays(compiled, holidays)
+    output_tz = _resolve_tz(output_tz)
+    if values.dtype.kind in "iu" and input_format in _INT_ARRAY_FORMATS:
+        decoded, valid = _decode_int_array(np, values, input_format)
+        if not valid.all():
+            # let the scalar parser describe the first bad value
+            _parse_with_format(int(values[~valid][0]), input_format)
+        values = decoded
+    if values.dtype.kind != "M":
+        values = values.tolist()
+    elif tz is None and output_tz is not None:
+        # datetime64 has no notion of timezone, so is always naive
+        raise DateTimeFormatTimeZoneError(
+            f"tried to translate to an output timezone ({output_tz}), "
+            "but provided datetime64 array is naive"
+        )
+    else:
+        # timezone aware pandas data is stored as UTC, and rendered in
+        # output_tz, or else its own timezone
+        local_tz = tz if output_tz is None else output_tz
+        out = _render_datetime64(np, compiled, values, ordinals, local_tz)
+        if out is not None:
+            return out.reshape(shape)
+        values = _to_datetime64_us(np, values).tolist()
+        if tz is not None:
+            values = [
+                dt.replace(tzinfo=datetime.timezone.utc).astimezone(tz)
+                for dt in values
+            ]
+    out = _format_many(values, fmtstr, output_tz, ordinals, input_format, wrap)
+    return np.array(out, dtype=str).reshape(shape)
+
+
+def dttranslate_array(
+    values: Any,
+    translation: str,
+    holidays: Optional[HolidaysInput] = None,
+) -> Any:
+    """Apply one translation (``"M1B"``, ``"P2F"``, ``"M3m"``, ...) to every
+    datetime in an array
+
+    Results are those of the same translation in a :func:`dtformat` field,
+    holidays, weekends and month/year rollback rules included, computed for
+    the whole array at once with ``numpy.busday_offset``.  Returns a
+    ``datetime64[us]`` array; timezone aware input (e.g. a pandas ``Series``
+    with a ``tz``) is translated element by element and returned as an
+    object array of aware datetimes.  Requires ``numpy``.
+    """
+    np = _import_numpy()
+    size, num = _parse_translation(translation, translation)
+    ordinals = _normalize_holidays(holidays)
+    values, tz = _as_datetime_array(np, values)
+    shape = values.shape
+    values = values.reshape(-1)
+    if tz is not None:
+        dts = [
+            dt.replace(tzinfo=datetime.timezone.utc).astimezone(tz)
+            for dt in _to_datetime64_us(np, values).tolist()
+        ]
+    elif values.dtype.kind != "M":
+        dts = [_DateTime(v).dt for v in values.tolist()]
+    else:
+        dts = None
+    if dts is not None:
+        if any(dt.tzinfo is not None for dt in dts):
+            out = np.empty(len(dts), dtype=object)
+            out[:] = [
+                _DateTime(dt).translate(size, num, ordinals) for dt in dts
+            ]
+            return out.reshape(shape)
+        values = np.array(dts, dtype="datetime64[us]")
+    us = _to_datetime64_us(np, values)
+    return _translate_datetime64(np, us, (size, num), ordinals).reshape(shape)
+
+
+def business_days_between(
+    start: Any,
+    end: Any,
+    holidays: Optional[HolidaysInput] = None,
+) -> Any:
+    """Number of business days from ``start`` up to, not including, ``end``
+
+    Business days are those the ``B`` translation lands on: weekdays (or
+    the weekmask of a :class:`BusinessCalendar`) that are not holidays.
+    If ``end`` is earlier than ``start`` the count is negative, taken over
+    the days after ``end`` up to and including ``start``, as for
+    ``numpy.busday_count``.  Counts come from running totals of each year's
+    business days, so their cost does not grow with the distance between
+    the dates.  Either argument may be an array (``numpy``, pandas
+    ``Series``, ...), in which case an array of counts is returned.
+    """
+    ordinals = _normalize_holidays(holidays)
+    if hasattr(start, "__array__") or hasattr(end, "__array__"):
+        np = _import_numpy()
+        return _busday_count_days(
+            np, _as_day_array(np, start), _as_day_array(np, end), ordinals
+        )
+    return ordinals.calendar(False).count(
+        _DateTime(start).dt.toordinal(), _DateTime(end).dt.toordinal()
+    )
+
+
+def business_day_range(
+    start: DateTimeInput,
+    end: DateTimeInput,
+    holidays: Optional[HolidaysInput] = None,
+) -> List[datetime.date]:
+    """The business days from ``start`` up to, not including, ``end``
+
+    Business days are as for :func:`business_days_between`, which gives the
+    length of the list.
+    """
+    calendar = _normalize_holidays(holidays).calendar(False)
+    ordinals = calendar.between(
+        _DateTime(start).dt.toordinal(), _DateTime(end).dt.toordinal()
+    )
+    return [datetime.date.fromordinal(o) for o in ordinals]
+
+
+def dtparse_int_array(values: Any, input_format: str = "YYYYMMDD") -> Any:
+    """Decode an integer array of ``YYYYMMDD``, ``YYYYMM`` or ``HHMMSS`` values
+
+    Returns ``(datetimes, valid)``: a ``datetime64`` array (days for dates,
+    seconds on the current date for times) with ``NaT`` wherever the boolean
+    ``valid`` array is False.  Values are checked exactly as the scalar
+    parsers do, i.e. years 1000-3000, real calendar days and 24 hour times.
+    Requires ``numpy``.
+    """
+    np = _import_numpy()
+    return _decode_int_array(np, values, input_format)
+
+
+def _as_day_array(np, values):
+    """``values`` as ``datetime64[D]``, local dates when timezone aware"""
+    if not hasattr(values, "__array__"):
+        return np.datetime64(_DateTime(values).dt.date(), "D")
+    values, tz = _as_datetime_array(np, values)
+    shape = values.shape
+    values = values.reshape(-1)
+    if tz is not None:
+        days = [
+            dt.replace(tzinfo=datetime.timezone.utc).astimezone(tz).date()
+            for dt in _to_datetime64_us(np, values).tolist()
+        ]
+    elif values.dtype.kind != "M":
+        days = [_DateTime(v).dt.date() for v in values.tolist()]
+    else:
+        return (
+            _to_datetime64_us(np, values)
+            .astype("datetime64[D]")
+            .reshape(shape)
+        )
+    return np.array(days, dtype="datetime64[D]").reshape(shape)
+
+
+def _wrap_fmtstr(fmtstr):
+    if not fmtstr.startswith("%") and not fmtstr.endswith("%"):
+        return f"%{fmtstr}%"
+    return fmtstr
+
+
+def _to_output_tz(dt, output_tz):
+    if dt.tzinfo is None:
+        raise DateTimeFormatTimeZoneError(
+            f"tried to translate to an output timezone ({output_tz}), "
+            "but provided datetime is naive"
         )
-    return dt.translate(size, num * dir, holidays=holidays)
+    return dt.astimezone(output_tz)
+
+
+def __getattr__(name):
+    # DateTimeFormatter needs attrs and DateTimeLogFormatter logging, which
+    # are slow to import, so they are only imported once used; re-exported
+    # by __init__.py
+    if name == "DateTimeFormatter":
+        from .__formatter import DateTimeFormatter
+
+        return DateTimeFormatter
+    if name == "DateTimeLogFormatter":
+        from .__log import DateTimeLogFormatter
+
+        return DateTimeLogFormatter
+    # named after the package, whose attribute lookups end up here
+    raise AttributeError(f"module {__package__!r} has no attribute {name!r}")
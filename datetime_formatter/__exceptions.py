@@ -0,0 +1,17 @@
+__all__ = [
+    "DateTimeFormatTimeZoneError",
+    "DateTimeFormatTranslationError",
+    "DateTimeFormatFieldError",
+]
+
+
+class DateTimeFormatTimeZoneError(Exception):
+    pass
+
+
+class DateTimeFormatTranslationError(Exception):
+    pass
+
+
+class DateTimeFormatFieldError(Exception):
+    pass
@@ -55,6 +55,12 @@ _dtformat = functools.partialmethod(datetime.strftime)
 _dttranslate = functools.partialmethod(timedelta)
 
 _DATE_DELTAS = ["days", "weeks", "months", "years"]
+_BUSINESS_DELTAS = [
+    "business_days",
+    "business_weeks",
+    "business_months",
+    "business_years",
+]
 
 # case sensitive
 _SUPPORTED_TRANSLATION_SIZES = {
@@ -0,0 +1,103 @@
+import attr  # type: ignore
+import datetime  # type: ignore
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
+
+from .__calendar import _NO_HOLIDAYS, _normalize_holidays
+from .__datetime import _DateTime
+from .__datetime_format import (
+    DateTimeInput,
+    HolidaysInput,
+    _format_many,
+    _format_templates,
+)
+from .__template import _FORMATTER, _compile_template
+
+
+# not a string.Formatter subclass, which has no __slots__ and would give
+# every instance a __dict__; other templates go to the shared _FORMATTER
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class DateTimeFormatter:
+    dt: _DateTime
+    holidays: Optional[HolidaysInput] = None
+    # string/int dt layout (e.g. "MM/DD/YYYY", "YYYYMMDD" or a strptime
+    # pattern), skips format inference
+    input_format: Optional[str] = None
+    # holidays normalized once, see _normalize_holidays
+    _normalized: Any = attr.ib(
+        default=_NO_HOLIDAYS, init=False, repr=False, eq=False
+    )
+
+    def __attrs_post_init__(self):
+        # frozen, so fields are set past attrs' __setattr__
+        if not isinstance(self.dt, _DateTime):
+            object.__setattr__(
+                self, "dt", _DateTime(self.dt, self.input_format)
+            )
+        if self.holidays is not None:
+            object.__setattr__(
+                self, "_normalized", _normalize_holidays(self.holidays)
+            )
+
+    def __call__(self, *args, **kwargs):
+        return self.format(*args, **kwargs)
+
+    @classmethod
+    def format_many(
+        cls,
+        values: Iterable[DateTimeInput],
+        s: str,
+        output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+        holidays: Optional[HolidaysInput] = None,
+        input_format: Optional[str] = None,
+    ) -> List[Optional[str]]:
+        """Format every value in ``values`` as :meth:`format` would, in one
+        batch as :func:`dtformat_many` does"""
+        return _format_many(
+            values, s, output_tz, holidays, input_format, wrap=False
+        )
+
+    def rebind(self, dt: DateTimeInput) -> "DateTimeFormatter":
+        """A formatter for ``dt`` with the same holidays and input format
+
+        Skips the attrs ``__init__`` and reuses the normalized holidays, so
+        one formatter can be cheaply rebound to each datetime of a stream.
+        """
+        wrapped: _DateTime
+        if isinstance(dt, _DateTime):
+            wrapped = dt
+        else:
+            wrapped = _DateTime(dt, self.input_format)
+        new = object.__new__(type(self))
+        object.__setattr__(new, "dt", wrapped)
+        object.__setattr__(new, "holidays", self.holidays)
+        object.__setattr__(new, "input_format", self.input_format)
+        object.__setattr__(new, "_normalized", self._normalized)
+        return new
+
+    def format_templates(
+        self,
+        templates: Union[Mapping[Any, Optional[str]], Iterable[Optional[str]]],
+    ) -> Union[Dict[Any, Optional[str]], List[Optional[str]]]:
+        """Format every template in ``templates`` as :meth:`format` would,
+        sharing translations as :func:`dtformat_templates` does"""
+        return _format_templates(
+            self.dt, templates, self._normalized, wrap=False
+        )
+
+    def format(self, s, *args, **kwargs):
+        # templates are parsed once and cached, see __template.py
+        compiled = _compile_template(s)
+        holidays = self._normalized
+        if compiled.simple:
+            return compiled.render(self.dt, holidays)
+        kwargs.update(compiled.render_fields(self.dt, holidays))
+        return _FORMATTER.vformat(compiled.template, args, kwargs)
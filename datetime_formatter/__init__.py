@@ -1,3 +1,7 @@
 from .__datetime_format import *
+from .__datetime_format import __all__ as _eager, __getattr__
+
+# imported on first use, see __datetime_format.py
+__all__ = _eager + ["DateTimeFormatter", "DateTimeLogFormatter"]
 
 __version__ = "0.0.1"
@@ -0,0 +1,82 @@
+import datetime  # type: ignore
+import logging
+import threading
+
+from typing import Any, Literal, Optional, Tuple, Union
+
+from .__datetime_format import (
+    DateTimeStreamFormatter,
+    HolidaysInput,
+    dtformat,
+)
+from .__strftime import _SECOND
+from .__tz import _resolve_tz
+
+# logging.Formatter.default_time_format, default_msec_format is then added
+_DEFAULT_DATEFMT = "DATETIME"
+
+
+class DateTimeLogFormatter(logging.Formatter):
+    """A ``logging.Formatter`` rendering ``asctime`` with a template
+
+    ``datefmt`` is a template as for :func:`dtformat`, e.g. ``ISODATETIME``
+    or ``%DATETIME%.%ZZ%``.  Without it, times look as they do with
+    ``logging.Formatter``.  Record times are rendered in local time, or in
+    ``output_tz`` if given, rather than through ``converter``.  The template
+    is compiled once, and for templates without sub-second fields the
+    output is reused for every record of the same second.
+    """
+
+    def __init__(
+        self,
+        fmt: Optional[str] = None,
+        datefmt: Optional[str] = None,
+        style: Literal["%", "{", "$"] = "%",
+        validate: bool = True,
+        *,
+        output_tz: Optional[Union[str, datetime.tzinfo]] = None,
+        holidays: Optional[HolidaysInput] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(fmt, datefmt, style, validate, **kwargs)
+        self.output_tz = _resolve_tz(output_tz)
+        self.holidays = holidays
+        self._stream = DateTimeStreamFormatter(
+            datefmt or _DEFAULT_DATEFMT, holidays=holidays
+        )
+        self._per_second = all(
+            field.level <= _SECOND
+            for field in self._stream._compiled.fields.values()
+        )
+        # (second, asctime) of the last record, replaced as a whole
+        self._cached: Tuple[Optional[float], str] = (None, "")
+        # handlers lock around format, but a formatter may be shared
+        self._lock = threading.Lock()
+
+    def formatTime(
+        self, record: logging.LogRecord, datefmt: Optional[str] = None
+    ) -> str:
+        created = record.created
+        if datefmt != self.datefmt:
+            s = dtformat(
+                self._datetime(created),
+                datefmt or _DEFAULT_DATEFMT,
+                holidays=self.holidays,
+            )
+        elif self._per_second:
+            second, s = self._cached
+            if second != created // 1:
+                second = created // 1
+                with self._lock:
+                    s = self._stream(self._datetime(second))
+                self._cached = (second, s)
+        else:
+            dt = self._datetime(created)
+            with self._lock:
+                s = self._stream(dt)
+        if not datefmt and self.default_msec_format:
+            s = self.default_msec_format % (s, record.msecs)
+        return s
+
+    def _datetime(self, created):
+        return datetime.datetime.fromtimestamp(created, self.output_tz)
@@ -0,0 +1,179 @@
+import datetime  # type: ignore
+import re
+
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from .__datetime import (
+    _DATE_SPLIT_CHARS,
+    _DATE_SWITCHOVER,
+    _FAST_TIME,
+    _INVALID,
+    _DateTime,
+    _fast_time,
+    _string_to_datetime,
+)
+
+_DEFAULT_STREAM_SAMPLES = 16
+
+
+def _date_layout(first, second, third, sc):
+    e = re.escape(sc)
+    return first + e + second + e + third
+
+
+def _stream_layouts():
+    # name -> regex in detection order, the date layouts are the ones
+    # _convert_non_isostring_date tells apart by field length
+    d12, d2, d4, dn = "([0-9]{1,2})", "([0-9]{2})", "([0-9]{4})", "([0-9]+)"
+    layouts = {}
+    for sc in _DATE_SPLIT_CHARS:
+        for name, pattern in [
+            ("YYYY{sc}MM{sc}DD", _date_layout(d4, dn, dn, sc)),
+            ("MM{sc}DD{sc}YYYY", _date_layout(d12, d12, d4, sc)),
+            ("MM{sc}DD{sc}YY", _date_layout(d12, d12, d2, sc)),
+        ]:
+            name = name.format(sc=sc)
+            layouts[name] = re.compile(pattern)
+            layouts[name + " HH:MM:SS"] = re.compile(
+                pattern + r"\s+" + _FAST_TIME
+            )
+    layouts["HH:MM:SS"] = re.compile(_FAST_TIME)
+    return layouts
+
+
+_STREAM_LAYOUTS = _stream_layouts()
+
+
+def _iso_parser(s):
+    try:
+        return datetime.datetime.fromisoformat(s)
+    except ValueError:
+        return None
+
+
+def _layout_parser(name, regex):
+    """Parser for strings known to be laid out as ``name``
+
+    Returns ``None`` for anything that does not match, or is invalid, so the
+    caller can fall back to full inference.
+    """
+    match = regex.fullmatch
+    if name.startswith("HH"):
+
+        def parse_time(s):
+            m = match(s)
+            if m is None or len(s) < 4:
+                return None
+            time = _fast_time(*m.groups())
+            if time is _INVALID:
+                return None
+            return datetime.datetime.combine(datetime.date.today(), time)
+
+        return parse_time
+
+    # the datetime constructor makes the same checks as inference
+    year_first = name.startswith("YYYY")
+    two_digit_year = "YYYY" not in name
+    with_time = name.endswith("SS")
+
+    def parse(s):
+        m = match(s)
+        if m is None:
+            return None
+        fields = m.groups()
+        if year_first:
+            yyyy, mm, dd = int(fields[0]), int(fields[1]), int(fields[2])
+        else:
+            mm, dd, yyyy = int(fields[0]), int(fields[1]), int(fields[2])
+            if two_digit_year:
+                yyyy += 2000 if yyyy <= _DATE_SWITCHOVER else 1900
+            if mm > 12:
+                mm, dd = dd, mm
+        hh = mi = ss = us = 0
+        if with_time:
+            hh, mi = int(fields[3]), int(fields[4])
+            if fields[5] is not None:
+                ss = int(fields[5])
+            if fields[6] is not None:
+                us = int(fields[6].ljust(6, "0"))
+        try:
+            return datetime.datetime(yyyy, mm, dd, hh, mi, ss, us)
+        except (OverflowError, ValueError):
+            return None
+
+    return parse
+
+
+def _detect_layout(s):
+    if s[4:5] == "-" and _iso_parser(s) is not None:
+        return "ISO"
+    for name, regex in _STREAM_LAYOUTS.items():
+        if regex.fullmatch(s) is not None:
+            return name
+    return None
+
+
+def _make_parser(layout):
+    if layout == "ISO":
+        return _iso_parser
+    return _layout_parser(layout, _STREAM_LAYOUTS[layout])
+
+
+class DateTimeStreamParser:
+    """Parse a stream of datetime strings that (mostly) share one layout
+
+    The first ``samples`` strings go through the usual format inference,
+    while their layout is recorded.  After that the parser locks onto the
+    most common layout, provided it parsed every sample exactly as inference
+    did, and from then on parses with that layout's precompiled regex alone.
+    Values that do not match the locked layout still get full inference, so
+    results are always identical to parsing each value on its own.
+    Non-string values are converted as :class:`DateTimeFormatter` would.
+    """
+
+    def __init__(self, samples: int = _DEFAULT_STREAM_SAMPLES):
+        self.samples = samples
+        self.layout: Optional[str] = None
+        self._parser = None
+        self._sampled: Optional[List[Tuple[str, datetime.datetime]]] = []
+
+    def __call__(self, value: Any) -> datetime.datetime:
+        return self.parse(value)
+
+    def parse(self, value: Any) -> datetime.datetime:
+        if not isinstance(value, str):
+            return _DateTime(value).dt
+        if self._parser is not None:
+            result = self._parser(value)
+            if result is not None:
+                return result
+            return _string_to_datetime(value)
+        result = _string_to_datetime(value)
+        if self._sampled is not None:
+            self._sampled.append((value, result))
+            if len(self._sampled) >= self.samples:
+                self._lock()
+        return result
+
+    def parse_many(self, values: Iterable[Any]) -> Iterator[datetime.datetime]:
+        """Lazily parse every value in ``values``"""
+        for value in values:
+            yield self.parse(value)
+
+    def _lock(self):
+        sampled, self._sampled = self._sampled, None
+        counts = {}
+        for value, _ in sampled:
+            layout = _detect_layout(value)
+            if layout is not None:
+                counts[layout] = counts.get(layout, 0) + 1
+        if not counts:
+            return
+        layout = max(counts, key=counts.get)
+        parser = _make_parser(layout)
+        for value, result in sampled:
+            locked = parser(value)
+            if locked is not None and locked != result:
+                return
+        self.layout = layout
+        self._parser = parser
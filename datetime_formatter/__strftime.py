@@ -0,0 +1,241 @@
+import datetime
+import functools
+import locale
+import re
+
+_C_LOCALE_EXPANSIONS = {"x": "%m/%d/%y", "X": "%H:%M:%S"}
+_C_LOCALES = frozenset(["C", "POSIX", "C.UTF-8", "C.utf8"])
+
+# how often the output of a directive can change: with the day, hour, minute
+# or second of the datetime, or with any change at all (%f, %z, ...)
+_DAY, _HOUR, _MINUTE, _SECOND, _ANY = range(5)
+_DIRECTIVE_LEVELS = {
+    **dict.fromkeys("YmdyjwWaAbBx%", _DAY),
+    **dict.fromkeys("HIp", _HOUR),
+    "M": _MINUTE,
+    **dict.fromkeys("SXc", _SECOND),
+}
+# directives whose output depends on LC_TIME
+_LOCALE_DIRECTIVES = frozenset("aAbBpcxX")
+
+_DIRECTIVE_REGEX = re.compile(r"%(.)|[^%]+|%$", re.DOTALL)
+
+_MONTH_NAMES = [
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+_DAY_NAMES = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+class _YearTable(dict):
+    """Four digit years, anything outside 1000-9999 is left to strftime"""
+
+    def __missing__(self, year):
+        if 1000 <= year:
+            value = "%04d" % year
+        else:
+            value = datetime.date(year, 1, 1).strftime("%Y")
+        self[year] = value
+        return value
+
+
+class _YearStartTable(dict):
+    """Ordinal of January 1st of each year"""
+
+    def __missing__(self, year):
+        value = self[year] = datetime.date(year, 1, 1).toordinal()
+        return value
+
+
+# lookup tables shared by every renderer
+_YEAR = _YearTable()
+_YEAR_START = _YearStartTable()
+_PAD2 = tuple("%02d" % i for i in range(100))
+_WEEKDAY = tuple(str((i + 1) % 7) for i in range(7))
+_DAY_ABBR = tuple(name[:3] for name in _DAY_NAMES)
+_MONTH_ABBR = ("",) + tuple(name[:3] for name in _MONTH_NAMES)
+_MONTH_NAME = ("",) + tuple(_MONTH_NAMES)
+_AMPM = ("AM",) * 12 + ("PM",) * 12
+
+# strftime directives rendered straight from the datetime's fields
+_NUMERIC_DIRECTIVES = {
+    "Y": lambda dt: _YEAR[dt.year],
+    "m": lambda dt: _PAD2[dt.month],
+    "d": lambda dt: _PAD2[dt.day],
+    "H": lambda dt: _PAD2[dt.hour],
+    "I": lambda dt: _PAD2[(dt.hour + 11) % 12 + 1],
+    "M": lambda dt: _PAD2[dt.minute],
+    "S": lambda dt: _PAD2[dt.second],
+    "y": lambda dt: _PAD2[dt.year % 100],
+    "f": lambda dt: "%06d" % dt.microsecond,
+    "j": lambda dt: "%03d" % (dt.toordinal() - _YEAR_START[dt.year] + 1),
+    "w": lambda dt: _WEEKDAY[dt.weekday()],
+    "W": lambda dt: _PAD2[
+        (dt.toordinal() - _YEAR_START[dt.year] + 7 - dt.weekday()) // 7
+    ],
+    "%": lambda dt: "%",
+}
+
+# directives whose output depends on LC_TIME, rendered as the C locale would
+_C_LOCALE_DIRECTIVES = {
+    "a": lambda dt: _DAY_ABBR[dt.weekday()],
+    "A": lambda dt: _DAY_NAMES[dt.weekday()],
+    "b": lambda dt: _MONTH_ABBR[dt.month],
+    "B": lambda dt: _MONTH_NAME[dt.month],
+    "p": lambda dt: _AMPM[dt.hour],
+}
+
+
+def _render_ymd(dt):
+    return f"{_YEAR[dt.year]}{_PAD2[dt.month]}{_PAD2[dt.day]}"
+
+
+def _render_date(dt):
+    return f"{_YEAR[dt.year]}-{_PAD2[dt.month]}-{_PAD2[dt.day]}"
+
+
+def _render_datetime(dt):
+    return (
+        f"{_YEAR[dt.year]}-{_PAD2[dt.month]}-{_PAD2[dt.day]} "
+        f"{_PAD2[dt.hour]}:{_PAD2[dt.minute]}:{_PAD2[dt.second]}"
+    )
+
+
+def _render_us_date(dt):
+    return f"{_PAD2[dt.month]}/{_PAD2[dt.day]}/{_PAD2[dt.year % 100]}"
+
+
+def _render_us_datetime(dt):
+    return (
+        f"{_PAD2[dt.month]}/{_PAD2[dt.day]}/{_PAD2[dt.year % 100]} "
+        f"{_PAD2[dt.hour]}:{_PAD2[dt.minute]}:{_PAD2[dt.second]}"
+    )
+
+
+def _render_time(dt):
+    return f"{_PAD2[dt.hour]}:{_PAD2[dt.minute]}:{_PAD2[dt.second]}"
+
+
+def _render_time_us(dt):
+    return (
+        f"{_PAD2[dt.hour]}:{_PAD2[dt.minute]}:{_PAD2[dt.second]}."
+        f"{dt.microsecond:06d}"
+    )
+
+
+# (C locale expanded) patterns of the common shortcuts, each rendered by one
+# f-string rather than by joining the renderers of its directives
+_PATTERN_RENDERERS = {
+    "%Y%m%d": _render_ymd,
+    "%Y-%m-%d": _render_date,
+    "%Y-%m-%d %H:%M:%S": _render_datetime,
+    "%m/%d/%y": _render_us_date,
+    "%m/%d/%y %H:%M:%S": _render_us_datetime,
+    "%H:%M:%S": _render_time,
+    "%H:%M:%S.%f": _render_time_us,
+    "%Y%m": lambda dt: f"{_YEAR[dt.year]}{_PAD2[dt.month]}",
+    "%m%Y": lambda dt: f"{_PAD2[dt.month]}{_YEAR[dt.year]}",
+    "%y%m": lambda dt: f"{_PAD2[dt.year % 100]}{_PAD2[dt.month]}",
+    "%m%y": lambda dt: f"{_PAD2[dt.month]}{_PAD2[dt.year % 100]}",
+    "%m%d%y": lambda dt: (
+        f"{_PAD2[dt.month]}{_PAD2[dt.day]}{_PAD2[dt.year % 100]}"
+    ),
+    "%m%d%Y": lambda dt: f"{_PAD2[dt.month]}{_PAD2[dt.day]}{_YEAR[dt.year]}",
+}
+
+
+def _c_locale():
+    return locale.setlocale(locale.LC_TIME) in _C_LOCALES
+
+
+def _directives(stfmt):
+    """The set of directives used by a strftime pattern"""
+    return {m.group(1) for m in _DIRECTIVE_REGEX.finditer(stfmt)} - {None}
+
+
+def _strftime_level(stfmt):
+    """How often the output of a strftime pattern can change, see _DAY"""
+    return max(
+        [_DIRECTIVE_LEVELS.get(d, _ANY) for d in _directives(stfmt)],
+        default=_DAY,
+    )
+
+
+def _expand_c_locale(match):
+    return _C_LOCALE_EXPANSIONS.get(match.group(1), match.group(0))
+
+
+def _join(segments, tail):
+    """Render ``(literal_text, directive)`` pairs followed by ``tail``"""
+
+    def render(dt):
+        return (
+            "".join([literal + field(dt) for literal, field in segments])
+            + tail
+        )
+
+    return render
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_strftime(stfmt):
+    """Compile a strftime pattern into a function of one datetime
+
+    Returns ``None`` if the pattern uses a directive without a renderer, e.g.
+    ``%c`` or ``%z``.  Patterns using locale dependent directives are only
+    rendered directly while LC_TIME is the C locale, and by ``strftime``
+    otherwise.
+    """
+    expanded = _DIRECTIVE_REGEX.sub(_expand_c_locale, stfmt)
+    render = _PATTERN_RENDERERS.get(expanded, None)
+    if render is not None:
+        if expanded == stfmt:
+            return render
+        return _in_c_locale(render, stfmt)
+    segments = []
+    literal = ""
+    uses_locale = expanded != stfmt
+    for match in _DIRECTIVE_REGEX.finditer(expanded):
+        directive = match.group(1)
+        if directive is None:
+            literal += match.group(0)
+            continue
+        if directive in _C_LOCALE_DIRECTIVES:
+            field = _C_LOCALE_DIRECTIVES[directive]
+            uses_locale = True
+        elif directive in _NUMERIC_DIRECTIVES:
+            field = _NUMERIC_DIRECTIVES[directive]
+        else:
+            return None
+        segments.append((literal, field))
+        literal = ""
+    if len(segments) == 1 and not segments[0][0] and not literal:
+        render = segments[0][1]
+    else:
+        render = _join(tuple(segments), literal)
+    if not uses_locale:
+        return render
+    return _in_c_locale(render, stfmt)
+
+
+def _in_c_locale(render, stfmt):
+    """``render`` while LC_TIME is the C locale, ``strftime`` otherwise"""
+    return lambda dt: render(dt) if _c_locale() else dt.strftime(stfmt)
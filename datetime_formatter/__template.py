@@ -0,0 +1,237 @@
+import functools
+import locale
+import operator
+import re
+from string import Formatter
+
+from .__exceptions import (
+    DateTimeFormatFieldError,
+    DateTimeFormatTranslationError,
+)
+from .__formats import (
+    _BUSINESS_DELTAS,
+    _DATE_DELTAS,
+    _PARSE_DT_REGEX,
+    _PARSE_DT_SUB_REGEX,
+    _PARSE_DT_TRANSLATION,
+    _SUPPORTED_DATETIME_OUTPUT_FORMATS,
+    _SUPPORTED_TRANSLATION_DIRECTIONS,
+    _SUPPORTED_TRANSLATION_SIZES,
+)
+from .__strftime import (
+    _ANY,
+    _DAY,
+    _HOUR,
+    _LOCALE_DIRECTIVES,
+    _MINUTE,
+    _SECOND,
+    _compile_strftime,
+    _directives,
+    _strftime_level,
+)
+
+# number of distinct raw template strings kept compiled at any one time
+_TEMPLATE_CACHE_SIZE = 1024
+# number of dates whose output a date-only template keeps, see render()
+_DATE_MEMO_SIZE = 256
+
+# how often a translation can change the output, see _DIRECTIVE_LEVELS;
+# anything else (microseconds) changes it with any change of the datetime
+_TRANSLATION_LEVELS = {
+    **dict.fromkeys(_DATE_DELTAS + _BUSINESS_DELTAS, _DAY),
+    "hours": _HOUR,
+    "minutes": _MINUTE,
+    "seconds": _SECOND,
+}
+
+_PARSE_DT_TRANSLATION_REGEX = re.compile(_PARSE_DT_TRANSLATION)
+
+
+def _parse_translation(fld, translation):
+    """Decode e.g. ``M1B`` into ``("business_days", -1)``"""
+    trans_matches = _PARSE_DT_TRANSLATION_REGEX.match(translation)
+    if trans_matches is None:
+        raise DateTimeFormatTranslationError(
+            f"error in datetime_format specification {fld}, "
+            f"found but could not identify translation {translation}"
+        )
+    try:
+        dir = _SUPPORTED_TRANSLATION_DIRECTIONS[trans_matches.group("dir")]
+        size = _SUPPORTED_TRANSLATION_SIZES[trans_matches.group("size")]
+    except KeyError as ke:
+        raise DateTimeFormatTranslationError(
+            f"Error decoding translation: {translation}, error was:\n"
+            f"KeyError: {str(ke)}"
+        )
+    return size, int(trans_matches.group("num")) * dir
+
+
+def _get_renderer(fld, fmt):
+    stfmt = _SUPPORTED_DATETIME_OUTPUT_FORMATS.get(fmt, None)
+    if stfmt is None:
+        raise DateTimeFormatFieldError(
+            f"Found format specification {fmt} in date format {fld},  "
+            f"but this is an unsupported specification."
+        )
+    if isinstance(stfmt, str):
+        render = _compile_strftime(stfmt)
+        if render is None:
+            return operator.methodcaller("strftime", stfmt)
+        return render
+    return stfmt
+
+
+class _CompiledField:
+    """A single ``%FORMAT[-TRANSLATION]%`` field, fully resolved
+
+    ``level`` is the finest part of the datetime the output depends on,
+    ``_DAY`` to ``_ANY`` (see __strftime.py), and ``localized`` is set when
+    it depends on LC_TIME.
+    """
+
+    __slots__ = (
+        "name",
+        "fmt",
+        "translation",
+        "render",
+        "level",
+        "localized",
+    )
+
+    def __init__(self, name, fmt, translation, render):
+        self.name = name
+        self.fmt = fmt
+        self.translation = translation
+        self.render = render
+        stfmt = _SUPPORTED_DATETIME_OUTPUT_FORMATS[fmt]
+        if isinstance(stfmt, str):
+            self.level = _strftime_level(stfmt)
+            self.localized = bool(_directives(stfmt) & _LOCALE_DIRECTIVES)
+        else:
+            self.level = _ANY
+            self.localized = False
+        if translation is not None:
+            self.level = max(
+                self.level, _TRANSLATION_LEVELS.get(translation[0], _ANY)
+            )
+
+    def __call__(self, dt, holidays=None):
+        if self.translation is None:
+            return self.render(dt.dt)
+        return self.render(dt.translate(*self.translation, holidays=holidays))
+
+
+class _CompiledTemplate:
+    """A template string parsed once into literal segments and fields
+
+    ``segments`` holds ``(literal_text, field)`` pairs in output order, where
+    ``field`` is a ``_CompiledField`` (or ``None`` for trailing text).  A
+    template is ``simple`` when every replacement field is a datetime field;
+    simple templates are rendered by joining segments directly, anything
+    else (positional ``{}`` fields, format specs, ...) is handed back to
+    ``string.Formatter`` with the datetime fields filled in as keywords.
+    ``translates`` is set when any field has a translation, which is the
+    only use of holidays.
+
+    Simple templates whose fields all have ``_DAY`` level keep their output
+    per date in ``memo``, so rendering another time of that day is a lookup.
+    ``memo`` is a ``(holidays, {key: output})`` pair, started afresh for
+    other holidays (only holidays that cannot change are normalized once, see
+    ``_normalize_holidays``), so it keeps at most one holidays object alive.
+    """
+
+    __slots__ = (
+        "template",
+        "segments",
+        "fields",
+        "simple",
+        "translates",
+        "memo",
+        "memo_locale",
+    )
+
+    def __init__(self, template):
+        # magic to make sure %%-wrapped are recognized
+        self.template = re.sub(_PARSE_DT_SUB_REGEX, r"{\1}", template)
+        self.segments = []
+        self.fields = {}
+        self.simple = True
+        for literal, fld, spec, conv in Formatter().parse(self.template):
+            field = None
+            if fld:
+                field = self.fields.get(fld, None)
+                if field is None:
+                    field = self._compile_field(fld)
+                if field is not None:
+                    self.fields[fld] = field
+            if fld is not None and (field is None or spec or conv):
+                self.simple = False
+            self.segments.append((literal, field))
+        fields = self.fields.values()
+        self.translates = any(f.translation is not None for f in fields)
+        self.memo = None
+        if self.simple and fields and all(f.level == _DAY for f in fields):
+            self.memo = (None, {})
+        self.memo_locale = any(f.localized for f in fields)
+
+    @staticmethod
+    def _compile_field(fld):
+        matches = _PARSE_DT_REGEX.match(fld)
+        if matches is None:
+            return None
+        fmt = matches.group("format")
+        translation = matches.group("translation")
+        if translation is not None:
+            translation = _parse_translation(fld, translation)
+        return _CompiledField(fld, fmt, translation, _get_renderer(fld, fmt))
+
+    def render_fields(self, dt, holidays=None):
+        return {
+            name: field(dt, holidays) for name, field in self.fields.items()
+        }
+
+    def format(self, dt, holidays=None):
+        if self.simple:
+            return self.render(dt, holidays)
+        return _FORMATTER.vformat(
+            self.template, (), self.render_fields(dt, holidays)
+        )
+
+    def render(self, dt, holidays=None):
+        memo = self.memo
+        if memo is None:
+            return self._render(dt, holidays)
+        if not self.translates:
+            holidays = None
+        if memo[0] is not holidays:
+            # replaced as a whole, so other threads keep the memo of theirs
+            memo = self.memo = (holidays, {})
+        outputs = memo[1]
+        key = (
+            dt.dt.toordinal(),
+            locale.setlocale(locale.LC_TIME) if self.memo_locale else None,
+        )
+        out = outputs.get(key, None)
+        if out is None:
+            out = self._render(dt, holidays)
+            if len(outputs) >= _DATE_MEMO_SIZE:
+                outputs.clear()
+            outputs[key] = out
+        return out
+
+    def _render(self, dt, holidays=None):
+        return "".join(
+            [
+                literal if field is None else literal + field(dt, holidays)
+                for literal, field in self.segments
+            ]
+        )
+
+
+# string.Formatter keeps no state, so one instance serves every template
+_FORMATTER = Formatter()
+
+
+@functools.lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_template(template):
+    return _CompiledTemplate(template)
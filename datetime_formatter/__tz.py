@@ -0,0 +1,105 @@
+import datetime  # type: ignore
+import re
+import threading
+
+from typing import Dict, Tuple
+
+from .__exceptions import DateTimeFormatTimeZoneError
+
+_TZ_BACKENDS = ("dateutil", "zoneinfo")
+# how timezone names are resolved, see set_tz_backend
+_TZ_BACKEND = "dateutil"
+
+# UTC and fixed offsets, which the zoneinfo backend resolves without a lookup
+_UTC_NAMES = frozenset(["UTC", "utc", "Z", "z"])
+_FIXED_OFFSET_REGEX = re.compile(r"([+-])([0-9]{2}):?([0-9]{2})")
+
+
+def set_tz_backend(backend: str) -> None:
+    """Choose how ``output_tz`` names are resolved
+
+    ``"dateutil"`` (the default) uses ``dateutil.tz.gettz``.  ``"zoneinfo"``
+    uses the standard library ``zoneinfo`` module (Python 3.9+), whose
+    conversions run in C, and also accepts ``"UTC"`` and ``"+HH:MM"``
+    (``"-HHMM"``, ...) offsets, resolved to ``datetime.timezone`` instances
+    without any lookup.  Resolved names are cached per backend either way.
+    """
+    if backend not in _TZ_BACKENDS:
+        raise ValueError(
+            f"invalid tz backend {backend}, must be one of {_TZ_BACKENDS}"
+        )
+    if backend == "zoneinfo":
+        _import_zoneinfo()
+    global _TZ_BACKEND
+    _TZ_BACKEND = backend
+
+
+def _import_zoneinfo():
+    try:
+        import zoneinfo  # type: ignore
+    except ImportError as ie:
+        raise ImportError(
+            "the zoneinfo tz backend requires Python 3.9 or later"
+        ) from ie
+    return zoneinfo
+
+
+def _fixed_offset(name):
+    if name in _UTC_NAMES:
+        return datetime.timezone.utc
+    m = _FIXED_OFFSET_REGEX.fullmatch(name)
+    if m is None:
+        return None
+    sign, hh, mm = m.groups()
+    offset = datetime.timedelta(hours=int(hh), minutes=int(mm))
+    if offset >= datetime.timedelta(hours=24):
+        return None
+    return datetime.timezone(-offset if sign == "-" else offset)
+
+
+# (name, backend) -> tzinfo, filled under the lock so that every thread gets
+# the same tzinfo for a name
+_TZ_CACHE: Dict[Tuple[str, str], datetime.tzinfo] = {}
+_TZ_CACHE_LOCK = threading.Lock()
+
+
+def _gettz(name, backend):
+    key = (name, backend)
+    tz = _TZ_CACHE.get(key, None)
+    if tz is None:
+        with _TZ_CACHE_LOCK:
+            tz = _TZ_CACHE.get(key, None)
+            if tz is None:
+                tz = _lookup_tz(name, backend)
+                # names that do not resolve are not kept
+                if tz is not None:
+                    _TZ_CACHE[key] = tz
+    return tz
+
+
+def _lookup_tz(name, backend):
+    if backend == "dateutil":
+        # dateutil is slow to import, so is only imported once needed
+        import dateutil.tz  # type: ignore
+
+        return dateutil.tz.gettz(name)
+    tz = _fixed_offset(name)
+    if tz is None:
+        zoneinfo = _import_zoneinfo()
+        try:
+            tz = zoneinfo.ZoneInfo(name)
+        except (ValueError, zoneinfo.ZoneInfoNotFoundError):
+            return None
+    return tz
+
+
+def _resolve_tz(output_tz):
+    if isinstance(output_tz, str):
+        orig_tz = output_tz
+        output_tz = _gettz(output_tz, _TZ_BACKEND)
+        if output_tz is None:
+            raise DateTimeFormatTimeZoneError(
+                f"invalid tz specification {orig_tz}, could not convert to "
+                "tzinfo"
+            )
+    return output_tz
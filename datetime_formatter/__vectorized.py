@@ -0,0 +1,576 @@
+import bisect
+import datetime  # type: ignore
+import functools
+import math
+import os
+import re
+import struct
+
+from typing import Any, Dict, Tuple
+
+from .__calendar import _ALL_DAYS, _normalize_holidays
+from .__datetime import _DAYS_IN_MONTH
+from .__formats import _SUPPORTED_DATETIME_OUTPUT_FORMATS
+
+# strftime directives that are pure zero-padded numbers, and can therefore be
+# rendered for a whole array at once with integer arithmetic
+# directive -> (component, width)
+_NUMERIC_DIRECTIVES = {
+    "%Y": ("year", 4),
+    "%y": ("year2", 2),
+    "%m": ("month", 2),
+    "%d": ("day", 2),
+    "%j": ("yday", 3),
+    "%w": ("wday", 1),
+    "%H": ("hour", 2),
+    "%I": ("hour12", 2),
+    "%M": ("minute", 2),
+    "%S": ("second", 2),
+    "%f": ("microsecond", 6),
+}
+
+# translations that are plain timedelta64 arithmetic, translation -> unit
+_VECTOR_TRANSLATION_UNITS = {
+    "hours": "h",
+    "minutes": "m",
+    "seconds": "s",
+    "microseconds": "us",
+}
+_BUSINESS_PREFIX = "business_"
+# roughly how many years ``num`` of a unit spans, to pick the holidays needed
+_UNITS_PER_YEAR = {"days": 200, "weeks": 52, "months": 12, "years": 1}
+_ORDINAL_EPOCH = datetime.date(1970, 1, 1).toordinal()
+_UTC_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_ONE_US = datetime.timedelta(microseconds=1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+# id(tzinfo) -> (tzinfo, transitions, until, {year: (UTC instants, offsets)}),
+# see _tz_transitions and _tz_year_table;
+# keyed by id as dateutil tzinfos are not hashable, and holding the tzinfo so
+# its id is not reused
+_TZ_TABLES: Dict[int, Tuple[Any, ...]] = {}
+_TZ_TABLES_SIZE = 64
+
+_STRFTIME_TOKEN_REGEX = re.compile(r"%.|[^%]+")
+
+
+def _import_numpy():
+    try:
+        import numpy  # type: ignore
+    except ImportError as ie:
+        raise ImportError(
+            "numpy is required to format arrays of datetimes, install it "
+            "with `pip install numpy`"
+        ) from ie
+    return numpy
+
+
+def _array_layout(compiled):
+    """Flatten a compiled template into literals and numeric components
+
+    Returns a list of literal strings and ``(translation, component, width)``
+    tuples, or ``None`` if any field needs the per-element path (locale
+    dependent directives, callables, ...).
+    """
+    if not compiled.simple:
+        return None
+    layout = []
+    for literal, field in compiled.segments:
+        if literal:
+            layout.append(literal)
+        if field is None:
+            continue
+        translation = field.translation
+        stfmt = _SUPPORTED_DATETIME_OUTPUT_FORMATS[field.fmt]
+        if not isinstance(stfmt, str):
+            return None
+        for token in _STRFTIME_TOKEN_REGEX.findall(stfmt):
+            if not token.startswith("%"):
+                layout.append(token)
+            elif token in _NUMERIC_DIRECTIVES:
+                layout.append((translation,) + _NUMERIC_DIRECTIVES[token])
+            else:
+                return None
+    return layout
+
+
+_DATE_COMPONENTS = {"year", "year2", "month", "day", "yday", "wday"}
+_TIME_COMPONENTS = {"hour", "hour12", "minute", "second", "microsecond"}
+
+
+def _components(np, us, names):
+    """Split a ``datetime64[us]`` array into the integer fields in names"""
+    days = us.astype("datetime64[D]")
+    out = {}
+    if names & _DATE_COMPONENTS:
+        months = days.astype("datetime64[M]")
+        years = months.astype("datetime64[Y]")
+        out["year"] = years.astype(np.int64) + 1970
+        out["year2"] = out["year"] % 100
+        out["month"] = months.astype(np.int64) % 12 + 1
+        out["day"] = (days - months).astype(np.int64) + 1
+        out["yday"] = (days - years).astype(np.int64) + 1
+        # 1970-01-01 was a Thursday, i.e. %w == 4
+        out["wday"] = (days.astype(np.int64) + 4) % 7
+    if names & _TIME_COMPONENTS:
+        tod = (us - days).astype(np.int64)
+        out["hour"] = tod // 3600000000
+        out["hour12"] = (out["hour"] + 11) % 12 + 1
+        out["minute"] = tod // 60000000 % 60
+        out["second"] = tod // 1000000 % 60
+        out["microsecond"] = tod % 1000000
+    return out
+
+
+def _as_datetime_array(np, values):
+    """Unwrap array-likes into an ndarray without importing pandas
+
+    pandas ``Series`` (``.dt.tz``/``.values``) and ``DatetimeIndex``
+    (``.tz``/``.values``) hand over their ``datetime64`` data directly,
+    which pandas keeps in UTC when timezone aware; anything else goes through
+    ``__array__``.  Returns ``(array, tz)``.
+    """
+    if isinstance(values, np.ndarray):
+        return values, None
+    accessor = getattr(values, "dt", None)
+    tz = getattr(values if accessor is None else accessor, "tz", None)
+    data = getattr(values, "values", None)
+    if getattr(data, "dtype", None) is None:
+        data = values
+    return np.asarray(data), tz
+
+
+def _to_datetime64_us(np, values):
+    us = values.astype("datetime64[us]")
+    if np.isnat(us).any():
+        raise ValueError("invalid datetime NaT provided, could not process")
+    return us
+
+
+def _month_lengths(np, months):
+    return (
+        (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+    ).astype(np.int64)
+
+
+def _plain_translate_days(np, days, size, num):
+    """Vectorized ``_plain_translate`` of a ``datetime64[D]`` array"""
+    if size == "days":
+        return days + np.timedelta64(num, "D")
+    if size == "weeks":
+        return days + np.timedelta64(num * 7, "D")
+    months = days.astype("datetime64[M]")
+    day = (days - months).astype(np.int64) + 1
+    if size == "years":
+        target = months + np.timedelta64(num * 12, "M")
+        feb29 = (day == 29) & (months.astype(np.int64) % 12 == 1)
+        day = np.where(feb29, 28, day)
+    else:
+        target = months + np.timedelta64(num, "M")
+        # clamp to the shortest month passed through, as stepping would
+        if (day > 28).any():
+            direction = 1 if num > 0 else -1
+            for i in range(1, min(abs(num), 24) + 1):
+                day = np.minimum(
+                    day,
+                    _month_lengths(
+                        np, months + np.timedelta64(i * direction, "M")
+                    ),
+                )
+    return target.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+
+
+def _years_of(np, days):
+    return days.astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+def _busday_translate_days(np, days, size, num, holidays, weekends):
+    """Vectorized ``_inc_dt`` of a ``datetime64[D]`` array"""
+    direction = 1 if num > 0 else -1
+    weekmask = _ALL_DAYS if weekends else holidays.weekmask
+    kwargs = {"weekmask": weekmask}
+    years = _years_of(np, days)
+    first, last = int(years.min()), int(years.max())
+    pad = abs(num) // _UNITS_PER_YEAR[size] + 1
+    while True:
+        lo = max(first - pad, datetime.MINYEAR)
+        hi = min(last + pad, datetime.MAXYEAR)
+        kwargs["holidays"] = (
+            np.array(holidays.ordinals(lo, hi), dtype=np.int64)
+            - _ORDINAL_EPOCH
+        ).astype("datetime64[D]")
+        if size == "days":
+            # rolling onto a valid day first leaves the num-th valid day
+            # after (before) the original one
+            roll = "backward" if direction > 0 else "forward"
+            new = np.busday_offset(days, num, roll=roll, **kwargs)
+        else:
+            target = _plain_translate_days(np, days, size, num)
+            if size == "weeks":
+                roll = "forward" if direction > 0 else "backward"
+                new = np.busday_offset(target, 0, roll=roll, **kwargs)
+            else:
+                # search the landing month in the direction of travel, then
+                # the other way
+                roll = (
+                    "modifiedfollowing"
+                    if direction > 0
+                    else "modifiedpreceding"
+                )
+                new = np.busday_offset(target, 0, roll=roll, **kwargs)
+                moved = new.astype("datetime64[M]") != target.astype(
+                    "datetime64[M]"
+                )
+                if moved.any():
+                    raise ValueError(
+                        "cannot find valid date in the month of "
+                        f"{target[moved][0]} with holidays "
+                        f"{holidays.holidays} and weekmask {weekmask}"
+                    )
+        # holidays were only read for years lo..hi
+        years = _years_of(np, new)
+        if (years.min() >= lo or lo == datetime.MINYEAR) and (
+            years.max() <= hi or hi == datetime.MAXYEAR
+        ):
+            return new
+        pad *= 2
+
+
+def _utcoffset_us(tz, utc):
+    return utc.astimezone(tz).utcoffset() // _ONE_US
+
+
+def _zoneinfo_file(key):
+    """The TZif file on ``zoneinfo.TZPATH`` for ``key``, or ``None``"""
+    import zoneinfo  # type: ignore
+
+    for path in zoneinfo.TZPATH:
+        filename = os.path.join(path, *key.split("/"))
+        if os.path.isfile(filename):
+            return filename
+    return None
+
+
+def _tz_transitions(tz):
+    """UTC instants (seconds since the epoch) at which the backend of ``tz``
+    lists a transition, sorted, and the instant up to which these are all
+    of them, or ``None`` if it lists none
+
+    dateutil zone files and pytz zones carry their lists, and change with
+    no other rule; ``zoneinfo`` keeps its own private, so its zone file is
+    read again (from ``TZPATH``, zones from the tzdata package list none),
+    and the rule that follows the list in the file, if it has
+    daylight saving time, starts after the last transition.
+    """
+    trans = getattr(tz, "_trans_list_utc", None)
+    if trans is not None:
+        return list(trans), math.inf
+    trans = getattr(tz, "_utc_transition_times", None)
+    if trans is not None:
+        epoch = _UTC_EPOCH.replace(tzinfo=None)
+        return [(t - epoch) // _ONE_SECOND for t in trans], math.inf
+    key = getattr(tz, "key", None)
+    if type(tz).__module__ != "zoneinfo" or not isinstance(key, str):
+        return [], None
+    filename = _zoneinfo_file(key)
+    if filename is None:
+        return [], None
+    with open(filename, "rb") as f:
+        data = f.read()
+    try:
+        return _tzif_transitions(data)
+    except (ValueError, struct.error):
+        return [], None
+
+
+def _tzif_transitions(data):
+    """The transitions of a TZif zone file as for _tz_transitions, from its
+    64-bit data if it has any (version 2+)"""
+    if data[:4] != b"TZif":
+        raise ValueError("not a TZif file")
+    width, header = 4, 0
+    counts = struct.unpack(">6l", data[20:44])
+    if data[4:5] != b"\0":
+        # skip the 32-bit data to the second header
+        isutcnt, isstdcnt, leapcnt, timecnt, typecnt, charcnt = counts
+        header = (
+            44
+            + (timecnt * 5 + typecnt * 6 + charcnt + leapcnt * 8)
+            + isstdcnt
+            + isutcnt
+        )
+        if data[header : header + 4] != b"TZif":
+            raise ValueError("not a TZif file")
+        width = 8
+        counts = struct.unpack(">6l", data[header + 20 : header + 44])
+    timecnt = counts[3]
+    trans = list(
+        struct.unpack(
+            f">{timecnt}{'q' if width == 8 else 'l'}",
+            data[header + 44 : header + 44 + timecnt * width],
+        )
+    )
+    # version 2+ files end with a POSIX TZ string, which has daylight
+    # saving time rules after a comma
+    footer = data.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    if width == 8 and b"," in footer:
+        return trans, max(trans, default=None)
+    return trans, math.inf
+
+
+def _tz_year_table(tz, yyyy):
+    """UTC instants (microseconds since the epoch) at which the offset of
+    ``tz`` changes during ``yyyy``, starting with the first instant of the
+    year, and the offsets (microseconds) from each
+
+    Offsets are read from ``tz`` itself, at and a day either side of every
+    transition its backend lists (see _tz_transitions), and changes are
+    then narrowed down to the second.  Past the listed transitions, or with
+    a tzinfo that lists none, they are read a day apart instead, which
+    misses offsets that change and change back within a day.
+    """
+    entry = _TZ_TABLES.get(id(tz), None)
+    if entry is None or entry[0] is not tz:
+        if len(_TZ_TABLES) >= _TZ_TABLES_SIZE:
+            _TZ_TABLES.clear()
+        entry = (tz, *_tz_transitions(tz), {})
+        _TZ_TABLES[id(tz)] = entry
+    table = entry[3].get(yyyy, None)
+    if table is None:
+        start = datetime.datetime(yyyy, 1, 1, tzinfo=datetime.timezone.utc)
+        if yyyy < datetime.MAXYEAR:
+            days = (datetime.date(yyyy + 1, 1, 1) - start.date()).days
+        else:
+            days = 364
+        first = (start - _UTC_EPOCH) // _ONE_SECOND
+        end = first + days * 86400
+        transitions, until = entry[1:3]
+        if until is not None and end <= until:
+            # dateutil may change the offset a little after the transition
+            lo = bisect.bisect_left(transitions, first - 86400)
+            hi = bisect.bisect_right(transitions, end + 86400)
+            points = {end}
+            for t in transitions[lo:hi]:
+                points.update(
+                    p for p in (t - 86400, t, t + 86400) if first < p < end
+                )
+            points = sorted(points)
+        else:
+            points = range(first + 86400, end + 1, 86400)
+        table = _tz_changes(tz, first, points)
+        entry[3][yyyy] = table
+    return table
+
+
+def _tz_changes(tz, first, points):
+    """The instants and offsets of ``tz`` as in _tz_year_table, read at
+    ``first`` and each of the later ``points`` (seconds since the epoch),
+    assuming the offset changes at most once between two of them"""
+    instants = [first * 1000000]
+    offsets = [_utcoffset_us(tz, _UTC_EPOCH + first * _ONE_SECOND)]
+    prev = first
+    for point in points:
+        at = _UTC_EPOCH + point * _ONE_SECOND
+        offset = _utcoffset_us(tz, at)
+        if offset != offsets[-1]:
+            # the change is after the point before, bisect to the second
+            lo, hi = 0, point - prev
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _utcoffset_us(tz, at - mid * _ONE_SECOND) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+            instants.append((point - lo) * 1000000)
+            offsets.append(offset)
+        prev = point
+    return instants, offsets
+
+
+def _utc_offsets(np, us, tz):
+    """Offsets from UTC of ``tz`` at the UTC instants of a ``datetime64[us]``
+    array, as ``timedelta64[us]``, looked up in tables of the zone's
+    transitions so that ``us + offsets`` is the local time ``astimezone``
+    gives"""
+    fixed = tz.utcoffset(None)
+    if fixed is not None:
+        return np.full(len(us), fixed // _ONE_US, dtype="timedelta64[us]")
+    instants, offsets = [], []
+    for yyyy in np.unique(_years_of(np, us)).tolist():
+        table = _tz_year_table(tz, yyyy)
+        instants.extend(table[0])
+        offsets.extend(table[1])
+    i = np.searchsorted(
+        np.array(instants, dtype=np.int64), us.astype(np.int64), side="right"
+    )
+    return np.array(offsets, dtype="timedelta64[us]")[i - 1]
+
+
+def _busday_count_days(np, start, end, holidays):
+    """Vectorized ``_BusinessDayCalendar.count`` of ``datetime64[D]`` arrays,
+    skipping days outside ``holidays.weekmask``"""
+    years = np.concatenate(
+        [_years_of(np, start).reshape(-1), _years_of(np, end).reshape(-1)]
+    )
+    if not len(years):
+        return np.busday_count(start, end, weekmask=holidays.weekmask)
+    hols = (
+        np.array(
+            holidays.ordinals(int(years.min()), int(years.max())),
+            dtype=np.int64,
+        )
+        - _ORDINAL_EPOCH
+    ).astype("datetime64[D]")
+    return np.busday_count(
+        start, end, weekmask=holidays.weekmask, holidays=hols
+    )
+
+
+def _translate_datetime64(np, us, translation, holidays):
+    """``_DateTime.translate`` for a whole ``datetime64[us]`` array
+
+    ``holidays`` must already be normalized, see ``_normalize_holidays``.
+    """
+    size, num = translation
+    if num == 0 or not len(us):
+        return us
+    if size in _VECTOR_TRANSLATION_UNITS:
+        return us + np.timedelta64(
+            num, _VECTOR_TRANSLATION_UNITS[size]
+        ).astype("timedelta64[us]")
+    weekends = True
+    if size.startswith(_BUSINESS_PREFIX):
+        size = size[len(_BUSINESS_PREFIX) :]
+        weekends = False
+    days = us.astype("datetime64[D]")
+    if holidays.empty and weekends:
+        new = _plain_translate_days(np, days, size, num)
+    else:
+        new = _busday_translate_days(np, days, size, num, holidays, weekends)
+    years = _years_of(np, new)
+    if years.min() < datetime.MINYEAR or years.max() > datetime.MAXYEAR:
+        raise ValueError(
+            f"cannot translate by {translation}, ran out of calendar"
+        )
+    return new + (us - days)
+
+
+@functools.lru_cache(maxsize=None)
+def _digit_table(np, width):
+    """Code points of every zero-padded ``width`` digit number"""
+    return np.array(
+        [[ord(c) for c in f"{i:0{width}d}"] for i in range(10**width)],
+        dtype=np.uint32,
+    )
+
+
+def _write_digits(np, buf, pos, value, width):
+    # wide fields (i.e. microseconds) are written 3 digits at a time to keep
+    # the lookup tables small
+    while width > 4:
+        width -= 3
+        buf[:, pos + width : pos + width + 3] = np.take(
+            _digit_table(np, 3), value % 1000, axis=0
+        )
+        value = value // 1000
+    buf[:, pos : pos + width] = np.take(_digit_table(np, width), value, axis=0)
+
+
+def _render_datetime64(np, compiled, values, holidays=None, tz=None):
+    """Render a 1-d ``datetime64`` array through ``compiled``
+
+    With ``tz``, ``values`` are UTC and rendered in the local time of ``tz``.
+    Returns a fixed-width unicode array, or ``None`` when the template cannot
+    be rendered with integer arithmetic and the caller has to fall back to
+    formatting element by element.
+    """
+    layout = _array_layout(compiled)
+    if layout is None:
+        return None
+    us = _to_datetime64_us(np, values)
+    if tz is not None:
+        us = us + _utc_offsets(np, us, tz)
+    holidays = _normalize_holidays(holidays)
+
+    needed = {}
+    for item in layout:
+        if not isinstance(item, str):
+            needed.setdefault(item[0], set()).add(item[1])
+    components = {}
+    for translation, names in needed.items():
+        shifted = us
+        if translation is not None:
+            shifted = _translate_datetime64(np, us, translation, holidays)
+        fields = _components(np, shifted, names)
+        year = fields.get("year", None)
+        # strftime does not zero-pad %Y outside of 4 digit years
+        if "year" in names and len(year):
+            if year.min() < 1000 or year.max() > 9999:
+                return None
+        components[translation] = fields
+
+    width = sum(
+        len(item) if isinstance(item, str) else item[2] for item in layout
+    )
+    buf = np.empty((len(us), width), dtype=np.uint32)
+    pos = 0
+    for item in layout:
+        if isinstance(item, str):
+            buf[:, pos : pos + len(item)] = [ord(c) for c in item]
+            pos += len(item)
+            continue
+        translation, component, w = item
+        _write_digits(np, buf, pos, components[translation][component], w)
+        pos += w
+    return buf.view(np.dtype(("U", width))).reshape(len(us))
+
+
+# integer input styles the array decoder understands, style -> datetime64 unit
+_INT_ARRAY_FORMATS = {"YYYYMMDD": "D", "YYYYMM": "D", "HHMMSS": "s"}
+
+
+def _valid_dates(np, yyyy, mm, dd):
+    # vectorized _check_date, i.e. including its 1000-3000 year bounds
+    valid = (yyyy >= 1000) & (yyyy <= 3000) & (mm >= 1) & (mm <= 12)
+    leap = (yyyy % 4 == 0) & ((yyyy % 100 != 0) | (yyyy % 400 == 0))
+    days = np.asarray(_DAYS_IN_MONTH)[np.where(valid, mm, 0)]
+    days = days + ((mm == 2) & leap)
+    return valid & (dd >= 1) & (dd <= days)
+
+
+def _decode_int_array(np, values, input_format):
+    """Decode an integer array laid out as ``input_format``
+
+    Returns ``(datetimes, valid)``, with ``NaT`` wherever ``valid`` is False.
+    """
+    if input_format not in _INT_ARRAY_FORMATS:
+        raise ValueError(
+            f"unsupported input_format {input_format} for integer arrays, "
+            "must be one of: " + ", ".join(_INT_ARRAY_FORMATS)
+        )
+    values = np.asarray(values)
+    if values.dtype.kind not in "iu":
+        raise ValueError(
+            f"expected an integer array, got dtype {values.dtype} instead"
+        )
+    values = values.astype(np.int64)
+    unit = _INT_ARRAY_FORMATS[input_format]
+    if input_format == "HHMMSS":
+        hh, rest = np.divmod(values, 10000)
+        mm, ss = np.divmod(rest, 100)
+        # vectorized _check_time
+        valid = (values >= 0) & (hh <= 23) & (mm <= 59) & (ss <= 59)
+        # like the scalar parsers, times land on the current date
+        today = np.datetime64(datetime.date.today(), "s")
+        out = today + (hh * 3600 + mm * 60 + ss).astype("timedelta64[s]")
+    else:
+        dd = np.ones_like(values)
+        if input_format == "YYYYMMDD":
+            values, dd = np.divmod(values, 100)
+        yyyy, mm = np.divmod(values, 100)
+        valid = _valid_dates(np, yyyy, mm, dd)
+        months = np.where(valid, (yyyy - 1970) * 12 + mm - 1, 0)
+        out = months.astype("datetime64[M]").astype("datetime64[D]")
+        out = out + np.where(valid, dd - 1, 0).astype("timedelta64[D]")
+    out[~valid] = np.datetime64("NaT", unit)
+    return out, valid
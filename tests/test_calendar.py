@@ -0,0 +1,284 @@
+import pytest
+
+import datetime  # type: ignore
+
+import holidays
+
+from datetime_formatter import (
+    BusinessCalendar,
+    HolidayCalendar,
+    business_day_range,
+    business_days_between,
+    dtfmt,
+    dtformat,
+    dtformat_array,
+    dtformat_many,
+    dttranslate_array,
+)
+from datetime_formatter import __calendar
+from datetime_formatter.__calendar import _normalize_holidays
+from datetime_formatter.__datetime import _DateTime
+from datetime_formatter.__formats import _SUPPORTED_TRANSLATION_SIZES
+from datetime_formatter.__template import _parse_translation
+
+
+def test_holiday_calendar_from_holidays():
+    calendar = HolidayCalendar.from_holidays(holidays.US(), 2005, 2010)
+    us = holidays.US(years=range(2005, 2011))
+    assert list(calendar) == sorted(us)
+    assert len(calendar) == len(us)
+    assert datetime.date(2007, 1, 1) in calendar
+    assert "2007-01-01" in calendar
+    assert datetime.datetime(2007, 1, 1, 12) in calendar
+    assert datetime.date(2007, 1, 2) not in calendar
+    assert "2007-1-01" not in calendar
+    assert 20070101 not in calendar
+    assert datetime.date(2011, 1, 1) not in calendar
+
+    custom = HolidayCalendar.from_holidays(
+        ["2007-01-02", datetime.date(2006, 12, 28), "2012-01-02"], 2006, 2007
+    )
+    assert list(custom) == [
+        datetime.date(2006, 12, 28),
+        datetime.date(2007, 1, 2),
+    ]
+    assert list(HolidayCalendar.from_holidays(custom, 2007, 2007)) == [
+        datetime.date(2007, 1, 2)
+    ]
+
+
+def test_holiday_calendar_save_load(tmp_path):
+    path = tmp_path / "us.hol"
+    HolidayCalendar.from_holidays(holidays.US(), 1990, 2030).save(path)
+    calendar = HolidayCalendar.load(path)
+    assert (calendar.first_year, calendar.last_year) == (1990, 2030)
+    assert list(calendar) == sorted(holidays.US(years=range(1990, 2031)))
+
+    # same results as the holidays it was built from
+    for fmt in ["DATE-P2B", "DATE-M1B", "DATE-P1P", "DATE-P3F", "DATE-P40B"]:
+        assert dtfmt(20061229, fmt, holidays=calendar) == dtfmt(
+            20061229, fmt, holidays=holidays.US()
+        )
+    values = [
+        datetime.date(2020, 12, 1) + datetime.timedelta(d) for d in range(60)
+    ]
+    assert dtformat_many(values, "DATE-P1B", holidays=calendar) == (
+        dtformat_many(values, "DATE-P1B", holidays=holidays.US())
+    )
+    # no holidays outside the years it covers
+    assert dtfmt(20311231, "DATE-P1B", holidays=calendar) == "2032-01-01"
+
+    empty = tmp_path / "empty.hol"
+    HolidayCalendar.from_holidays({}, 2000, 2000).save(empty)
+    assert len(HolidayCalendar.load(empty)) == 0
+
+    for content in [b"", b"DTFMTHOL", path.read_bytes()[:-1]]:
+        bad = tmp_path / "bad.hol"
+        bad.write_bytes(content)
+        with pytest.raises(ValueError):
+            HolidayCalendar.load(bad)
+
+
+def _reference(dt, size, num, holidays, weekmask):
+    # one day at a time, as translations used to
+    def valid(d):
+        return weekmask[d.weekday()] == "1" and d.date() not in holidays
+
+    direction = 1 if num > 0 else -1
+    if size == "B":
+        for _ in range(abs(num)):
+            dt += datetime.timedelta(days=direction)
+            while not valid(dt):
+                dt += datetime.timedelta(days=direction)
+        return dt
+    if size == "F":
+        dt += datetime.timedelta(weeks=num)
+        while not valid(dt):
+            dt += datetime.timedelta(days=direction)
+        return dt
+    months = num if size == "P" else num * 12
+    target = _DateTime(dt).translate("months", months)
+    if size == "K":
+        target = _DateTime(dt).translate("years", num)
+    for search in (direction, -direction):
+        d = target
+        while d.month == target.month:
+            if valid(d):
+                return d
+            d += datetime.timedelta(days=search)
+    raise ValueError("no valid day")
+
+
+@pytest.mark.parametrize("weekmask", ["1111001", "0111110", "1010100"])
+def test_business_calendar_weekmask(weekmask):
+    hols = {
+        datetime.date(2021, 3, 1) + datetime.timedelta(d) for d in range(9)
+    }
+    start = datetime.datetime(2021, 2, 24, 10, 30)
+    for holidays_ in [set(), hols]:
+        calendar = BusinessCalendar(holidays_ or None, weekmask)
+        for d in range(14):
+            dt = start + datetime.timedelta(days=d)
+            for size in "BFPK":
+                for num in [-30, -2, -1, 1, 2, 30]:
+                    assert _DateTime(dt).translate(
+                        _SUPPORTED_TRANSLATION_SIZES[size], num, calendar
+                    ) == _reference(dt, size, num, holidays_, weekmask), (
+                        dt,
+                        size,
+                        num,
+                    )
+            assert calendar.is_business_day(dt.date()) == (
+                weekmask[dt.weekday()] == "1" and dt.date() not in holidays_
+            )
+        # plain sizes only skip holidays
+        assert dtfmt(20210228, "DATE-P1D", holidays=calendar) == (
+            "2021-03-10" if holidays_ else "2021-03-01"
+        )
+
+
+def test_business_calendar_arrays():
+    np = pytest.importorskip("numpy")
+    calendar = BusinessCalendar(holidays.AE(), [1, 1, 1, 1, 0, 0, 1])
+    assert calendar.weekmask == "1111001"
+    days = np.datetime64("2021-01-01") + np.arange(400)
+    for translation in ["P1B", "M3B", "P2F", "M1P", "P1K"]:
+        trans = _parse_translation(translation, translation)
+        assert dttranslate_array(days, translation, calendar).tolist() == [
+            _DateTime(d).translate(*trans, holidays=calendar)
+            for d in days.tolist()
+        ]
+    assert dtformat_array(
+        days[:3], "DATE-P1B", holidays=calendar
+    ).tolist() == [
+        "2021-01-03",
+        "2021-01-03",
+        "2021-01-04",
+    ]
+
+    for weekmask in ["111110", "1111102", "0000000", [1] * 8]:
+        with pytest.raises(ValueError):
+            BusinessCalendar(weekmask=weekmask)
+
+
+def test_normalize_holidays_cached(monkeypatch):
+    hols = frozenset(["2007-01-01"])
+    normalized = _normalize_holidays(hols)
+    assert _normalize_holidays(hols) is normalized
+    dt = _DateTime(20061229)
+    assert dt.translate("business_days", 1, hols) == datetime.datetime(
+        2007, 1, 2
+    )
+    # translations reuse the business day tables of the cached form
+    calendar = normalized.calendar(False)
+    assert dt.translate("business_days", 2, hols) == datetime.datetime(
+        2007, 1, 3
+    )
+    assert normalized.calendar(False) is calendar
+
+    saved = HolidayCalendar.from_holidays(hols, 2007, 2007)
+    assert _normalize_holidays(saved) is _normalize_holidays(saved)
+
+    # anything that may change is normalized afresh, and not kept
+    for source in [["2007-01-01"], {"2007-01-01"}, holidays.US()]:
+        assert _normalize_holidays(source) is not _normalize_holidays(source)
+        assert all(
+            entry[0] is not source
+            for entry in (__calendar._NORMALIZED.values())
+        )
+
+    monkeypatch.setattr(__calendar, "_NORMALIZED", {})
+    monkeypatch.setattr(__calendar, "_NORMALIZED_SIZE", 2)
+    sources = [frozenset([f"2007-01-0{d}"]) for d in range(1, 6)]
+    for source in sources:
+        _normalize_holidays(source)
+        assert len(__calendar._NORMALIZED) <= 2
+
+
+def test_normalize_holidays_mutated():
+    # changed in place, even at the same length, the holidays are read again
+    hols = {"2024-01-02": "x"}
+    assert dtformat("2024-01-01", "%DATE-P1B%", holidays=hols) == "2024-01-03"
+    del hols["2024-01-02"]
+    hols["2024-01-03"] = "y"
+    assert dtformat("2024-01-01", "%DATE-P1B%", holidays=hols) == "2024-01-02"
+    assert dtformat_many(["2024-01-01"], "%DATE-P1B%", holidays=hols) == [
+        "2024-01-02"
+    ]
+    hols["2024-01-02"] = "x"
+    assert business_days_between("2024-01-01", "2024-01-05", hols) == 2
+
+
+def test_business_calendar_long_offsets():
+    calendar = BusinessCalendar(
+        ["2021-05-31", "2050-12-26", "2735-07-01", "1950-01-02"], "1111001"
+    )
+    start = datetime.datetime(2021, 5, 27)
+    for num in [1, -1, 300, -300, 26100, -26100, 260000]:
+        new = _DateTime(start).translate("business_days", num, calendar)
+        assert business_days_between(start, new, calendar) == num, num
+    for num in [3000000, -600000]:
+        with pytest.raises(ValueError):
+            _DateTime(start).translate("business_days", num, calendar)
+
+    # years far apart are counted separately, not with every year between
+    hols = holidays.US()
+    calendar = BusinessCalendar(hols)
+    for dt in [start, datetime.datetime(1605, 11, 5), start]:
+        _DateTime(dt).translate("business_days", 600, calendar)
+    assert len(hols.years) < 20
+
+
+def test_business_days_between():
+    calendar = BusinessCalendar(holidays.US(), "1111001")
+    start = datetime.date(2020, 12, 20)
+    days = [start + datetime.timedelta(d) for d in range(800)]
+    business = [d for d in days if calendar.is_business_day(d)]
+    for a in days[::37] + [days[-1]]:
+        for b in days[::29] + [a]:
+            expected = [d for d in business if a <= d < b]
+            assert business_day_range(a, b, calendar) == expected
+            if a <= b:
+                count = len(expected)
+            else:
+                count = -len([d for d in business if b < d <= a])
+            assert business_days_between(a, b, calendar) == count, (a, b)
+
+    # any input dtformat takes, weekdays by default
+    assert business_days_between(20061229, "2007-01-08") == 6
+    assert business_days_between(20061229, 20070108, {"2007-01-01": ""}) == 5
+    assert business_day_range(
+        datetime.datetime(2006, 12, 29, 12), 20070103, ["2007-01-01"]
+    ) == [datetime.date(2006, 12, 29), datetime.date(2007, 1, 2)]
+    assert business_days_between(20070105, 20070106) == 1
+    assert business_days_between(20070106, 20070105) == 0
+    assert business_day_range(20070108, 20070101) == []
+
+    # long spans and the ends of the calendar, as numpy.busday_count
+    assert business_days_between(datetime.date.min, datetime.date.max) == (
+        2608614
+    )
+    assert business_days_between(datetime.date.max, datetime.date.min) == (
+        -2608614
+    )
+    assert business_days_between(20000103, 20100104, holidays.US()) == 2510
+
+
+def test_business_days_between_arrays():
+    np = pytest.importorskip("numpy")
+    calendar = BusinessCalendar(holidays.AE(), "1111001")
+    starts = np.datetime64("2020-12-20") + np.arange(0, 798, 7)
+    ends = np.datetime64("2021-06-01T12:00") + np.arange(len(starts)) * 5
+    counts = business_days_between(starts, ends, calendar)
+    assert counts.tolist() == [
+        business_days_between(a, b, calendar)
+        for a, b in zip(starts.tolist(), ends.tolist())
+    ]
+    assert business_days_between(starts.reshape(2, -1), 20210601).shape == (
+        2,
+        len(starts) // 2,
+    )
+    assert business_days_between(
+        20210101, np.array(["2021-01-08", 20210111], dtype=object)
+    ).tolist() == [5, 6]
+    assert business_days_between(starts[:0], starts[:0]).tolist() == []
@@ -2,6 +2,7 @@ import pytest
 
 from datetime_formatter.__datetime import (
     _int_to_date,
+    _int_to_month,
     _string_to_date,
     _check_date,
     _check_month,
@@ -22,6 +23,8 @@ def test_check_month():
 
 
 def test_check_date():
+    with pytest.raises(ValueError):
+        _check_date(2000, 13, 1)
     _check_date(2000, 2, 29)
     _check_date(1999, 2, 28)
     _check_date(2000, 4, 30)
@@ -39,6 +42,14 @@ def test_check_date():
         _check_date(2020, 5, 32)
 
 
+def test_int_to_month():
+    assert _int_to_month(200510) == datetime.date(2005, 10, 1)
+    with pytest.raises(ValueError):
+        _int_to_month(300101)
+    with pytest.raises(ValueError):
+        _int_to_month(100000)
+
+
 def test_int_to_date():
     assert _int_to_date(20050102) == datetime.date(2005, 1, 2)
     assert _int_to_date(200510) == datetime.date(2005, 10, 1)
@@ -1,12 +1,22 @@
 import pytest
+import copy
 import datetime  # type: ignore
+import pickle
 from dateutil.relativedelta import relativedelta as rd  # type: ignore
 import holidays
 
+from datetime_formatter import (
+    disable_parse_cache,
+    enable_parse_cache,
+    parse_cache_info,
+)
+from datetime_formatter import __datetime
 from datetime_formatter.__datetime import (
     _int_to_datetime,
+    _parse_with_format,
     _string_to_datetime,
     _DateTime,
+    _TranslationCache,
 )
 
 
@@ -54,6 +64,44 @@ def test_string_to_datetime_date():
         _string_to_datetime("101")
 
 
+def test_string_to_datetime_errors():
+    # valid int() literals that are not plain digits
+    assert _string_to_datetime(" 20050102 ") == datetime.datetime(2005, 1, 2)
+    assert _string_to_datetime("2005_0102") == datetime.datetime(2005, 1, 2)
+
+    for s in [
+        "01-02-ab",
+        "abcd-01-02",
+        "2005/ab/02",
+        "2005/01/ab",
+        "2005/13/01",
+        "2005/02/30",
+        "01-02-0000",
+        "12:30:00.ab",
+        "ab:30",
+        "12:ab",
+        "12:30:ab",
+    ]:
+        with pytest.raises(ValueError):
+            _string_to_datetime(s)
+
+    # messages are only built once every interpretation failed, and
+    # describe all of them
+    with pytest.raises(ValueError) as ve:
+        _string_to_datetime("12:30:ab")
+    assert "could not convert to either time or date" in str(ve.value)
+    assert "invalid literal for int() with base 10: 'ab'" in str(ve.value)
+    with pytest.raises(ValueError) as ve:
+        _int_to_datetime(206132)
+    assert str(ve.value) == (
+        "Error(s): could not convert to either date or time.\n"
+        "Conversion to date resulted in following error:\n"
+        "\tinteger date 206132 smaller than min allowed (10000000)\n"
+        "Conversion to time resulted in following error:\n"
+        "\tinvalid minute 61 detected using HHMMSS format"
+    )
+
+
 def _combine_time(t):
     return datetime.datetime.combine(
         datetime.datetime.today(),
@@ -77,6 +125,9 @@ def test_string_to_datetime_time():
     assert _string_to_datetime("8:47") == _combine_time(
         datetime.time(8, 47, 0)
     )
+    assert _string_to_datetime("0830") == _combine_time(
+        datetime.time(8, 30, 0)
+    )
     assert _string_to_datetime("13:15:00.999999") == _combine_time(
         datetime.time(13, 15, 0, 999999)
     )
@@ -97,16 +148,136 @@ def test_string_to_datetime_combined():
     assert _string_to_datetime("2005-03-01 83011") == (
         datetime.datetime(2005, 3, 1, 8, 30, 11)
     )
+    assert _string_to_datetime("03/01/2005 08:03:30.5") == (
+        datetime.datetime(2005, 3, 1, 8, 3, 30, 500000)
+    )
+    assert _string_to_datetime("25-10-05  8:03") == (
+        datetime.datetime(2005, 10, 25, 8, 3)
+    )
     with pytest.raises(ValueError):
         _string_to_datetime("2005-03 08:03:30")
     with pytest.raises(ValueError):
         _string_to_datetime("2005-03-01 25:03:30")
+    with pytest.raises(ValueError):
+        _string_to_datetime("25/10/2005 25:03:30")
+    with pytest.raises(ValueError):
+        _string_to_datetime("02/30/2005 08:03:30")
+    with pytest.raises(ValueError):
+        _string_to_datetime("02/03/200 08:03:30")
+    with pytest.raises(ValueError):
+        _string_to_datetime("8:3")
     with pytest.raises(ValueError):
         _string_to_datetime("113161")
     with pytest.raises(ValueError):
         _string_to_datetime("193161")
 
 
+def test_parse_with_format():
+    d = datetime.datetime(2005, 3, 1)
+    for s, fmt in [
+        ("2005-03-01", "YYYY-MM-DD"),
+        ("2005/3/1", "YYYY/MM/DD"),
+        ("03-01-2005", "MM-DD-YYYY"),
+        ("01/03/2005", "DD/MM/YYYY"),
+        ("3/1/05", "MM/DD/YY"),
+        ("20050301", "YYYYMMDD"),
+        (20050301, "YYYYMMDD"),
+        (200503, "YYYYMM"),
+        ("2005.03.01", "%Y.%m.%d"),
+    ]:
+        assert _parse_with_format(s, fmt) == d, (s, fmt)
+    assert _parse_with_format("03/01/66", "MM/DD/YY").year == 1966
+    assert _parse_with_format("08:30:15.5", "HH:MM:SS[.ZZZ]") == (
+        _combine_time(datetime.time(8, 30, 15, 500000))
+    )
+    assert _parse_with_format("8:30", "HH:MM") == (
+        _combine_time(datetime.time(8, 30))
+    )
+    assert _parse_with_format(83015, "HHMMSS") == (
+        _combine_time(datetime.time(8, 30, 15))
+    )
+    assert _parse_with_format("083015", "HHMMSS") == (
+        _combine_time(datetime.time(8, 30, 15))
+    )
+    # no guessing, the hint is taken at its word
+    assert _parse_with_format("01/03/2005", "MM/DD/YYYY") == (
+        datetime.datetime(2005, 1, 3)
+    )
+    assert _DateTime("01/03/2005", "DD/MM/YYYY").dt == d
+    assert _DateTime(d, "DD/MM/YYYY").dt == d
+
+    for s, fmt in [
+        ("2005-03-01", "YYYY/MM/DD"),
+        ("13/01/2005", "MM/DD/YYYY"),
+        ("2005-02-30", "YYYY-MM-DD"),
+        ("2005-03-01 08:30", "YYYY-MM-DD"),
+        ("25:00", "HH:MM"),
+        ("8:30:15", "HH:MM"),
+        (20051301, "YYYYMMDD"),
+        (30010101, "YYYYMMDD"),
+        ("09990101", "YYYYMMDD"),
+        (300101, "YYYYMM"),
+        (2005030, "YYYYMMDD"),
+        ("2005031", "YYYYMMDD"),
+        ("2005031", "HHMMSS"),
+        (236000, "HHMMSS"),
+        (83075, "HHMMSS"),
+        (-200503, "YYYYMM"),
+    ]:
+        with pytest.raises(ValueError, match="using input_format"):
+            _parse_with_format(s, fmt)
+    with pytest.raises(ValueError, match="does not match format"):
+        _parse_with_format("2005-03-01", "%Y.%m.%d")
+    with pytest.raises(ValueError, match="unsupported input_format"):
+        _parse_with_format("2005-03-01", "YYYY.MM.DD")
+
+
+@pytest.fixture
+def parse_cache():
+    enable_parse_cache(maxsize=4)
+    yield
+    disable_parse_cache()
+
+
+def test_parse_cache(parse_cache):
+    assert parse_cache_info().currsize == 0
+    assert _string_to_datetime("03/01/2005") == datetime.datetime(2005, 3, 1)
+    assert _string_to_datetime("03/01/2005") == datetime.datetime(2005, 3, 1)
+    assert _int_to_datetime(20050301) == datetime.datetime(2005, 3, 1)
+    info = parse_cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 2, 4)
+
+    # ISO strings are parsed directly, without going through the cache
+    assert _string_to_datetime("2005-03-01") == datetime.datetime(2005, 3, 1)
+    assert parse_cache_info().misses == 2
+
+    # failures are cached as well, and raise the same error
+    with pytest.raises(ValueError) as first:
+        _string_to_datetime("2005-03 08:03:30")
+    with pytest.raises(ValueError) as second:
+        _string_to_datetime("2005-03 08:03:30")
+    assert str(first.value) == str(second.value)
+    assert parse_cache_info().hits == 2
+
+    # time-only inputs always land on the current date
+    assert _string_to_datetime("08:30:15") == _combine_time(
+        datetime.time(8, 30, 15)
+    )
+    assert _int_to_datetime(83015) == _combine_time(datetime.time(8, 30, 15))
+    assert _string_to_datetime("08:30:15") == _combine_time(
+        datetime.time(8, 30, 15)
+    )
+
+    # bounded LRU
+    assert parse_cache_info().currsize == 4
+    test_string_to_datetime_date()
+    assert parse_cache_info().currsize == 4
+
+    disable_parse_cache()
+    assert parse_cache_info() is None
+    assert _string_to_datetime("2005-03-01") == datetime.datetime(2005, 3, 1)
+
+
 class _hastodt:
     def __init__(self, dt):
         self.dt = dt
@@ -137,15 +308,175 @@ def test_datetime_class():
     assert _DateTime(
         _hastodt(datetime.datetime(2005, 3, 1))
     ).dt == datetime.datetime(2005, 3, 1)
+    # datetime subclasses (e.g. pandas Timestamp) are kept as they are
+    sub = _datetime_subclass(2005, 3, 1)
+    assert _DateTime(sub).dt is sub
+    dt = _DateTime._from_datetime(sub)
+    assert dt.dt is sub and _DateTime(dt) == dt
 
     with pytest.raises(ValueError):
         _DateTime(3.0)
 
 
+def test_datetime_class_copy():
+    dt = _DateTime("2005-03-01 08:30:10")
+    cache = _TranslationCache._from_datetime(dt.dt)
+    cache.translate("days", 1)
+    for original in (dt, cache):
+        for copied in (
+            pickle.loads(pickle.dumps(original)),
+            copy.copy(original),
+            copy.deepcopy(original),
+        ):
+            assert type(copied) is type(original)
+            assert copied == original
+            with pytest.raises(AttributeError):
+                copied.dt = datetime.datetime(2005, 3, 2)
+    # copied translation caches start empty
+    assert copy.copy(cache)._translated == {}
+
+
+class _datetime_subclass(datetime.datetime):
+    pass
+
+
 def mkdt(*args):
     return datetime.datetime(*args)
 
 
+def test_datetime_translate_business_calendar():
+    def mkdt(y, m, d):
+        return datetime.datetime(y, m, d, 9, 30)
+
+    def valid(d, holidays):
+        return d.isoweekday() < 6 and d.strftime("%Y-%m-%d") not in holidays
+
+    def step(dt, num, holidays):
+        # reference, one day at a time
+        direction = 1 if num > 0 else -1
+        for _ in range(abs(num)):
+            dt += datetime.timedelta(days=direction)
+            while not valid(dt, holidays):
+                dt += datetime.timedelta(days=direction)
+        return dt
+
+    # more than a year of business days, keys that can't be a
+    # strftime("%Y-%m-%d") result never match
+    test_holidays = {
+        "2021-05-31": "Memorial Day",
+        "2021-07-05": "Independence Day",
+        "2021-7-06": "ignored",
+        "2021-02-30": "ignored",
+        "02021-06-07": "ignored",
+        "not a date": "ignored",
+        20211125: "ignored",
+    }
+    start = _DateTime(mkdt(2021, 5, 27))
+    for num in [1, 2, 250, 400, -1, -250, -400]:
+        assert start.translate("business_days", num, test_holidays) == step(
+            start.dt, num, test_holidays
+        )
+
+    # runs of more than 35 holidays are skipped in one go
+    begin = datetime.date(2021, 6, 2)
+    for n in range(60):
+        day = begin + datetime.timedelta(days=n)
+        test_holidays[day.strftime("%Y-%m-%d")] = "Fake Holiday"
+    assert start.translate("business_days", 3, test_holidays) == mkdt(
+        2021, 8, 2
+    )
+    assert _DateTime(mkdt(2021, 8, 2)).translate(
+        "business_days", -1, test_holidays
+    ) == mkdt(2021, 6, 1)
+    assert start.translate("days", 5, test_holidays) == mkdt(2021, 8, 1)
+    assert start.translate("business_weeks", 1, test_holidays) == mkdt(
+        2021, 8, 2
+    )
+    # months land as close as possible within the target month
+    assert start.translate("business_months", 1, test_holidays) == mkdt(
+        2021, 6, 1
+    )
+    assert _DateTime(mkdt(2021, 7, 2)).translate(
+        "months", -1, test_holidays
+    ) == mkdt(2021, 6, 1)
+    test_holidays["2021-06-01"] = "Fake Holiday"
+    with pytest.raises(ValueError):
+        start.translate("business_months", 1, test_holidays)
+
+    # HolidayBase populates years as they are needed
+    us = holidays.US()
+    assert _DateTime(mkdt(2021, 12, 23)).translate(
+        "business_days", 2, us
+    ) == mkdt(2021, 12, 28)
+    assert _DateTime(mkdt(2022, 1, 3)).translate(
+        "business_days", -1, us
+    ) == mkdt(2021, 12, 30)
+    assert _DateTime(mkdt(2021, 6, 30)).translate(
+        "business_days", 3, us
+    ) == mkdt(2021, 7, 6)
+
+    # many years of holidays, skipped a year at a time
+    for num in [3000, -3000]:
+        assert start.translate("business_days", num, test_holidays) == step(
+            start.dt, num, test_holidays
+        )
+
+    # running off the end of the calendar
+    for dt, num, test_holidays in [
+        (datetime.datetime(9999, 12, 30), 5, None),
+        (datetime.datetime(9999, 12, 30), 5, {"2021-01-01": "x"}),
+        (datetime.datetime(1, 1, 3), -5, None),
+        (datetime.datetime(1, 1, 3), -5, {"2021-01-01": "x"}),
+    ]:
+        with pytest.raises(ValueError):
+            _DateTime(dt).translate("business_days", num, test_holidays)
+
+
+def test_datetime_translate_closed_form(monkeypatch):
+    def step(dt, inc, num):
+        # reference, one unit at a time
+        for _ in range(abs(num)):
+            dt += rd(**{inc: 1 if num > 0 else -1})
+        return dt
+
+    for start in [
+        datetime.datetime(2020, 2, 29, 13, 45),
+        datetime.datetime(2021, 1, 31),
+        datetime.datetime(2021, 3, 30),
+        datetime.datetime(2021, 12, 31),
+        datetime.datetime(2021, 5, 15, tzinfo=datetime.timezone.utc),
+    ]:
+        for inc in ["days", "weeks", "months", "years"]:
+            for num in [-50, -25, -13, -12, -1, 1, 2, 11, 12, 13, 24, 25, 49]:
+                assert _DateTime(start).translate(inc, num) == step(
+                    start, inc, num
+                ), (start, inc, num)
+
+    # large translations take one step, not one per unit
+    calls = []
+
+    def counting_rd(*args, **kwargs):
+        calls.append(kwargs)
+        return rd(*args, **kwargs)
+
+    monkeypatch.setattr(__datetime, "_relativedelta", counting_rd)
+    s20210131 = _DateTime(20210131)
+    assert s20210131.translate("months", 1200) == datetime.datetime(
+        2121, 1, 28
+    )
+    assert s20210131.translate("years", -1000) == datetime.datetime(
+        1021, 1, 31
+    )
+    assert s20210131.translate("days", 3650) == datetime.datetime(2031, 1, 29)
+    assert s20210131.translate("business_months", 1200) == (
+        datetime.datetime(2121, 1, 28)
+    )
+    assert s20210131.translate("business_days", 2610) == (
+        datetime.datetime(2031, 1, 31)
+    )
+    assert len(calls) == 3
+
+
 def test_datetime_translate_dates():
     s20210301 = _DateTime(20210301)  # not a weekend or holidays
     s20210306 = _DateTime(20210306)  # weekend (sat)
@@ -1,15 +1,27 @@
 import pytest
 
+import attr  # type: ignore
+import copy
+import os
+import pickle
+import subprocess
+import sys
+
 from datetime import date, datetime, timezone  # type: ignore
 
 from datetime_formatter import (
     dtfmt,
     dtformat,
+    dtformat_array,
+    dtformat_many,
+    dtformat_templates,
     DateTimeFormatter,
+    DateTimeStreamFormatter,
     DateTimeFormatTimeZoneError,
     DateTimeFormatFieldError,
     DateTimeFormatTranslationError,
 )
+from datetime_formatter.__datetime import _DateTime
 from datetime_formatter.__formats import _SUPPORTED_DATETIME_OUTPUT_FORMATS
 
 import holidays
@@ -132,3 +144,337 @@ def test_dtfmt():
 
     test_holiday = {"2007-01-01": "NYD"}
     assert dtfmt(20061229, "DATE-P2B", holidays=test_holiday) == "2007-01-03"
+
+
+def test_holiday_inputs():
+    for test_holiday in [
+        {"2007-01-01": "NYD"},
+        {date(2007, 1, 1): "NYD"},
+        ["2007-01-01"],
+        {date(2007, 1, 1), "not a date", 20070101},
+        (datetime(2007, 1, 1, 12) for _ in range(1)),
+        holidays.US(),
+    ]:
+        assert dtfmt(20061229, "DATE-P2B", holidays=test_holiday) == (
+            "2007-01-03"
+        )
+    assert dtfmt(20061229, "DATE-P2B", holidays=[]) == "2007-01-02"
+    assert dtfmt(20061229, "DATE-P2D", holidays=[]) == "2006-12-31"
+
+    # holidays are normalized once per formatter, and again when replaced
+    dtf = DateTimeFormatter(20061229, ["2007-01-01"])
+    normalized = dtf._normalized
+    assert dtf.format("%DATE-P2B%") == "2007-01-03"
+    assert dtf._normalized is normalized
+    assert dtf.rebind(20061228)._normalized is normalized
+    dtf = attr.evolve(dtf, holidays=["2007-01-02"])
+    assert dtf.format("%DATE-P2B%") == "2007-01-03"
+    assert attr.evolve(dtf, holidays=None).format("%DATE-P2B%") == (
+        "2007-01-02"
+    )
+
+    # only templates with translations read the holidays
+    class Unreadable:
+        def __len__(self):
+            return 1
+
+        def __iter__(self):
+            raise AssertionError("holidays read")
+
+    assert dtfmt(20061229, "%DATE% %HH%", holidays=Unreadable()) == (
+        "2006-12-29 00"
+    )
+    assert dtformat_many([20061229], "YMD", holidays=Unreadable()) == [
+        "20061229"
+    ]
+    assert dtformat_array(
+        [20061229], "YMD", holidays=Unreadable()
+    ).tolist() == ["20061229"]
+    assert dtformat_templates(
+        20061229, ["YMD", "%HH%"], holidays=Unreadable()
+    ) == ["20061229", "00"]
+    stream = DateTimeStreamFormatter("YMD", holidays=Unreadable())
+    assert stream(20061229) == "20061229"
+    with pytest.raises(AssertionError):
+        dtfmt(20061229, "DATE-P2B", holidays=Unreadable())
+    with pytest.raises(AssertionError):
+        dtformat_templates(20061229, ["YMD", "YMD-P2B"], holidays=Unreadable())
+
+
+def test_holiday_base_years():
+    passes = []
+
+    class CountingUS(type(holidays.US())):
+        def __iter__(self):
+            passes.append(self.years)
+            return super().__iter__()
+
+    us = CountingUS(years=range(2000, 2010))
+    expected = holidays.US(years=range(2000, 2011))
+    for yyyy in range(2000, 2010):
+        passes.clear()
+        assert dtfmt(f"{yyyy}-12-24", "DATE-P2B", holidays=us) == dtfmt(
+            f"{yyyy}-12-24", "DATE-P2B", holidays=expected
+        )
+        # the years populated up front are all read in one pass
+        assert len(passes) == 1
+
+
+def test_formatter_immutable():
+    dtf = DateTimeFormatter(20050301, {"2005-03-02": "x"}, "YYYYMMDD")
+    assert not hasattr(dtf, "__dict__")
+    with pytest.raises(attr.exceptions.FrozenInstanceError):
+        dtf.holidays = None
+    with pytest.raises(AttributeError):
+        dtf.dt.dt = datetime(2005, 3, 2)
+    with pytest.raises(AttributeError):
+        del dtf.dt.dt
+
+    # rebinding keeps holidays and input_format, and leaves dtf alone
+    rebound = dtf.rebind(20050228)
+    assert type(rebound) is DateTimeFormatter
+    assert rebound.dt.dt == datetime(2005, 2, 28)
+    assert rebound.format("%YMD-P1B%") == "20050301"
+    assert rebound.rebind(20050301).format("%YMD-P1B%") == "20050303"
+    assert rebound.rebind(dtf.dt).dt is dtf.dt
+    assert dtf.format("%YMD%") == "20050301"
+    assert rebound == DateTimeFormatter(
+        20050228, {"2005-03-02": "x"}, "YYYYMMDD"
+    )
+    assert rebound != dtf
+    assert dtf.dt != datetime(2005, 3, 1)
+    assert {dtf.dt, DateTimeFormatter("2005-03-01").dt} == {dtf.dt}
+    with pytest.raises(ValueError):
+        dtf.rebind("2005-02-28")
+
+    # dtformat takes the same inputs the formatter does
+    assert dtformat(dtf.dt, "YMD") == "20050301"
+
+
+def test_formatter_copy():
+    dtf = DateTimeFormatter(20050301, {"2005-03-02": "x"}, "YYYYMMDD")
+    for copied in (
+        pickle.loads(pickle.dumps(dtf)),
+        copy.copy(dtf),
+        copy.deepcopy(dtf),
+    ):
+        assert type(copied) is DateTimeFormatter
+        assert copied == dtf
+        assert copied.format("%YMD-P1B%") == "20050303"
+        assert copied.rebind(20050228).format("%YMD-P1B%") == "20050301"
+
+
+def test_dtformat_many():
+    values = [
+        20050301,
+        "2005-03-02",
+        date(2005, 3, 3),
+        datetime(2005, 3, 4, 8, 30),
+    ]
+    assert dtformat_many(values, "YYYYMMDD") == [
+        "20050301",
+        "20050302",
+        "20050303",
+        "20050304",
+    ]
+    assert dtformat_many(values, None) == [None, None, None, None]
+    assert dtformat_many(iter(values), "%YMD-M1D%") == [
+        dtformat(v, "%YMD-M1D%") for v in values
+    ]
+    assert dtformat_many([], "YMD") == []
+
+    # same semantics as the scalar version for tz and holidays
+    assert dtformat_many(
+        ["2005-03-01T05:00:00-05:00", "2005-03-01T06:00:00-05:00"],
+        "HHMMSS",
+        "UTC",
+    ) == ["10:00:00", "11:00:00"]
+    test_holiday = {"2007-01-01": "NYD"}
+    assert DateTimeFormatter.format_many(
+        [20061229, 20061228], "%DATE-P2B%", holidays=test_holiday
+    ) == ["2007-01-03", "2007-01-02"]
+
+    # non-datetime fields are still handed to string.Formatter
+    assert dtformat_many([20050301], "%YMD% {{x}}") == ["20050301 {x}"]
+    with pytest.raises(IndexError):
+        dtformat(20050301, "{0} %YMD%")
+    with pytest.raises(IndexError):
+        dtformat_many([20050301], "{0} %YMD%")
+
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtformat_many([20050301], "HHMMSS", output_tz=timezone.utc)
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtformat_many([20050301], "HHMMSS", output_tz="not_a_tz")
+    with pytest.raises(DateTimeFormatFieldError):
+        dtformat_many([20050301], "NOT_EXIST")
+
+
+def test_format_many_templates():
+    # templates are taken as format takes them, bare shortcuts are text
+    assert DateTimeFormatter.format_many([20061229], "YMD %YMD%") == [
+        DateTimeFormatter(20061229).format("YMD %YMD%")
+    ]
+    assert DateTimeFormatter.format_many([20061229], "YMD") == ["YMD"]
+    assert dtformat_many([20061229], "YMD") == ["20061229"]
+
+    np = pytest.importorskip("numpy")
+    values = np.array(["2006-12-29"], dtype="M8[D]")
+    assert DateTimeFormatter.format_many(values, "YMD %YMD%") == [
+        "YMD 20061229"
+    ]
+    assert DateTimeFormatter.format_many(values, "%MONTHABV% YMD") == [
+        "Dec YMD"
+    ]
+
+
+def test_dtformat_templates(monkeypatch):
+    test_holiday = {"2007-01-01": "NYD"}
+    templates = {
+        "start": "DATETIME-M1B",
+        "end": "%DATETIME-M1B%/%DATETIME-P2B%",
+        "label": "run_%YMD%_%HH-M1B%",
+        "month": "%DATETIME-P1m% %DATETIME-M1B%",
+        "none": None,
+    }
+    expected = {
+        key: dtformat("20061229 08:30:00", fmtstr, holidays=test_holiday)
+        for key, fmtstr in templates.items()
+    }
+
+    calls = []
+    translate = _DateTime.translate
+    monkeypatch.setattr(
+        _DateTime,
+        "translate",
+        lambda self, *args, **kw: calls.append(args[:2])
+        or translate(self, *args, **kw),
+    )
+    assert (
+        dtformat_templates(
+            "20061229 08:30:00", templates, holidays=test_holiday
+        )
+        == expected
+    )
+    assert sorted(calls) == [
+        ("business_days", -1),
+        ("business_days", 2),
+        ("months", 1),
+    ]
+
+    assert dtformat_templates(20050301, ["YMD", "YMD-P1D", None]) == [
+        "20050301",
+        "20050302",
+        None,
+    ]
+    assert dtformat_templates(20050301, iter(["YMD"])) == ["20050301"]
+    assert dtformat_templates(
+        "2005-03-01T05:00:00-05:00", ("HHMMSS", "DATE-P1H"), "UTC"
+    ) == ["10:00:00", "2005-03-01"]
+    assert dtformat_templates(
+        "01/03/2005", {1: "YMD"}, input_format="DD/MM/YYYY"
+    ) == {1: "20050301"}
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtformat_templates(20050301, ["HHMMSS"], output_tz="UTC")
+
+    dtf = DateTimeFormatter(20061229, holidays=test_holiday)
+    assert dtf.format_templates(["%YMD-P2B% {{x}}", "YMD"]) == [
+        "20070103 {x}",
+        "YMD",
+    ]
+    assert dtf.format_templates({"a": "%DATE%"}) == {"a": "2006-12-29"}
+
+
+def test_input_format():
+    assert dtformat("01/03/2005", "YMD", input_format="DD/MM/YYYY") == (
+        "20050301"
+    )
+    assert DateTimeFormatter("3/1/05", input_format="MM/DD/YY").dt.dt == (
+        datetime(2005, 3, 1)
+    )
+    dtf = DateTimeFormatter("2005-03-01")
+    assert DateTimeFormatter(dtf.dt).dt is dtf.dt
+    values = ["01/03/2005", "02/03/2005", date(2005, 3, 3)]
+    expected = ["20050301", "20050302", "20050303"]
+    assert dtformat_many(values, "YMD", input_format="DD/MM/YYYY") == expected
+    assert (
+        DateTimeFormatter.format_many(
+            values, "%YMD%", input_format="DD/MM/YYYY"
+        )
+        == expected
+    )
+    with pytest.raises(ValueError):
+        dtformat_many(values, "YMD", input_format="YYYY/MM/DD")
+
+
+_LAZY_IMPORTS_SCRIPT = """
+import sys
+from datetime import datetime, timezone
+
+import datetime_formatter
+from datetime_formatter import dtfmt, dtformat_many
+
+
+def loaded():
+    return sorted(
+        m
+        for m in [
+            "attr",
+            "holidays",
+            "dateutil.relativedelta",
+            "dateutil.tz",
+            "logging",
+        ]
+        if m in sys.modules
+    )
+
+
+print(loaded())
+dtfmt("2005-03-01", "YMD")
+dtformat_many([20050301, "2005-03-02"], "%DATE% %DATE-P1D% %DATE-P1B%")
+print(loaded())
+dtfmt(20050301, "YMD-P1m")
+print(loaded())
+dtfmt(datetime(2005, 3, 1, tzinfo=timezone.utc), "HHMMSS", "UTC")
+print(loaded())
+datetime_formatter.DateTimeFormatter(20050301)
+print(loaded())
+datetime_formatter.DateTimeLogFormatter()
+print(loaded())
+"""
+
+
+def test_lazy_imports():
+    # a fresh interpreter, as this one has imported everything already
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [root] + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", _LAZY_IMPORTS_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    assert out == [
+        "[]",
+        "[]",
+        "['dateutil.relativedelta']",
+        "['dateutil.relativedelta', 'dateutil.tz']",
+        "['attr', 'dateutil.relativedelta', 'dateutil.tz']",
+        "['attr', 'dateutil.relativedelta', 'dateutil.tz', 'logging']",
+    ]
+
+
+def test_lazy_formatter():
+    import datetime_formatter
+    from datetime_formatter import __datetime_format
+
+    assert "DateTimeFormatter" in datetime_formatter.__all__
+    assert __datetime_format.DateTimeFormatter is DateTimeFormatter
+    with pytest.raises(
+        AttributeError,
+        match="^module 'datetime_formatter' has no attribute 'NotAFormatter'$",
+    ):
+        datetime_formatter.NotAFormatter
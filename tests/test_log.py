@@ -0,0 +1,131 @@
+import pytest
+
+import datetime  # type: ignore
+import logging
+import threading
+
+from datetime_formatter import DateTimeLogFormatter, dtformat
+from datetime_formatter import __log
+
+_CREATED = 1622125815.0
+
+
+def _record(created, msg="hello"):
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, msg, (), None)
+    record.created = created
+    record.msecs = int((created - int(created)) * 1000) + 0.0
+    return record
+
+
+def _utc(created):
+    return datetime.datetime.fromtimestamp(created, datetime.timezone.utc)
+
+
+def test_log_formatter_default():
+    fmt = "%(asctime)s %(levelname)s %(message)s"
+    ours = DateTimeLogFormatter(fmt)
+    stdlib = logging.Formatter(fmt)
+    for created in [_CREATED, _CREATED + 0.25, _CREATED + 61.5, 0.0]:
+        record = _record(created)
+        assert ours.format(record) == stdlib.format(record)
+
+
+@pytest.mark.parametrize(
+    "datefmt",
+    [
+        "%DATETIME%.%ZZ%",
+        "ISODATETIME",
+        "%DATE% %HHMMSS% %YMD-P1B% %TZNAME%",
+        "%HH%:%MIN-M1H% at %DAYNAME%",
+    ],
+)
+def test_log_formatter_datefmt(datefmt):
+    formatter = DateTimeLogFormatter(
+        "%(asctime)s|%(message)s",
+        datefmt,
+        output_tz="UTC",
+        holidays=["2021-05-28"],
+    )
+    steps = [0.0, 0.125, 0.5, 1.0, 1.015625, 59.0, 3600.0, -86400.0, 0.0]
+    for created in [_CREATED + step for step in steps]:
+        expected = dtformat(_utc(created), datefmt, holidays=["2021-05-28"])
+        assert formatter.format(_record(created)) == expected + "|hello"
+
+
+def test_log_formatter_cache(monkeypatch):
+    formatter = DateTimeLogFormatter(datefmt="DATETIME", output_tz="UTC")
+    assert formatter._per_second
+    assert not DateTimeLogFormatter(datefmt="%DATETIME%.%ZZ%")._per_second
+
+    calls = []
+    real = __log.DateTimeLogFormatter._datetime
+    monkeypatch.setattr(
+        __log.DateTimeLogFormatter,
+        "_datetime",
+        lambda self, us: calls.append(us) or real(self, us),
+    )
+    for created in [_CREATED, _CREATED + 0.5, _CREATED + 0.75]:
+        assert formatter.formatTime(_record(created), "DATETIME") == (
+            "2021-05-27 14:30:15"
+        )
+    assert len(calls) == 1
+    assert formatter.formatTime(_record(_CREATED + 1), "DATETIME") == (
+        "2021-05-27 14:30:16"
+    )
+    assert len(calls) == 2
+
+    # any other datefmt is formatted without the cache
+    assert formatter.formatTime(_record(_CREATED), "YMD") == "20210527"
+    assert formatter.formatTime(_record(_CREATED), None) == (
+        "2021-05-27 14:30:15,000"
+    )
+    assert formatter.formatTime(_record(_CREATED + 2), "DATETIME") == (
+        "2021-05-27 14:30:17"
+    )
+    assert len(calls) == 5
+
+
+def test_log_formatter_threads():
+    formatter = DateTimeLogFormatter(
+        datefmt="%DATETIME%.%ZZ%", output_tz="UTC"
+    )
+    errors = []
+
+    def work(offset):
+        for i in range(300):
+            created = _CREATED + offset + i / 64
+            expected = dtformat(_utc(created), "%DATETIME%.%ZZ%")
+            if formatter.formatTime(_record(created), formatter.datefmt) != (
+                expected
+            ):
+                errors.append(created)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_log_formatter_handler():
+    import datetime_formatter
+
+    assert "DateTimeLogFormatter" in datetime_formatter.__all__
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(
+        (record.created, handler.format(record))
+    )
+    handler.setFormatter(
+        DateTimeLogFormatter("%(asctime)s %(message)s", "YMD", output_tz="UTC")
+    )
+    logger = logging.getLogger("datetime_formatter.test_log")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("hi")
+    finally:
+        logger.removeHandler(handler)
+    [(created, line)] = records
+    assert line == dtformat(_utc(created), "YMD") + " hi"
@@ -0,0 +1,175 @@
+import pytest
+import random
+
+import datetime  # type: ignore
+
+from datetime_formatter import (
+    DateTimeStreamFormatter,
+    DateTimeStreamParser,
+    dtformat,
+    dtformat_many,
+)
+from datetime_formatter import __stream
+from datetime_formatter.__datetime import _string_to_datetime
+
+
+def _values(fmt, n=40):
+    start = datetime.datetime(1999, 12, 25, 7, 5, 3)
+    return [
+        (start + datetime.timedelta(days=d * 17, seconds=d * 3517)).strftime(
+            fmt
+        )
+        for d in range(n)
+    ]
+
+
+@pytest.mark.parametrize(
+    "fmt,layout",
+    [
+        ("%Y-%m-%d", "ISO"),
+        ("%Y-%m-%d %H:%M:%S", "ISO"),
+        ("%Y/%m/%d", "YYYY/MM/DD"),
+        ("%m/%d/%Y", "MM/DD/YYYY"),
+        ("%d/%m/%Y", "MM/DD/YYYY"),
+        ("%d-%m-%y", "MM-DD-YY"),
+        ("%m/%d/%Y %H:%M", "MM/DD/YYYY HH:MM:SS"),
+        ("%Y/%m/%d %H:%M:%S.%f", "YYYY/MM/DD HH:MM:SS"),
+        ("%H:%M:%S", "HH:MM:SS"),
+    ],
+)
+def test_stream_parser_locks(fmt, layout):
+    values = _values(fmt)
+    parser = DateTimeStreamParser(samples=8)
+    assert list(parser.parse_many(values)) == [
+        _string_to_datetime(v) for v in values
+    ]
+    assert parser.layout == layout
+
+
+def test_stream_parser_fallback():
+    parser = DateTimeStreamParser(samples=4)
+    values = _values("%m/%d/%Y", 4)
+    assert [parser(v) for v in values] == [
+        _string_to_datetime(v) for v in values
+    ]
+    assert parser.layout == "MM/DD/YYYY"
+
+    # values in another layout still get full inference, as do non-strings
+    assert parser("2005-03-01") == datetime.datetime(2005, 3, 1)
+    assert parser("25/10/2005") == datetime.datetime(2005, 10, 25)
+    assert parser(20050301) == datetime.datetime(2005, 3, 1)
+    assert parser(datetime.date(2005, 3, 1)) == datetime.datetime(2005, 3, 1)
+    with pytest.raises(ValueError):
+        parser("02/30/2005")
+    with pytest.raises(ValueError):
+        parser("abc")
+
+    for bad in [
+        "2005/02/30 08:30",
+        "2005/02/03 25:30",
+        "2005/99999999999999999999/03 08:30",
+    ]:
+        parser = DateTimeStreamParser(samples=1)
+        parser("2005/02/03 08:30")
+        assert parser.layout == "YYYY/MM/DD HH:MM:SS"
+        with pytest.raises(ValueError):
+            parser(bad)
+    parser = DateTimeStreamParser(samples=1)
+    parser("08:30")
+    for bad in ["8:3", "25:30"]:
+        with pytest.raises(ValueError):
+            parser(bad)
+    parser = DateTimeStreamParser(samples=1)
+    parser("2005-03-01")
+    assert parser.layout == "ISO"
+    assert parser("03/01/2005") == datetime.datetime(2005, 3, 1)
+
+
+def test_stream_parser_no_lock(monkeypatch):
+    # nothing recognisable, keep inferring
+    parser = DateTimeStreamParser(samples=2)
+    assert parser("20050301") == parser("200503")
+    assert parser.layout is None
+    assert parser("03/01/2005") == datetime.datetime(2005, 3, 1)
+    assert parser.layout is None
+
+    # a layout that disagrees with inference on the samples is not used
+    def wrong(s):
+        return datetime.datetime(1999, 1, 1)
+
+    monkeypatch.setattr(__stream, "_make_parser", lambda layout: wrong)
+    parser = DateTimeStreamParser(samples=2)
+    parser("03/01/2005")
+    parser("03/02/2005")
+    assert parser.layout is None
+    assert parser("03/03/2005") == datetime.datetime(2005, 3, 3)
+
+
+def test_dtformat_many_stream():
+    values = _values("%d/%m/%Y %H:%M:%S", 64)
+    assert dtformat_many(values, "DATETIME") == [
+        dtformat(v, "DATETIME") for v in values
+    ]
+    assert dtformat_many(values + ["2005-03-01", 20050302], "YMD")[-2:] == [
+        "20050301",
+        "20050302",
+    ]
+
+
+def _stream(n, step, sort=True):
+    rng = random.Random(n)
+    start = datetime.datetime(2021, 5, 30, 22, 58, 57)
+    values = [
+        start + datetime.timedelta(microseconds=rng.randrange(step))
+        for _ in range(n)
+    ]
+    return sorted(values) if sort else values
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "%DATE% %HH%:%MIN%:%SS%.%ZZ%",
+        "[%USDATETIME%] %AMPM% %HH12%h %YMD-M1B% %YMD-P2H% %HHMMSS-M90S%",
+        "%ISODATETIME% %MONTHNAME-P1P% %SS-P1Z%",
+        "%DATE% %YMD-P1D%",
+        "%YYYY%-%DAYYEAR% %HH12%%AMPM%",
+        "{{literal}} %DATETIME%",
+    ],
+)
+@pytest.mark.parametrize(
+    "step,sort",
+    [(10**6 * 3600 * 30, True), (10**8, True), (10**6 * 86400, False)],
+)
+def test_stream_formatter(template, step, sort):
+    holidays = ["2021-05-31", "2021-06-01"]
+    values = _stream(500, step, sort)
+    formatter = DateTimeStreamFormatter(template, holidays=holidays)
+    assert [formatter(v) for v in values] == [
+        dtformat(v, template, holidays=holidays) for v in values
+    ]
+
+
+def test_stream_formatter_inputs():
+    values = _values("%d/%m/%Y %H:%M:%S", 64)
+    formatter = DateTimeStreamFormatter("DATETIME")
+    assert list(formatter.format_many(values)) == [
+        dtformat(v, "DATETIME") for v in values
+    ]
+    formatter = DateTimeStreamFormatter("YMD", input_format="DD/MM/YYYY")
+    assert formatter("25/12/1999") == "19991225"
+    assert formatter._parse is None
+
+    aware = [
+        v.replace(tzinfo=datetime.timezone.utc) for v in _stream(200, 10**10)
+    ]
+    template = "%DATETIME% %TZOFF% %TZNAME%"
+    formatter = DateTimeStreamFormatter(template, "America/New_York")
+    assert [formatter(v) for v in aware] == [
+        dtformat(v, template, "America/New_York") for v in aware
+    ]
+
+    # as with dtformat, there is nothing to fill positional fields with
+    formatter = DateTimeStreamFormatter("{0} %YMD%")
+    with pytest.raises(IndexError):
+        formatter(20050301)
@@ -0,0 +1,63 @@
+import random
+
+from datetime import datetime, timedelta  # type: ignore
+
+from datetime_formatter import DateTimeFormatter
+from datetime_formatter import __strftime
+from datetime_formatter.__formats import _SUPPORTED_DATETIME_OUTPUT_FORMATS
+from datetime_formatter.__strftime import _compile_strftime
+
+_RNG = random.Random(20210527)
+_DATETIMES = [
+    datetime.min,
+    datetime.max,
+    datetime(5, 3, 1),
+    datetime(999, 12, 31, 12),
+    datetime(2021, 1, 3, 0, 0, 0, 7),
+] + [
+    datetime.min + timedelta(seconds=_RNG.randrange(315537897599))
+    for _ in range(2000)
+]
+
+
+def test_compile_strftime_matches_strftime():
+    patterns = {
+        fmt
+        for fmt in _SUPPORTED_DATETIME_OUTPUT_FORMATS.values()
+        if isinstance(fmt, str)
+    }
+    patterns |= {"", "a%", "%%x", "%Y%%%m", "{x}'\"\\", "%x\n%%%%X%"}
+    patterns |= set(__strftime._PATTERN_RENDERERS)
+    for pattern in patterns:
+        render = _compile_strftime(pattern)
+        if pattern in ("%c", "%z", "%Z"):
+            assert render is None
+            continue
+        for dt in _DATETIMES:
+            assert render(dt) == dt.strftime(pattern), (pattern, dt)
+
+    # common shortcuts get a renderer of their own
+    for pattern, render in __strftime._PATTERN_RENDERERS.items():
+        assert _compile_strftime(pattern) is render
+
+
+def test_compile_strftime_locale(monkeypatch):
+    dt = datetime(2021, 5, 27, 14)
+    dtf = DateTimeFormatter(dt)
+    assert dtf.format("%MONTHABV% %DAYNAME% %AMPM% %USDATE%") == (
+        "May Thursday PM 05/27/21"
+    )
+
+    calls = []
+
+    class _Localized(datetime):
+        def strftime(self, fmt):
+            calls.append(fmt)
+            return super().strftime(fmt)
+
+    monkeypatch.setattr(__strftime, "_c_locale", lambda: False)
+    dt = _Localized(2021, 5, 27, 14)
+    assert _compile_strftime("%b %Y")(dt) == "May 2021"
+    assert _compile_strftime("%Y%m%d")(dt) == "20210527"
+    assert _compile_strftime("%x")(dt) == "05/27/21"
+    assert calls == ["%b %Y", "%x"]
@@ -0,0 +1,167 @@
+import pytest
+import random
+
+from datetime import datetime, timedelta  # type: ignore
+
+from datetime_formatter import (
+    DateTimeFormatter,
+    DateTimeFormatFieldError,
+    DateTimeFormatTranslationError,
+    dtformat,
+)
+from datetime_formatter import __template
+from datetime_formatter.__calendar import _normalize_holidays
+from datetime_formatter.__datetime import _DateTime
+from datetime_formatter.__template import (
+    _compile_template,
+    _parse_translation,
+)
+
+
+def test_compile_template_cached():
+    _compile_template.cache_clear()
+    compiled = _compile_template("xxx %YMD% %MMDDYYYY-M1D%")
+    assert _compile_template("xxx %YMD% %MMDDYYYY-M1D%") is compiled
+    assert _compile_template.cache_info().hits == 1
+
+    dtf = DateTimeFormatter(20050301)
+    assert dtf.format("xxx %YMD% %MMDDYYYY-M1D%") == "xxx 20050301 02282005"
+    assert _compile_template.cache_info().hits == 2
+
+
+def test_compiled_template_segments():
+    compiled = _compile_template("a %YMD% b %YMD-P1D% %YMD%")
+    assert compiled.simple
+    assert list(compiled.fields) == ["%YMD%", "%YMD-P1D%"]
+    assert compiled.fields["%YMD-P1D%"].translation == ("days", 1)
+    assert compiled.fields["%YMD%"].translation is None
+    dt = _DateTime(20050301)
+    assert compiled.render(dt) == "a 20050301 b 20050302 20050301"
+    assert compiled.render_fields(dt) == {
+        "%YMD%": "20050301",
+        "%YMD-P1D%": "20050302",
+    }
+
+    assert _compile_template("no fields at all").simple
+    assert _compile_template("literal {{braces}} %YMD%").simple
+    assert not _compile_template("{0} %YMD%").simple
+    assert not _compile_template("{} %YMD%").simple
+    assert not _compile_template("{foo} %YMD%").simple
+    assert not _compile_template("{foo!r} %YMD%").simple
+
+
+def test_compiled_template_formatter_fallback():
+    dtf = DateTimeFormatter(datetime(2005, 3, 1))
+    assert dtf.format("{{braces}} %YMD%") == "{braces} 20050301"
+    assert dtf.format("{foo}-%YMD%", foo="bar") == "bar-20050301"
+    assert dtf.format("{foo!r}-%YMD%", foo="bar") == "'bar'-20050301"
+    assert dtf.format("{0:>4}-%YMD%", 1) == "   1-20050301"
+
+
+def test_parse_translation():
+    assert _parse_translation("x", "M1B") == ("business_days", -1)
+    assert _parse_translation("x", "p10Y") == ("years", 10)
+    with pytest.raises(DateTimeFormatTranslationError):
+        _parse_translation("x", "X1D")
+    with pytest.raises(DateTimeFormatTranslationError):
+        _parse_translation("x", "P1Q")
+
+
+def test_compile_errors_not_cached():
+    with pytest.raises(DateTimeFormatFieldError):
+        _compile_template("%NOT_EXIST%")
+    with pytest.raises(DateTimeFormatFieldError):
+        _compile_template("%NOT_EXIST%")
+
+
+def test_date_only_memo():
+    for template in [
+        "%DATE%/%YMD-M1B%",
+        "%YEAR% %MONTHABV% %DAYNAME% %WEEKNUM-P2F% %USDATE-M1Y%",
+        "%DAYYEAR% %DAYNUM-P3D% %MMYY-M1P% %YYYY-P1K% {{x}}",
+    ]:
+        assert _compile_template(template).memo is not None, template
+    for template in [
+        "no fields at all",
+        "%DATE% %HH%",
+        "%DATE-P1H%",
+        "%DATE-M30M%",
+        "%ISODATETIME%",
+        "%USDATETIME%",
+        "%DATE% %TZOFF%",
+        "{} %DATE%",
+    ]:
+        assert _compile_template(template).memo is None, template
+
+    rng = random.Random(20210527)
+    holidays = [
+        None,
+        _normalize_holidays(None),
+        _normalize_holidays(["2021-05-31", "2021-07-05", "2021-12-24"]),
+    ]
+    templates = [
+        "%DATE%/%YMD-M1B%",
+        "%YMD-P1D% %YMD-M1F% %MONTHNAME-P1P% %YMD-P1K%",
+        "%DAYABV% %DAYYEAR-M2W% %YMD-P1m% %YYYY-M1Y%",
+    ]
+    start = datetime(2021, 5, 1)
+    for template in templates:
+        compiled = _compile_template(template)
+        for _ in range(300):
+            dt = _DateTime(
+                start + timedelta(seconds=rng.randrange(86400 * 90))
+            )
+            for hols in holidays:
+                expected = compiled._render(dt, hols)
+                assert compiled.render(dt, hols) == expected
+                assert compiled.render(dt, hols) == expected
+
+
+def test_date_only_memo_bounded(monkeypatch):
+    monkeypatch.setattr(__template, "_DATE_MEMO_SIZE", 4)
+    compiled = _compile_template("%YMD%-memo-bounded")
+    for day in range(1, 11):
+        dt = _DateTime(datetime(2021, 5, day, day))
+        assert compiled.render(dt) == f"202105{day:02d}-memo-bounded"
+        assert len(compiled.memo[1]) <= 4
+    assert len(compiled.memo[1]) == 2
+
+
+def test_date_only_memo_holidays(monkeypatch):
+    template = "%YMD-P1B%-memo-holidays"
+    compiled = _compile_template(template)
+    hols = frozenset(["2021-05-31"])
+    assert dtformat(datetime(2021, 5, 28, 9), template, holidays=hols) == (
+        "20210601-memo-holidays"
+    )
+    assert compiled.memo[0] is _normalize_holidays(hols)
+
+    # the same (unchanging) holidays again are a lookup
+    calls = []
+    render = __template._CompiledTemplate._render
+    monkeypatch.setattr(
+        __template._CompiledTemplate,
+        "_render",
+        lambda self, dt, holidays=None: calls.append(dt)
+        or render(self, dt, holidays),
+    )
+    assert dtformat(datetime(2021, 5, 28, 17), template, holidays=hols) == (
+        "20210601-memo-holidays"
+    )
+    assert calls == []
+
+    # other holidays start a memo of their own, the old one is let go
+    assert (
+        dtformat(datetime(2021, 5, 28, 17), template, holidays=["2021-06-01"])
+        == "20210531-memo-holidays"
+    )
+    assert len(calls) == 1
+    assert compiled.memo[0] is not _normalize_holidays(hols)
+    assert len(compiled.memo[1]) == 1
+
+    # holidays are not part of the memo of templates without translations
+    compiled = _compile_template("%YMD%-memo-holidays")
+    for hols in [None, ["2021-06-01"], {"2021-05-31": ""}]:
+        dtformat(datetime(2021, 5, 28), "%YMD%-memo-holidays", holidays=hols)
+    assert compiled.memo[0] is None
+    assert len(compiled.memo[1]) == 1
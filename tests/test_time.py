@@ -9,6 +9,7 @@ import datetime
 
 
 def test_check_time():
+    _check_time(23, 59, 59, 999999)
     with pytest.raises(ValueError):
         _check_time(25, 0, 0, 0)
     with pytest.raises(ValueError):
@@ -0,0 +1,82 @@
+import pytest
+
+import sys
+import threading
+from datetime import datetime, timedelta, timezone  # type: ignore
+
+from datetime_formatter import (
+    DateTimeFormatTimeZoneError,
+    dtfmt,
+    dtformat_many,
+    set_tz_backend,
+)
+from datetime_formatter import __tz
+from datetime_formatter.__tz import _TZ_CACHE, _resolve_tz
+
+
+@pytest.fixture
+def zoneinfo_backend():
+    set_tz_backend("zoneinfo")
+    yield
+    set_tz_backend("dateutil")
+
+
+def test_resolve_tz_cache():
+    assert __tz._TZ_BACKEND == "dateutil"
+    tz = _resolve_tz("America/New_York")
+    assert _TZ_CACHE[("America/New_York", "dateutil")] is tz
+    assert _resolve_tz("America/New_York") is tz
+    assert _resolve_tz(timezone.utc) is timezone.utc
+    assert _resolve_tz(None) is None
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        _resolve_tz("+05:00")
+    assert ("+05:00", "dateutil") not in _TZ_CACHE
+
+    # threads resolving at once all see the same tzinfo
+    results = []
+
+    def resolve():
+        results.append([_resolve_tz(f"Etc/GMT+{i}") for i in range(12)])
+
+    threads = [threading.Thread(target=resolve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for tzs in zip(*results):
+        assert len({id(tz) for tz in tzs}) == 1
+
+
+def test_zoneinfo_backend(zoneinfo_backend):
+    # same conversions as dateutil, on both sides of DST changes
+    start = datetime(2021, 3, 13, tzinfo=timezone.utc)
+    values = [start + timedelta(minutes=37 * i) for i in range(200)]
+    values += [v + timedelta(days=238) for v in values]
+    for name in ["America/New_York", "Europe/London", "Australia/Sydney"]:
+        zoneinfo = dtformat_many(values, "ISODATETIME", name)
+        set_tz_backend("dateutil")
+        assert zoneinfo == dtformat_many(values, "ISODATETIME", name)
+        set_tz_backend("zoneinfo")
+        assert type(_resolve_tz(name)).__module__ == "zoneinfo"
+
+    # UTC and fixed offsets skip the lookup
+    dt = "2005-03-01T05:00:00-05:00"
+    assert _resolve_tz("UTC") is timezone.utc
+    assert dtfmt(dt, "HHMMSS", "Z") == "10:00:00"
+    assert dtfmt(dt, "HHMMSS", "+05:30") == "15:30:00"
+    assert dtfmt(dt, "HHMMSS", "-0800") == "02:00:00"
+    assert _resolve_tz("-08:00") == timezone(timedelta(hours=-8))
+    for bad in ["+24:00", "not_a_tz", "../etc", ""]:
+        with pytest.raises(DateTimeFormatTimeZoneError):
+            dtfmt(dt, "HHMMSS", bad)
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtfmt(20050301, "HHMMSS", "UTC")
+
+
+def test_set_tz_backend(monkeypatch):
+    with pytest.raises(ValueError):
+        set_tz_backend("pytz")
+    monkeypatch.setitem(sys.modules, "zoneinfo", None)
+    with pytest.raises(ImportError):
+        set_tz_backend("zoneinfo")
+    assert __tz._TZ_BACKEND == "dateutil"
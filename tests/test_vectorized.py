@@ -0,0 +1,500 @@
+import pytest
+
+import math
+import struct
+import sys
+from datetime import (  # type: ignore
+    date,
+    datetime,
+    timedelta,
+    timezone,
+    tzinfo,
+)
+
+from datetime_formatter import (
+    business_days_between,
+    dtformat,
+    dtformat_array,
+    dtformat_many,
+    dtparse_int_array,
+    dttranslate_array,
+    DateTimeFormatTimeZoneError,
+    DateTimeFormatTranslationError,
+)
+from datetime_formatter.__datetime import _DateTime, _parse_with_format
+from datetime_formatter.__formats import _SUPPORTED_DATETIME_OUTPUT_FORMATS
+from datetime_formatter.__tz import _resolve_tz
+from datetime_formatter.__template import (
+    _compile_template,
+    _parse_translation,
+)
+from datetime_formatter.__vectorized import (
+    _TZ_TABLES,
+    _TZ_TABLES_SIZE,
+    _array_layout,
+    _import_numpy,
+    _tz_transitions,
+    _tzif_transitions,
+    _utc_offsets,
+)
+
+import holidays
+
+np = pytest.importorskip("numpy")
+
+
+def _sample_datetimes():
+    start = datetime(1899, 12, 25, 0, 0, 0)
+    return [
+        start + timedelta(days=d * 139, seconds=d * 4513, microseconds=d * 7)
+        for d in range(0, 400)
+    ]
+
+
+def test_import_numpy(monkeypatch):
+    assert _import_numpy() is np
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    with pytest.raises(ImportError):
+        _import_numpy()
+
+
+def test_array_layout():
+    def layout(s):
+        return _array_layout(_compile_template(s))
+
+    assert layout("%YMD%") == [
+        (None, "year", 4),
+        (None, "month", 2),
+        (None, "day", 2),
+    ]
+    assert layout("x %HH-P1H% y") == ["x ", (("hours", 1), "hour", 2), " y"]
+    # every translation is applied to the whole array
+    assert layout("%YMD-P1m%") == [
+        (("months", 1), "year", 4),
+        (("months", 1), "month", 2),
+        (("months", 1), "day", 2),
+    ]
+    assert layout("%YMD-P1B%") is not None
+    assert layout("%USDATE%") is None
+    assert layout("%ISODATETIME%") is None
+    assert layout("{} %YMD%") is None
+
+
+def test_dtformat_array_matches_dtformat():
+    dts = _sample_datetimes()
+    arr = np.array(dts, dtype="datetime64[us]")
+    for k in _SUPPORTED_DATETIME_OUTPUT_FORMATS:
+        out = dtformat_array(arr, k)
+        assert out.dtype.kind == "U"
+        assert out.tolist() == [dtformat(dt, k) for dt in dts], k
+
+    for fmt in [
+        "%DATE-P3D% %HHMMSSZZ-M1Z%",
+        "%DATETIME-M90M%/%YMD-P2W%",
+        "%YMD-M20S%",
+        "%YMD-M1B% %YMD%",
+        "%YMD-P1m%",
+        "%YMD-M13m% %YMD-P5Y% %YMD-P3F% %YMD-M2P% %YMD-P1K%",
+    ]:
+        out = dtformat_array(arr, fmt)
+        assert out.tolist() == [dtformat(dt, fmt) for dt in dts], fmt
+
+
+def test_dtformat_array_inputs():
+    arr = np.array(["2005-03-01", "2005-03-02"], dtype="datetime64[D]")
+    assert dtformat_array(arr, "YMD").tolist() == ["20050301", "20050302"]
+    assert dtformat_array(arr.reshape(2, 1), "YMD").shape == (2, 1)
+    assert dtformat_array(arr[:0], "YMD").tolist() == []
+    assert dtformat_array(arr, None).tolist() == [None, None]
+
+    holidays = {"2005-03-03": "fake"}
+    assert dtformat_array(arr, "YMD-P1D", holidays=holidays).tolist() == [
+        "20050302",
+        "20050304",
+    ]
+    assert dtformat_array(arr, "YMD-P2B", holidays=holidays).tolist() == [
+        "20050304",
+        "20050307",
+    ]
+
+    # anything else goes through the per-element path
+    assert dtformat_array(["20050301", 20050302], "YMD").tolist() == [
+        "20050301",
+        "20050302",
+    ]
+    assert dtformat_array(
+        np.array(["01/03/2005"]), "YMD", input_format="DD/MM/YYYY"
+    ).tolist() == ["20050301"]
+    aware = [datetime(2005, 3, 1, 5, tzinfo=timezone.utc)]
+    assert dtformat_array(aware, "HHMMSS", output_tz="EST").tolist() == [
+        "00:00:00"
+    ]
+
+    # strftime does not zero-pad years < 1000
+    early = np.array(["0999-03-01"], dtype="datetime64[D]")
+    assert dtformat_array(early, "YMD").tolist() == [
+        dtformat(datetime(999, 3, 1), "YMD")
+    ]
+
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtformat_array(arr, "YMD", output_tz="UTC")
+    with pytest.raises(ValueError):
+        dtformat_array(np.array(["NaT"], dtype="datetime64[D]"), "YMD")
+    with pytest.raises(ValueError):
+        dtformat_array(np.array(["NaT"], dtype="datetime64[D]"), "USDATE")
+
+
+class _FakeDatetimeAccessor:
+    def __init__(self, tz):
+        self.tz = tz
+
+
+class _FakeSeries:
+    # quacks like a pandas Series, .values of tz-aware data is UTC
+    def __init__(self, values, tz=None):
+        self.values = values
+        self.dt = _FakeDatetimeAccessor(tz)
+
+    def __array__(self, dtype=None):
+        raise AssertionError("Series data should be read from .values")
+
+
+class _FakeDatetimeIndex:
+    def __init__(self, values, tz=None):
+        self.values = values
+        self.tz = tz
+
+    def __array__(self, dtype=None):
+        raise AssertionError("Index data should be read from .values")
+
+
+class _FakeArrayLike:
+    def __init__(self, values):
+        self._values = values
+
+    def __array__(self, dtype=None, copy=None):
+        return self._values
+
+
+def test_dtformat_array_pandas_like():
+    utc = np.array(
+        ["2005-03-01T05:00:00", "2005-03-02T23:30:00"],
+        dtype="datetime64[ns]",
+    )
+    assert dtformat_array(_FakeSeries(utc), "DATETIME").tolist() == [
+        "2005-03-01 05:00:00",
+        "2005-03-02 23:30:00",
+    ]
+    assert dtformat_array(_FakeDatetimeIndex(utc), "HHMMSS").tolist() == [
+        "05:00:00",
+        "23:30:00",
+    ]
+    assert dtformat_array(_FakeArrayLike(utc), "YMD").tolist() == [
+        "20050301",
+        "20050302",
+    ]
+
+    # tz-aware data renders in its own timezone, or output_tz if given
+    est = timezone(timedelta(hours=-5))
+    aware = _FakeSeries(utc, tz=est)
+    assert dtformat_array(aware, "ISODATETIME").tolist() == [
+        "2005-03-01T00:00:00-05:00",
+        "2005-03-02T18:30:00-05:00",
+    ]
+    assert dtformat_array(aware, "HHMMSS", output_tz="UTC").tolist() == [
+        "05:00:00",
+        "23:30:00",
+    ]
+    with pytest.raises(DateTimeFormatTimeZoneError):
+        dtformat_array(_FakeSeries(utc), "HHMMSS", output_tz="UTC")
+
+    # business days are counted between local dates
+    cet = timezone(timedelta(hours=1))
+    assert business_days_between(
+        _FakeSeries(utc, tz=cet), 20050307
+    ).tolist() == [4, 2]
+    assert business_days_between(_FakeSeries(utc), 20050307).tolist() == [
+        4,
+        3,
+    ]
+
+    # batch api hands array-likes to the array engine
+    assert dtformat_many(_FakeSeries(utc), "YMD") == ["20050301", "20050302"]
+    assert dtformat_many(utc, "YMD") == ["20050301", "20050302"]
+    assert dtformat_many(utc, None) == [None, None]
+
+
+def test_dtformat_array_output_tz():
+    # every 37 minutes across both 2021 DST changes in New York and London
+    utc = np.datetime64("2021-03-13T00:00", "us") + np.arange(
+        0, 7000 * 37, 37
+    ).astype("timedelta64[m]")
+    aware = [dt.replace(tzinfo=timezone.utc) for dt in utc.tolist()]
+    # "-03:30" is not a tz name with the default tz backend
+    for tz in ["America/New_York", "Europe/London", "-03:30"]:
+        for fmt in ["DATETIME", "%DATE-P1B% %HHMMSSZZ-M2H%", "HHMMSS-P30M"]:
+            try:
+                expected = dtformat_many(aware, fmt, tz)
+            except DateTimeFormatTimeZoneError:
+                with pytest.raises(DateTimeFormatTimeZoneError):
+                    dtformat_array(_FakeSeries(utc, tz=timezone.utc), fmt, tz)
+                continue
+            for source in [timezone.utc, timezone(timedelta(hours=9))]:
+                series = _FakeSeries(utc, tz=source)
+                assert dtformat_array(series, fmt, tz).tolist() == expected
+            assert (
+                dtformat_array(
+                    _FakeSeries(utc, tz=_resolve_tz(tz)), fmt
+                ).tolist()
+                == expected
+            )
+
+    tokyo = timezone(timedelta(hours=9))
+    assert dtformat_array(_FakeSeries(utc, tz=tokyo), "DATETIME").tolist() == (
+        dtformat_many([dt.astimezone(tokyo) for dt in aware], "DATETIME")
+    )
+
+    # transitions are found to the second, and tables are kept per zone
+    london = _resolve_tz("Europe/London")
+    second = np.timedelta64(1, "s")
+    instants = np.datetime64("2021-10-31T01:00", "us") + (
+        np.arange(-3, 3) * second
+    )
+    assert (
+        _utc_offsets(np, instants, london).astype(np.int64) // 3600000000
+    ).tolist() == [1, 1, 1, 0, 0, 0]
+    assert id(london) in _TZ_TABLES
+    for minutes in range(_TZ_TABLES_SIZE):
+        _utc_offsets(np, instants, _FixedZone(minutes))
+    assert len(_TZ_TABLES) <= _TZ_TABLES_SIZE
+    assert _utc_offsets(
+        np, np.array(["9999-12-31T23:00"], dtype="datetime64[us]"), london
+    ).tolist() == [timedelta(0)]
+
+
+def test_utc_offsets_listed_transitions():
+    # an offset that changes back within the hour is found, as the zone
+    # lists both transitions
+    zone = _ListedZone()
+    instants = np.datetime64("2021-06-01T11:59:59", "us") + (
+        np.array([0, 1, 1800, 3600, 3601, 86400]) * np.timedelta64(1, "s")
+    )
+    assert _utc_offsets(np, instants, zone).tolist() == [
+        timedelta(0),
+        timedelta(hours=1),
+        timedelta(hours=1),
+        timedelta(hours=1),
+        timedelta(0),
+        timedelta(0),
+    ]
+    assert _tz_transitions(_FixedZone(60)) == ([], None)
+
+    zoneinfo = pytest.importorskip("zoneinfo")
+    try:
+        new_york = zoneinfo.ZoneInfo("America/New_York")
+    except zoneinfo.ZoneInfoNotFoundError:
+        pytest.skip("no time zone data")
+    transitions, until = _tz_transitions(new_york)
+    spring = int(datetime(2021, 3, 14, 7, tzinfo=timezone.utc).timestamp())
+    assert spring in transitions
+    assert until is not None
+    instants = np.datetime64("2021-03-14T07:00", "us") + (
+        np.arange(-2, 2) * np.timedelta64(1, "s")
+    )
+    assert (
+        _utc_offsets(np, instants, new_york).astype(np.int64) // 3600000000
+    ).tolist() == [-5, -5, -4, -4]
+    for data in [b"", b"TZif2" + bytes(39)]:
+        with pytest.raises(ValueError):
+            _tzif_transitions(data)
+    # version 1 files have 32-bit data and no rule
+    v1 = b"TZif" + bytes(16) + struct.pack(">6l", 0, 0, 0, 1, 1, 4)
+    v1 += struct.pack(">lB", -1, 0) + struct.pack(">lBB", 0, 0, 0) + bytes(4)
+    assert _tzif_transitions(v1) == ([-1], math.inf)
+
+
+def test_utc_offsets_unlisted_transitions(monkeypatch, tmp_path):
+    # zones that list no transitions are read a day apart
+    dateutil_tz = pytest.importorskip("dateutil.tz")
+    zone = dateutil_tz.tzstr("EST5EDT,M3.2.0,M11.1.0")
+    assert _tz_transitions(zone) == ([], None)
+    instants = np.datetime64("2021-03-14T07:00", "us") + (
+        np.arange(-2, 2) * np.timedelta64(1, "s")
+    )
+    assert (
+        _utc_offsets(np, instants, zone).astype(np.int64) // 3600000000
+    ).tolist() == [-5, -5, -4, -4]
+
+    zoneinfo = pytest.importorskip("zoneinfo")
+    try:
+        new_york = zoneinfo.ZoneInfo("America/New_York")
+    except zoneinfo.ZoneInfoNotFoundError:
+        pytest.skip("no time zone data")
+    (tmp_path / "America").mkdir()
+    (tmp_path / "America" / "New_York").write_bytes(b"TZif")
+    for tzpath in [(), (str(tmp_path / "missing"), str(tmp_path))]:
+        monkeypatch.setattr(zoneinfo, "TZPATH", tzpath)
+        assert _tz_transitions(new_york) == ([], None)
+
+
+class _ListedZone(tzinfo):
+    # UTC but for an hour of one day, listing its transitions as pytz does
+    _utc_transition_times = [
+        datetime(1, 1, 1),
+        datetime(2021, 6, 1, 12),
+        datetime(2021, 6, 1, 13),
+    ]
+
+    def utcoffset(self, dt):
+        return None if dt is None else dt.tzinfo.utcoffset(dt)
+
+    def dst(self, dt):
+        return timedelta(0)
+
+    def fromutc(self, dt):
+        utc = dt.replace(tzinfo=None)
+        hour = datetime(2021, 6, 1, 12) <= utc < datetime(2021, 6, 1, 13)
+        offset = timedelta(hours=1 if hour else 0)
+        return (utc + offset).replace(tzinfo=timezone(offset))
+
+
+class _FixedZone(tzinfo):
+    # a fixed offset zone that does not say so, as a DST zone would not
+    def __init__(self, minutes):
+        self.offset = timedelta(minutes=minutes)
+
+    def utcoffset(self, dt):
+        return None if dt is None else self.offset
+
+    def dst(self, dt):
+        return timedelta(0)
+
+    def fromutc(self, dt):
+        return dt + self.offset
+
+
+def _scalar_decode(i, input_format):
+    try:
+        return np.datetime64(_parse_with_format(i, input_format))
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def test_dtparse_int_array():
+    rng = np.random.default_rng(7)
+    for input_format, edges, low, high in [
+        ("YYYYMMDD", [10000228, 20000229, 19000229, 30001231], 9990000, 3e7),
+        ("YYYYMM", [100001, 99912, 300012, 300101], 99000, 310000),
+        ("HHMMSS", [0, 235959, 236000, 5960], -10, 240000),
+    ]:
+        values = np.concatenate(
+            [edges, [-1, 0], rng.integers(low, high, 5000)]
+        ).astype(np.int64)
+        out, valid = dtparse_int_array(values, input_format)
+        assert valid.any() and not valid.all()
+        expected = [_scalar_decode(int(i), input_format) for i in values]
+        assert out.tolist() == [
+            None if np.isnat(e) else e.astype(out.dtype).item()
+            for e in expected
+        ], input_format
+        assert (valid == ~np.isnat(out)).all()
+
+    out, valid = dtparse_int_array(np.array([20050301], dtype=np.uint32))
+    assert out.tolist() == [date(2005, 3, 1)] and valid.all()
+    with pytest.raises(ValueError, match="unsupported input_format"):
+        dtparse_int_array([20050301], "MM/DD/YYYY")
+    with pytest.raises(ValueError, match="expected an integer array"):
+        dtparse_int_array(["20050301"])
+
+
+def test_dtformat_array_int_input():
+    values = np.array([[20050301, 20041231], [20000229, 19991231]])
+    assert dtformat_array(
+        values, "DATE", input_format="YYYYMMDD"
+    ).tolist() == [
+        ["2005-03-01", "2004-12-31"],
+        ["2000-02-29", "1999-12-31"],
+    ]
+    assert dtformat_array(
+        np.array([200503]), "YMD-P1D", input_format="YYYYMM"
+    ).tolist() == ["20050302"]
+    assert dtformat_array(
+        np.array([83015]), "HHMMSS", input_format="HHMMSS"
+    ).tolist() == ["08:30:15"]
+    with pytest.raises(ValueError, match="20050230 using input_format"):
+        dtformat_array(
+            np.array([20050301, 20050230]), "DATE", input_format="YYYYMMDD"
+        )
+
+
+def test_dttranslate_array():
+    dts = _sample_datetimes()[::4]
+    arr = np.array(dts, dtype="datetime64[us]")
+    us_holidays = holidays.US()
+    # two runs of holidays, one longer than a month
+    dense = [date(1950, 3, 4) + timedelta(days=d) for d in range(45)] + [
+        date(1987, 12, 20) + timedelta(days=d) for d in range(20)
+    ]
+    for hols in [None, {"1950-02-28": "x"}, us_holidays, dense]:
+        for translation in [
+            "M1B",
+            "P2B",
+            "P400B",
+            "M2F",
+            "P1F",
+            "M3m",
+            "P25m",
+            "P1P",
+            "M13P",
+            "M1K",
+            "P3K",
+            "P2W",
+            "M10D",
+            "P3H",
+            "P0B",
+        ]:
+            trans = _parse_translation(translation, translation)
+            out = dttranslate_array(arr, translation, hols)
+            assert out.dtype == np.dtype("datetime64[us]")
+            assert out.tolist() == [
+                _DateTime(dt).translate(*trans, holidays=hols) for dt in dts
+            ], (hols, translation)
+
+    # holidays are read for more years as needed
+    endless = [date(2000, 1, 4) + timedelta(days=d) for d in range(800)]
+    assert dttranslate_array(
+        np.array(["2000-01-03"], dtype="datetime64[D]"), "P1B", endless
+    ).tolist() == [datetime(2002, 3, 14)]
+
+    # shapes, other inputs and timezone aware data
+    assert dttranslate_array(arr.reshape(10, 10), "M1B").shape == (10, 10)
+    assert dttranslate_array(arr[:0], "M1B").tolist() == []
+    assert dttranslate_array(["20050301", 20050302], "P1B").tolist() == [
+        datetime(2005, 3, 2),
+        datetime(2005, 3, 3),
+    ]
+    aware = datetime(2005, 3, 4, 23, tzinfo=timezone(timedelta(hours=-5)))
+    assert dttranslate_array([aware], "P1B").tolist() == [
+        aware + timedelta(days=3)
+    ]
+    series = _FakeSeries(
+        np.array(["2005-03-08T04:00"], dtype="datetime64[ns]"),
+        timezone(timedelta(hours=-5)),
+    )
+    assert dttranslate_array(series, "M1B").tolist() == [aware]
+
+    # errors are those of the scalar path
+    with pytest.raises(DateTimeFormatTranslationError):
+        dttranslate_array(arr, "X1B")
+    with pytest.raises(ValueError):
+        dttranslate_array(
+            np.array(["1950-02-10"], dtype="datetime64[D]"),
+            "P1P",
+            [date(1950, 3, 1) + timedelta(days=d) for d in range(31)],
+        )
+    with pytest.raises(ValueError):
+        dttranslate_array(
+            np.array(["9999-12-30"], dtype="datetime64[D]"), "P5B"
+        )
+    with pytest.raises(ValueError):
+        dttranslate_array(np.array(["NaT"], dtype="datetime64[D]"), "P5B")